@@ -10,12 +10,23 @@ config = context.config
 fileConfig(config.config_file_name)
 target_metadata = Base.metadata
 
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Search objects created by raw DDL (FTS5 table + shadow tables, trigram indexes)
+    # are not in the metadata; keep autogenerate from proposing to drop them
+    if reflected and compare_to is None and name and (
+        name.startswith("drugs_fts") or name.endswith("_trgm")
+    ):
+        return False
+    return True
+
 def run_migrations_offline():
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
         url=url,
         target_metadata=target_metadata,
         literal_binds=True,
+        include_object=include_object,
         dialect_opts={"paramstyle": "named"},
     )
 
@@ -32,7 +43,8 @@ async def run_migrations_online():
         # context.configure ni run_sync ichida lambda bilan chaqiramiz
         await connection.run_sync(lambda sync_conn: context.configure(
             connection=sync_conn,
-            target_metadata=target_metadata
+            target_metadata=target_metadata,
+            include_object=include_object,
         ))
 
         # migrationni run_sync bilan lambda ichida chaqiramiz
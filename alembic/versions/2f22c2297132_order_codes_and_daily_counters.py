@@ -0,0 +1,40 @@
+"""Widen order codes and add per-branch daily order number counters
+
+Revision ID: 2f22c2297132
+Revises: 24b0ecd7a43b
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f22c2297132'
+down_revision: Union[str, None] = '24b0ecd7a43b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.alter_column('order_number', existing_type=sa.String(length=10), type_=sa.String(length=32), existing_nullable=False)
+        batch_op.alter_column('barcode', existing_type=sa.String(length=10), type_=sa.String(length=12), existing_nullable=False)
+
+    op.create_table('order_number_counters',
+    sa.Column('branch_id', sa.Integer(), nullable=False),
+    sa.Column('business_day', sa.Date(), nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('branch_id', 'business_day')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('order_number_counters')
+
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.alter_column('barcode', existing_type=sa.String(length=12), type_=sa.String(length=10), existing_nullable=False)
+        batch_op.alter_column('order_number', existing_type=sa.String(length=32), type_=sa.String(length=10), existing_nullable=False)
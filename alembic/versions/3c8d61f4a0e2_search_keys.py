@@ -0,0 +1,41 @@
+"""Normalized search_key on drugs and drug variants
+
+Revision ID: 3c8d61f4a0e2
+Revises: e7a2f05c9b18
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8d61f4a0e2'
+down_revision: Union[str, None] = 'e7a2f05c9b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Left NULL here: existing rows are filled in batches by the search-key backfill job
+    op.add_column('drugs', sa.Column('search_key', sa.String(length=255), nullable=True))
+    op.add_column('drug_variants', sa.Column('search_key', sa.String(length=255), nullable=True))
+    op.create_index(
+        'ix_drugs_search_key', 'drugs', ['search_key'], unique=False,
+        postgresql_ops={'search_key': 'varchar_pattern_ops'},
+    )
+    op.create_index(
+        'ix_drug_variants_search_key', 'drug_variants', ['search_key'], unique=False,
+        postgresql_ops={'search_key': 'varchar_pattern_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_drug_variants_search_key', table_name='drug_variants')
+    op.drop_index('ix_drugs_search_key', table_name='drugs')
+    # Plain ALTER TABLE ... DROP COLUMN (SQLite >= 3.35): batch mode would rebuild
+    # `drugs` and lose the FTS sync triggers attached to it
+    op.drop_column('drug_variants', 'search_key')
+    op.drop_column('drugs', 'search_key')
@@ -0,0 +1,32 @@
+"""Stock reservations for pending orders
+
+Revision ID: 5d0e8a4c7b21
+Revises: 86b9eecf4c01
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0e8a4c7b21'
+down_revision: Union[str, None] = '86b9eecf4c01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('inventories', sa.Column('reserved_quantity', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('orders', sa.Column('reservation_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_orders_status_reservation_expires_at', 'orders', ['status', 'reservation_expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_status_reservation_expires_at', table_name='orders')
+    with op.batch_alter_table('orders') as batch_op:
+        batch_op.drop_column('reservation_expires_at')
+    with op.batch_alter_table('inventories') as batch_op:
+        batch_op.drop_column('reserved_quantity')
@@ -0,0 +1,25 @@
+"""Index drug_variants.drug_id for per-drug variant loads
+
+Revision ID: 5e1a9c3f7b64
+Revises: 9f4b2e7d1c35
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1a9c3f7b64'
+down_revision: Union[str, None] = '9f4b2e7d1c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_drug_variants_drug_id', 'drug_variants', ['drug_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_drug_variants_drug_id', table_name='drug_variants')
@@ -0,0 +1,81 @@
+"""Cold archive tables for old orders (monthly partitions on PostgreSQL)
+
+Revision ID: 715d5bedb365
+Revises: 5d0e8a4c7b21
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '715d5bedb365'
+down_revision: Union[str, None] = '5d0e8a4c7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == 'postgresql'
+    status_type = (
+        postgresql.ENUM('PENDING', 'CONFIRMED', 'CANCELLED', name='orderstatus', create_type=False)
+        if is_postgresql
+        else sa.Enum('PENDING', 'CONFIRMED', 'CANCELLED', name='orderstatus')
+    )
+
+    op.create_table('orders_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('order_number', sa.String(length=32), nullable=False),
+    sa.Column('barcode', sa.String(length=12), nullable=False),
+    sa.Column('branch_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', status_type, nullable=False),
+    sa.Column('total_amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('confirmed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('reservation_expires_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['branch_id'], ['branches.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id', 'created_at'),
+    postgresql_partition_by='RANGE (created_at)'
+    )
+    op.create_index('ix_orders_archive_created_at_id', 'orders_archive', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_archive_branch_id_created_at_id', 'orders_archive', ['branch_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_archive_user_id_created_at_id', 'orders_archive', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_archive_barcode', 'orders_archive', ['barcode'], unique=False)
+    op.create_index('ix_orders_archive_order_number', 'orders_archive', ['order_number'], unique=False)
+    if is_postgresql:
+        # Monthly partitions are created by the archiver before it moves rows in;
+        # the default partition only catches anything outside them.
+        op.execute('CREATE TABLE orders_archive_default PARTITION OF orders_archive DEFAULT')
+
+    op.create_table('order_items_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('drug_id', sa.Integer(), nullable=False),
+    sa.Column('drug_variant_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('subtotal', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['drug_id'], ['drugs.id'], ),
+    sa.ForeignKeyConstraint(['drug_variant_id'], ['drug_variants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_archive_order_id'), 'order_items_archive', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_items_archive_order_id'), table_name='order_items_archive')
+    op.drop_table('order_items_archive')
+    op.drop_index('ix_orders_archive_order_number', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_barcode', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_user_id_created_at_id', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_branch_id_created_at_id', table_name='orders_archive')
+    op.drop_index('ix_orders_archive_created_at_id', table_name='orders_archive')
+    # Dropping the parent drops every monthly partition with it
+    op.drop_table('orders_archive')
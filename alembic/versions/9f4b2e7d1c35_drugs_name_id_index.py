@@ -0,0 +1,25 @@
+"""Keyset index for the drug catalogue listing
+
+Revision ID: 9f4b2e7d1c35
+Revises: 3c8d61f4a0e2
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9f4b2e7d1c35'
+down_revision: Union[str, None] = '3c8d61f4a0e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_drugs_name_id', 'drugs', ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_drugs_name_id', table_name='drugs')
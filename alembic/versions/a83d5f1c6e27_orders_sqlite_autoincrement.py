@@ -0,0 +1,43 @@
+"""Never reuse archived order ids on SQLite (AUTOINCREMENT on orders and order_items)
+
+Revision ID: a83d5f1c6e27
+Revises: 5e1a9c3f7b64
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83d5f1c6e27'
+down_revision: Union[str, None] = '5e1a9c3f7b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (hot table, its archive table); PostgreSQL sequences never go backwards, so this is SQLite only
+TABLES = (('orders', 'orders_archive'), ('order_items', 'order_items_archive'))
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, archive in TABLES:
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+            pass
+        # Start the sequence past every id already handed out, including archived ones
+        op.execute(f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+        op.execute(
+            f"INSERT INTO sqlite_sequence (name, seq) "
+            f"SELECT '{table}', COALESCE(MAX(id), 0) FROM "
+            f"(SELECT id FROM {table} UNION ALL SELECT id FROM {archive})"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, _ in reversed(TABLES):
+        with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': False}):
+            pass
@@ -0,0 +1,32 @@
+"""Composite indexes for keyset pagination of order listings
+
+Revision ID: c359eb611e86
+Revises: 2f22c2297132
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c359eb611e86'
+down_revision: Union[str, None] = '2f22c2297132'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_orders_created_at_id', 'orders', ['created_at', 'id'], unique=False)
+    op.create_index('ix_orders_branch_id_created_at_id', 'orders', ['branch_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_user_id_created_at_id', 'orders', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_status_created_at', 'orders', ['status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_status_created_at', table_name='orders')
+    op.drop_index('ix_orders_user_id_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_branch_id_created_at_id', table_name='orders')
+    op.drop_index('ix_orders_created_at_id', table_name='orders')
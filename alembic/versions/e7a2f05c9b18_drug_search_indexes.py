@@ -0,0 +1,57 @@
+"""Drug search: pg_trgm GIN indexes on PostgreSQL, FTS5 trigram table on SQLite
+
+Revision ID: e7a2f05c9b18
+Revises: b41e7c9a2d53
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a2f05c9b18'
+down_revision: Union[str, None] = 'b41e7c9a2d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX ix_drugs_name_trgm ON drugs USING gin (name gin_trgm_ops)')
+        op.execute('CREATE INDEX ix_drugs_code_trgm ON drugs USING gin (code gin_trgm_ops)')
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE drugs_fts USING fts5("
+        "name, code, content='drugs', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        "CREATE TRIGGER drugs_fts_ai AFTER INSERT ON drugs BEGIN "
+        "INSERT INTO drugs_fts(rowid, name, code) VALUES (new.id, new.name, new.code); END"
+    )
+    op.execute(
+        "CREATE TRIGGER drugs_fts_ad AFTER DELETE ON drugs BEGIN "
+        "INSERT INTO drugs_fts(drugs_fts, rowid, name, code) VALUES ('delete', old.id, old.name, old.code); END"
+    )
+    op.execute(
+        "CREATE TRIGGER drugs_fts_au AFTER UPDATE OF name, code ON drugs BEGIN "
+        "INSERT INTO drugs_fts(drugs_fts, rowid, name, code) VALUES ('delete', old.id, old.name, old.code); "
+        "INSERT INTO drugs_fts(rowid, name, code) VALUES (new.id, new.name, new.code); END"
+    )
+    # Index the drugs that already exist
+    op.execute("INSERT INTO drugs_fts(drugs_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_drugs_code_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_drugs_name_trgm')
+        return
+
+    op.execute('DROP TRIGGER IF EXISTS drugs_fts_au')
+    op.execute('DROP TRIGGER IF EXISTS drugs_fts_ad')
+    op.execute('DROP TRIGGER IF EXISTS drugs_fts_ai')
+    op.execute('DROP TABLE IF EXISTS drugs_fts')
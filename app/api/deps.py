@@ -1,21 +1,29 @@
 from collections.abc import Iterable
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import APIKeyHeader, OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.api_keys import API_KEY_HEADER, get_api_key_principal
 from app.core.config import settings
+from app.core.principal import Principal
 from app.core.security import decode_token
+from app.core.principal_cache import get_principal, invalidate_principal
 from app.db import get_session
 from app.models import User, UserRole
+from app.repositories.api_key import ApiKeyRepository
 from app.repositories.user import UserRepository
+from app.services.api_key_service import ApiKeyService
 from app.services.auth_service import AuthService
 from app.services.branch_service import BranchService
 from app.services.drug_service import DrugService
 from app.services.inventory_service import InventoryService
 from app.services.pharmacy_service import PharmacyService
+from app.services.staff_service import StaffService
 from app.services.orders import OrderService
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_v1_prefix}/auth/login")
+# Either credential may be sent, so neither scheme rejects a request on its own
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_v1_prefix}/auth/login", auto_error=False)
+api_key_scheme = APIKeyHeader(name=API_KEY_HEADER, auto_error=False)
 
 
 async def get_db_session() -> AsyncSession:
@@ -29,17 +37,46 @@ async def get_user_repository(
     return UserRepository(session)
 
 
+async def get_api_key_repository(
+    session: AsyncSession = Depends(get_db_session),
+) -> ApiKeyRepository:
+    return ApiKeyRepository(session)
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
+    api_key: str | None = Depends(api_key_scheme),
+    token: str | None = Depends(oauth2_scheme),
     user_repo: UserRepository = Depends(get_user_repository),
-) -> User:
+    api_key_repo: ApiKeyRepository = Depends(get_api_key_repository),
+) -> Principal:
+    """Caller authenticated by a terminal API key (X-API-Key) or a bearer access token"""
+    if api_key is not None:
+        principal = await get_api_key_principal(api_key, api_key_repo.get_principal)
+        if principal is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API key",
+            )
+        return principal
+    return await _principal_from_token(token, user_repo)
+
+
+async def get_token_user(
+    token: str | None = Depends(oauth2_scheme),
+    user_repo: UserRepository = Depends(get_user_repository),
+) -> Principal:
+    """Bearer-token callers only; for endpoints a terminal key must not reach (key management)"""
+    return await _principal_from_token(token, user_repo)
+
+
+async def _principal_from_token(token: str | None, user_repo: UserRepository) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    if token is None:
+        raise credentials_exception
     try:
         payload = decode_token(token)
     except Exception as exc:  # noqa: BLE001
@@ -52,14 +89,45 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
 
-    user = await user_repo.get_by_id(int(user_id))
-    if user is None or not user.is_active:
+    snapshot = await get_principal(int(user_id), user_repo.get_principal)
+    if snapshot is None or not snapshot.is_active:
         raise credentials_exception
+
+    principal = Principal.from_claims(payload)
+    if principal is None or settings.auth_identity_source == "database":
+        # DB-backed identity, or a token issued before identity claims existed
+        return snapshot
+    if principal.token_version > snapshot.token_version:
+        # Issued after a change the cached snapshot predates: re-read the users table
+        await invalidate_principal(snapshot.id)
+        snapshot = await get_principal(int(user_id), user_repo.get_principal)
+        if snapshot is None or not snapshot.is_active:
+            raise credentials_exception
+    if principal.token_version != snapshot.token_version:
+        raise credentials_exception
+    return principal
+
+
+async def get_current_user_model(
+    principal: Principal = Depends(get_token_user),
+    user_repo: UserRepository = Depends(get_user_repository),
+) -> User:
+    """
+    Load the full User row, for the few endpoints that need more than the token claims.
+    Bearer tokens only: a terminal API key acts under its issuer's id but is not that user.
+    """
+    user = await user_repo.get_by_id(principal.id)
+    if user is None or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 async def get_current_cashier(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Verify current user is a cashier or superadmin/operator
     """
@@ -71,8 +139,8 @@ async def get_current_cashier(
     return current_user
 
 async def get_current_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Verify current user is a superadmin or operator
     """
@@ -96,7 +164,7 @@ def require_roles(*allowed_roles: Iterable[UserRole] | UserRole):
     for role in allowed_roles:
         _flatten(role)
 
-    async def dependency(current_user: User = Depends(get_current_user)) -> User:
+    async def dependency(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role not in flattened_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -119,10 +187,18 @@ async def get_auth_service(session: AsyncSession = Depends(get_db_session)) -> A
     return AuthService(session)
 
 
+async def get_api_key_service(session: AsyncSession = Depends(get_db_session)) -> ApiKeyService:
+    return ApiKeyService(session)
+
+
 async def get_pharmacy_service(session: AsyncSession = Depends(get_db_session)) -> PharmacyService:
     return PharmacyService(session)
 
 
+async def get_staff_service(session: AsyncSession = Depends(get_db_session)) -> StaffService:
+    return StaffService(session)
+
+
 async def get_branch_service(session: AsyncSession = Depends(get_db_session)) -> BranchService:
     return BranchService(session)
 
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1 import auth, branches, drugs, inventory, pharmacies, orders
+from app.api.v1 import auth, branches, drugs, inventory, metrics, pharmacies, orders
 
 router = APIRouter()
 router.include_router(auth.router)
@@ -9,6 +9,7 @@ router.include_router(branches.router)
 router.include_router(drugs.router)
 router.include_router(orders.router)
 router.include_router(inventory.router)
+router.include_router(metrics.router)
 
 
 __all__ = ["router"]
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Request, status
 
-from app.api.deps import get_auth_service, get_current_user
-from app.core.security import create_access_token, create_refresh_token, decode_token
+from app.api.deps import get_api_key_service, get_auth_service, get_current_user_model, get_token_user
+from app.core.principal import Principal
 from app.models import User
 from app.schemas import UserRead
+from app.schemas.api_key import ApiKeyCreate, ApiKeyCreated, ApiKeyRead
 from app.schemas.auth import LoginRequest, RefreshRequest, RegisterRequest, Token
+from app.services.api_key_service import ApiKeyService
 from app.services.auth_service import AuthService
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -19,48 +21,55 @@ async def register_user(
 
 
 @router.post("/login", response_model=Token)
-async def login(payload: LoginRequest, auth_service: AuthService = Depends(get_auth_service)):
-    access, refresh = await auth_service.authenticate(payload)
+async def login(
+    payload: LoginRequest,
+    request: Request,
+    auth_service: AuthService = Depends(get_auth_service),
+):
+    client_ip = request.client.host if request.client else None
+    access, refresh = await auth_service.authenticate(payload, client_ip)
     return Token(access_token=access, refresh_token=refresh)
 
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(payload: RefreshRequest, auth_service: AuthService = Depends(get_auth_service)):
-    try:
-        token_data = decode_token(payload.refresh_token)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token") from exc
-
-    if token_data.get("type") != "refresh":
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
-
-    user_id = token_data.get("sub")
-    if user_id is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
-
-    user = await auth_service.get_user_by_id(int(user_id))
-    if user is None or not user.is_active:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-
-    access = create_access_token(user.id)
-    refresh = create_refresh_token(user.id)
+    access, refresh = await auth_service.rotate_refresh_token(payload.refresh_token)
     return Token(access_token=access, refresh_token=refresh)
 
 
 @router.get("/me", response_model=UserRead)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user_model)):
     return current_user
 
 
+@router.post("/api-keys", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+async def create_api_key(
+    payload: ApiKeyCreate,
+    current_user: Principal = Depends(get_token_user),
+    service: ApiKeyService = Depends(get_api_key_service),
+):
+    """Issue a terminal key; the plaintext `key` is only returned here"""
+    api_key, key = await service.create_key(
+        current_user,
+        name=payload.name,
+        branch_id=payload.branch_id,
+        role=payload.role,
+    )
+    return ApiKeyCreated(**ApiKeyRead.model_validate(api_key).model_dump(), key=key)
+
+
+@router.get("/api-keys", response_model=list[ApiKeyRead])
+async def list_api_keys(
+    current_user: Principal = Depends(get_token_user),
+    service: ApiKeyService = Depends(get_api_key_service),
+):
+    return await service.list_keys(current_user)
 
 
-
-
-
-
-
-
-
-
-
-
+@router.delete("/api-keys/{api_key_id}", response_model=ApiKeyRead)
+async def revoke_api_key(
+    api_key_id: int,
+    current_user: Principal = Depends(get_token_user),
+    service: ApiKeyService = Depends(get_api_key_service),
+):
+    return await service.revoke_key(current_user, api_key_id)
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from app.api import deps
-from app.models import User, UserRole
+from app.core.principal import Principal
+from app.models import UserRole
 from app.schemas import (
     BranchAssignAdmin,
     BranchCreate,
@@ -17,7 +18,7 @@ router = APIRouter(prefix="/branches", tags=["branches"])
 @router.post("", response_model=BranchRead, status_code=status.HTTP_201_CREATED)
 async def create_branch(
     payload: BranchCreate,
-    current_user: User = Depends(deps.allow_pharmacy_admin),
+    current_user: Principal = Depends(deps.allow_pharmacy_admin),
     service: BranchService = Depends(deps.get_branch_service),
 ):
     pharmacy_id = payload.pharmacy_id or current_user.pharmacy_id
@@ -37,7 +38,7 @@ async def create_branch(
 async def assign_branch_admin(
     branch_id: int,
     payload: BranchAssignAdmin,
-    _: User = Depends(deps.allow_pharmacy_admin),
+    _: Principal = Depends(deps.allow_pharmacy_admin),
     service: BranchService = Depends(deps.get_branch_service),
 ):
     return await service.assign_admin(branch_id, payload.user_id)
@@ -46,7 +47,7 @@ async def assign_branch_admin(
 @router.get("", response_model=list[BranchRead])
 async def list_branches(
     pharmacy_id: int | None = None,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_user),
     service: BranchService = Depends(deps.get_branch_service),
 ):
     resolved_pharmacy_id = pharmacy_id or current_user.pharmacy_id
@@ -59,7 +60,7 @@ async def list_branches(
 async def update_branch(
     branch_id: int,
     payload: BranchUpdate,
-    _: User = Depends(deps.allow_pharmacy_admin),
+    _: Principal = Depends(deps.allow_pharmacy_admin),
     service: BranchService = Depends(deps.get_branch_service),
 ):
     return await service.update_branch(
@@ -75,7 +76,7 @@ async def update_branch(
 @router.delete("/{branch_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_branch(
     branch_id: int,
-    _: User = Depends(deps.allow_pharmacy_admin),
+    _: Principal = Depends(deps.allow_pharmacy_admin),
     service: BranchService = Depends(deps.get_branch_service),
 ):
     await service.delete_branch(branch_id)
@@ -84,7 +85,7 @@ async def delete_branch(
 @router.get("/all", response_model=list[BranchRead])
 async def list_all_branches(
     service: BranchService = Depends(deps.get_branch_service),
-    _: User = Depends(deps.allow_operator),
+    _: Principal = Depends(deps.allow_operator),
 ):
     """Get all branches across all pharmacies (only for operators/superadmins)"""
     return await service.list_all_branches()
@@ -97,7 +98,7 @@ async def get_nearby_branches(
     radius_km: float = Query(
         10.0, ge=0, description="Radius in kilometers (0 = no limit)"
     ),
-    _: User = Depends(deps.allow_all_users),
+    _: Principal = Depends(deps.allow_all_users),
     service: BranchService = Depends(deps.get_branch_service),
 ):
     """
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import hashlib
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 
 from app.api import deps
-from app.models import User
+from app.core.config import settings
+from app.core.principal import Principal
+from app.core.versioning import catalogue_version
 from app.schemas import (
+    DrugCatalogueRead,
     DrugCreate,
     DrugRead,
+    DrugSuggestion,
     DrugVariantCreate,
+    DrugVariantLookup,
+    DrugVariantLookupBatch,
+    DrugVariantLookupResult,
     DrugVariantRead,
     DrugVariantUpdate,
     InventoryCreate,
@@ -18,11 +27,53 @@ from app.services.inventory_service import InventoryService
 
 router = APIRouter(prefix="/drugs", tags=["drugs"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _set_next_cursor(response: Response, next_cursor: str | None) -> None:
+    """Expose the keyset cursor for the following page; absent on the last page"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+async def _catalogue_etag(request: Request) -> str:
+    """
+    Weak validator for a catalogue page: the catalogue version (bumped on every drug or
+    variant write) plus the query that selected the page.
+    """
+    version = await catalogue_version.get()
+    query = hashlib.sha1(str(sorted(request.query_params.multi_items())).encode()).hexdigest()[:16]
+    return f'W/"{version}-{query}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+async def _conditional(request: Request, response: Response) -> Response | None:
+    """
+    A 304 when the client already holds this page, checked before the session is touched;
+    otherwise tags the response and returns None.
+    """
+    etag = await _catalogue_etag(request)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
 
 @router.post("", response_model=DrugRead, status_code=status.HTTP_201_CREATED)
 async def create_drug(
     payload: DrugCreate,
-    _: User = Depends(deps.allow_branch_admin_or_cashier),
+    _: Principal = Depends(deps.allow_branch_admin_or_cashier),
     service: DrugService = Depends(deps.get_drug_service),
 ):
     return await service.create_drug(
@@ -37,21 +88,55 @@ async def create_drug(
 
 @router.get("", response_model=list[DrugRead])
 async def list_drugs(
+    request: Request,
+    response: Response,
     search: str | None = None,
     is_active: bool | None = None,
+    limit: int = Query(100, ge=1, le=settings.drug_list_max_limit),
+    cursor: str | None = Query(None, description="Opaque cursor from X-Next-Cursor"),
     service: DrugService = Depends(deps.get_drug_service),
-    _: User = Depends(deps.get_current_user),
+    _: Principal = Depends(deps.get_current_user),
 ):
-    return await service.list_drugs(is_active=is_active, search=search)
+    """Ordered by name; revalidate with If-None-Match to get 304 while the catalogue is unchanged"""
+    not_modified = await _conditional(request, response)
+    if not_modified is not None:
+        return not_modified
+    drugs = await service.list_drugs(limit=limit, cursor=cursor, is_active=is_active, search=search)
+    _set_next_cursor(response, service.next_cursor(drugs, limit))
+    return drugs
 
 
 @router.get("/search", response_model=list[DrugRead])
 async def search_drugs(
-    query: str,
+    request: Request,
+    response: Response,
+    query: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(20, ge=1, le=settings.drug_search_max_limit),
+    offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="Opaque cursor from X-Next-Cursor; when set, offset is ignored"),
+    is_active: bool | None = None,
+    service: DrugService = Depends(deps.get_drug_service),
+    _: Principal = Depends(deps.get_current_user),
+):
+    """Best matches first; tolerates small typos in name or code"""
+    not_modified = await _conditional(request, response)
+    if not_modified is not None:
+        return not_modified
+    offset = service.search_offset(cursor, offset)
+    drugs = await service.search_drugs(query, limit=limit, offset=offset, is_active=is_active)
+    _set_next_cursor(response, service.next_search_cursor(drugs, limit, offset))
+    return drugs
+
+
+@router.get("/autocomplete", response_model=list[DrugSuggestion])
+async def autocomplete_drugs(
+    query: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(10, ge=1, le=settings.drug_autocomplete_max_limit),
     service: DrugService = Depends(deps.get_drug_service),
-    _: User = Depends(deps.get_current_user),
+    _: Principal = Depends(deps.get_current_user),
 ):
-    return await service.list_drugs(search=query)
+    """Prefix completion over drug names/codes and variant names/SKUs, most ordered first"""
+    return await service.autocomplete(query, limit=limit)
 
 
 @router.post(
@@ -61,7 +146,7 @@ async def search_drugs(
 )
 async def add_inventory(
     payload: InventoryCreate,
-    _: User = Depends(deps.allow_pharmacy_admin),
+    _: Principal = Depends(deps.allow_pharmacy_admin),
     service: InventoryService = Depends(deps.get_inventory_service),
 ):
     return await service.add_inventory(
@@ -80,7 +165,7 @@ async def add_inventory(
 async def update_inventory(
     inventory_id: int,
     payload: InventoryUpdate,
-    _: User = Depends(deps.allow_branch_admin_or_cashier),
+    _: Principal = Depends(deps.allow_branch_admin_or_cashier),
     service: InventoryService = Depends(deps.get_inventory_service),
 ):
     if payload.quantity is None and payload.reorder_level is None:
@@ -94,17 +179,46 @@ async def update_inventory(
 
 @router.get("/all", response_model=list[DrugRead])
 async def list_all_drugs(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=settings.drug_list_max_limit),
+    cursor: str | None = Query(None, description="Opaque cursor from X-Next-Cursor"),
     service: DrugService = Depends(deps.get_drug_service),
-    _: User = Depends(deps.get_current_user),
+    _: Principal = Depends(deps.get_current_user),
 ):
-    """Get all drugs (no filters)"""
-    return await service.list_drugs()
+    """Get all drugs (no filters), a page at a time"""
+    not_modified = await _conditional(request, response)
+    if not_modified is not None:
+        return not_modified
+    drugs = await service.list_drugs(limit=limit, cursor=cursor)
+    _set_next_cursor(response, service.next_cursor(drugs, limit))
+    return drugs
+
+
+@router.get("/catalogue", response_model=list[DrugCatalogueRead])
+async def list_catalogue(
+    request: Request,
+    response: Response,
+    search: str | None = None,
+    is_active: bool | None = None,
+    limit: int = Query(100, ge=1, le=settings.drug_list_max_limit),
+    cursor: str | None = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    service: DrugService = Depends(deps.get_drug_service),
+    _: Principal = Depends(deps.get_current_user),
+):
+    """Paged like /drugs, with each drug's active variants embedded"""
+    not_modified = await _conditional(request, response)
+    if not_modified is not None:
+        return not_modified
+    drugs = await service.list_catalogue(limit=limit, cursor=cursor, is_active=is_active, search=search)
+    _set_next_cursor(response, service.next_cursor(drugs, limit))
+    return drugs
 
 
 @router.post("/variants", response_model=DrugVariantRead, status_code=status.HTTP_201_CREATED)
 async def create_drug_variant(
     payload: DrugVariantCreate,
-    _: User = Depends(deps.allow_branch_admin_or_cashier),
+    _: Principal = Depends(deps.allow_branch_admin_or_cashier),
     service: DrugVariantService = Depends(deps.get_drug_variant_service),
 ):
     return await service.create_variant(
@@ -116,11 +230,34 @@ async def create_drug_variant(
     )
 
 
+@router.get("/variants/by-sku/{sku}", response_model=DrugVariantLookup)
+async def get_variant_by_sku(
+    sku: str,
+    current_user: Principal = Depends(deps.get_current_user),
+    service: DrugVariantService = Depends(deps.get_drug_variant_service),
+):
+    """Scanned barcode -> active variant, its drug and stock at the caller's branch"""
+    result = await service.lookup_by_skus([sku], branch_id=current_user.branch_id)
+    if not result["items"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Variant not found")
+    return result["items"][0]
+
+
+@router.post("/variants/by-sku", response_model=DrugVariantLookupResult)
+async def get_variants_by_sku(
+    payload: DrugVariantLookupBatch,
+    current_user: Principal = Depends(deps.get_current_user),
+    service: DrugVariantService = Depends(deps.get_drug_variant_service),
+):
+    """Batch form of GET /variants/by-sku/{sku}; unknown or inactive SKUs are listed in `missing`"""
+    return await service.lookup_by_skus(payload.skus, branch_id=current_user.branch_id)
+
+
 @router.get("/variants/{drug_id}", response_model=list[DrugVariantRead])
 async def list_drug_variants(
     drug_id: int,
     service: DrugVariantService = Depends(deps.get_drug_variant_service),
-    _: User = Depends(deps.get_current_user),
+    _: Principal = Depends(deps.get_current_user),
 ):
     """Get all variants for a specific drug"""
     return await service.list_variants_by_drug(drug_id)
@@ -130,7 +267,7 @@ async def list_drug_variants(
 async def update_drug_variant(
     variant_id: int,
     payload: DrugVariantUpdate,
-    _: User = Depends(deps.allow_operator),
+    _: Principal = Depends(deps.allow_operator),
     service: DrugVariantService = Depends(deps.get_drug_variant_service),
 ):
     return await service.update_variant(
@@ -145,7 +282,7 @@ async def update_drug_variant(
 @router.delete("/variants/{variant_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_drug_variant(
     variant_id: int,
-    _: User = Depends(deps.allow_operator),
+    _: Principal = Depends(deps.allow_operator),
     service: DrugVariantService = Depends(deps.get_drug_variant_service),
 ):
     await service.delete_variant(variant_id)
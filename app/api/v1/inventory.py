@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.api import deps
-from app.models import User
+from app.core.principal import Principal
 from app.schemas.inventory import InventoryRead
 from app.services.inventory_service import InventoryService
 
@@ -13,7 +13,7 @@ async def get_total_quantity_for_pharmacy(
     pharmacy_id: int,
     drug_id: int,
     drug_variant_id: int | None = Query(None, description="Drug variant ID (optional)"),
-    current_user: User = Depends(deps.allow_pharmacy_admin),
+    current_user: Principal = Depends(deps.allow_pharmacy_admin),
     service: InventoryService = Depends(deps.get_inventory_service),
 ):
     """
@@ -41,7 +41,7 @@ async def get_total_quantity_for_pharmacy(
 @router.get("/branch/{branch_id}", response_model=list[InventoryRead])
 async def list_inventory_by_branch(
     branch_id: int,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_current_user),
     service: InventoryService = Depends(deps.get_inventory_service),
 ):
     """Get all inventory items for a specific branch"""
@@ -51,7 +51,7 @@ async def list_inventory_by_branch(
 @router.get("/pharmacy/{pharmacy_id}", response_model=list[InventoryRead])
 async def list_inventory_by_pharmacy(
     pharmacy_id: int,
-    current_user: User = Depends(deps.allow_pharmacy_admin),
+    current_user: Principal = Depends(deps.allow_pharmacy_admin),
     service: InventoryService = Depends(deps.get_inventory_service),
 ):
     """Get all inventory items for all branches of a pharmacy"""
@@ -72,7 +72,7 @@ async def list_branches_with_drug(
     min_quantity: int = Query(
         1, ge=0, description="Minimum quantity in stock (default: 1)"
     ),
-    current_user: User = Depends(deps.allow_all_users),
+    current_user: Principal = Depends(deps.allow_all_users),
     service: InventoryService = Depends(deps.get_inventory_service),
 ):
     """
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import require_roles
+from app.core.metrics import metrics
+from app.core.principal import Principal
+from app.models import UserRole
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+async def read_metrics(
+    current_user: Principal = Depends(require_roles(UserRole.SUPERADMIN, UserRole.OPERATOR)),
+) -> str:
+    """Prometheus text exposition of this worker's in-process metrics"""
+    return metrics.render()
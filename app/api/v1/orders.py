@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, Header, status, Query, Response
 from typing import List, Optional
 
 from app.api.deps import (
     get_current_user,
     get_order_service,
+    get_token_user,
     allow_cashier,
     allow_branch_admin_or_cashier,
     allow_all_users,
     require_roles,
 )
-from app.models import User, UserRole
+from app.core.idempotency import IDEMPOTENCY_HEADER, run_idempotent
+from app.core.principal import Principal
+from app.models import UserRole
 from app.schemas.orders import (
     OrderCreate,
     OrderResponse,
@@ -23,6 +26,14 @@ from app.services.orders import OrderService
 
 router = APIRouter(prefix="/order", tags=["Orders"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    """Expose the keyset cursor for the following page; absent on the last page"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
 
 @router.post(
     "/",
@@ -33,7 +44,9 @@ router = APIRouter(prefix="/order", tags=["Orders"])
 )
 async def create_order(
     order_data: OrderCreate,
-    current_user: User = Depends(allow_all_users),
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    current_user: Principal = Depends(allow_all_users),
     service: OrderService = Depends(get_order_service),
 ):
     """
@@ -41,9 +54,20 @@ async def create_order(
     - **branch_id**: ID of the branch where order is placed
     - **items**: List of items with drug_id, drug_variant_id (optional), and qty
     
-    Returns generated order_number and barcode
+    Returns generated order_number and barcode.
+    Send an **Idempotency-Key** header to make client retries safe: a repeated key
+    returns the first response instead of creating another order.
     """
-    return await service.create_order(order_data, current_user.id)
+    if idempotency_key is None:
+        return await service.create_order(order_data, current_user.id)
+    return await run_idempotent(
+        scope="order:create",
+        owner=current_user.actor,
+        key=idempotency_key,
+        request_data=order_data,
+        response=response,
+        operation=lambda: service.create_order(order_data, current_user.id),
+    )
 
 
 @router.post(
@@ -53,8 +77,10 @@ async def create_order(
     description="Scan order by barcode and confirm it. Reduces inventory. Cashier role required."
 )
 async def scan_order(
+    response: Response,
     barcode: str = Query(..., description="Order barcode to scan"),
-    current_user: User = Depends(allow_cashier),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER),
+    current_user: Principal = Depends(allow_cashier),
     service: OrderService = Depends(get_order_service),
 ):
     """
@@ -65,8 +91,19 @@ async def scan_order(
     - Marks order as confirmed
     
     Only cashiers, branch admins, operators, and superadmins can scan orders.
+    A repeated **Idempotency-Key** returns the first confirmation instead of
+    "already confirmed".
     """
-    return await service.scan_order(barcode)
+    if idempotency_key is None:
+        return await service.scan_order(barcode)
+    return await run_idempotent(
+        scope="order:scan",
+        owner=current_user.actor,
+        key=idempotency_key,
+        request_data={"barcode": barcode},
+        response=response,
+        operation=lambda: service.scan_order(barcode),
+    )
 
 
 @router.get(
@@ -76,21 +113,27 @@ async def scan_order(
     description="Get all orders created by the current user"
 )
 async def get_my_orders(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     status: Optional[OrderStatus] = Query(None, description="Filter by order status"),
-    current_user: User = Depends(allow_all_users),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; when set, skip is ignored"),
+    current_user: Principal = Depends(get_token_user),
     service: OrderService = Depends(get_order_service),
 ):
     """
-    Get orders created by current user with optional status filter
+    Get orders created by current user with optional status filter.
+    Not available to terminal API keys, which have no orders of their own.
     """
-    return await service.get_all_orders(
+    orders = await service.get_all_orders(
         skip=skip,
         limit=limit,
         status=status,
-        user_id=current_user.id
+        user_id=current_user.id,
+        cursor=cursor
     )
+    _set_next_cursor(response, service.next_cursor(orders, limit))
+    return orders
 
 
 @router.get(
@@ -101,10 +144,12 @@ async def get_my_orders(
 )
 async def get_branch_orders(
     branch_id: int,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     status: Optional[OrderStatus] = Query(None, description="Filter by order status"),
-    current_user: User = Depends(allow_branch_admin_or_cashier),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; when set, skip is ignored"),
+    current_user: Principal = Depends(allow_branch_admin_or_cashier),
     service: OrderService = Depends(get_order_service),
 ):
     """
@@ -121,12 +166,15 @@ async def get_branch_orders(
                 detail="You can only view orders for your own branch"
             )
     
-    return await service.get_all_orders(
+    orders = await service.get_all_orders(
         skip=skip,
         limit=limit,
         status=status,
-        branch_id=branch_id
+        branch_id=branch_id,
+        cursor=cursor
     )
+    _set_next_cursor(response, service.next_cursor(orders, limit))
+    return orders
 
 
 @router.get(
@@ -137,10 +185,12 @@ async def get_branch_orders(
 )
 async def get_pharmacy_orders(
     pharmacy_id: int,
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     status: Optional[OrderStatus] = Query(None, description="Filter by order status"),
-    current_user: User = Depends(
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; when set, skip is ignored"),
+    current_user: Principal = Depends(
         require_roles(UserRole.PHARMACY_ADMIN, UserRole.OPERATOR, UserRole.SUPERADMIN)
     ),
     service: OrderService = Depends(get_order_service),
@@ -159,12 +209,15 @@ async def get_pharmacy_orders(
                 detail="You can only view orders for your own pharmacy"
             )
     
-    return await service.get_orders_by_pharmacy(
+    orders = await service.get_orders_by_pharmacy(
         pharmacy_id=pharmacy_id,
         skip=skip,
         limit=limit,
-        status=status
+        status=status,
+        cursor=cursor
     )
+    _set_next_cursor(response, service.next_cursor(orders, limit))
+    return orders
 
 
 @router.get(
@@ -175,7 +228,7 @@ async def get_pharmacy_orders(
 )
 async def get_order(
     order_id: int,
-    current_user: User = Depends(allow_all_users),
+    current_user: Principal = Depends(allow_all_users),
     service: OrderService = Depends(get_order_service),
 ):
     """
@@ -222,25 +275,30 @@ async def get_order(
     description="Get list of all orders with optional filters. Operator and Superadmin access only."
 )
 async def get_all_orders(
+    response: Response,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of records to return"),
     status: Optional[OrderStatus] = Query(None, description="Filter by order status"),
     branch_id: Optional[int] = Query(None, description="Filter by branch ID"),
     user_id: Optional[int] = Query(None, description="Filter by user ID"),
-    current_user: User = Depends(require_roles(UserRole.OPERATOR, UserRole.SUPERADMIN)),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor; when set, skip is ignored"),
+    current_user: Principal = Depends(require_roles(UserRole.OPERATOR, UserRole.SUPERADMIN)),
     service: OrderService = Depends(get_order_service),
 ):
     """
     Get all orders across the system with filters.
     Only operators and superadmins can access this endpoint.
     """
-    return await service.get_all_orders(
+    orders = await service.get_all_orders(
         skip=skip,
         limit=limit,
         status=status,
         branch_id=branch_id,
-        user_id=user_id
+        user_id=user_id,
+        cursor=cursor
     )
+    _set_next_cursor(response, service.next_cursor(orders, limit))
+    return orders
 
 
 @router.delete(
@@ -251,7 +309,7 @@ async def get_all_orders(
 )
 async def cancel_order(
     order_id: int,
-    current_user: User = Depends(allow_all_users),
+    current_user: Principal = Depends(allow_all_users),
     service: OrderService = Depends(get_order_service),
 ):
     """
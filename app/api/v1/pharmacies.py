@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.api import deps
-from app.models import User
+from app.core.principal import Principal
+from app.models import UserRole
 from app.schemas import (
     PharmacyRead,
     PharmacyRequestCreate,
     PharmacyRequestDecision,
     PharmacyRequestRead,
+    StaffBulkCreate,
+    StaffBulkResult,
 )
 from app.services.pharmacy_service import PharmacyService
+from app.services.staff_service import StaffService
 
 router = APIRouter(prefix="/pharmacies", tags=["pharmacies"])
 
@@ -16,7 +20,7 @@ router = APIRouter(prefix="/pharmacies", tags=["pharmacies"])
 @router.post("/requests", response_model=PharmacyRequestRead, status_code=status.HTTP_201_CREATED)
 async def create_pharmacy_request(
     payload: PharmacyRequestCreate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: Principal = Depends(deps.get_token_user),
     service: PharmacyService = Depends(deps.get_pharmacy_service),
 ):
     return await service.create_request(
@@ -34,7 +38,7 @@ async def create_pharmacy_request(
 async def approve_request(
     request_id: int,
     service: PharmacyService = Depends(deps.get_pharmacy_service),
-    _: User = Depends(deps.allow_operator),
+    _: Principal = Depends(deps.allow_operator),
 ):
     return await service.approve_request(request_id)
 
@@ -47,7 +51,7 @@ async def reject_request(
     request_id: int,
     payload: PharmacyRequestDecision,
     service: PharmacyService = Depends(deps.get_pharmacy_service),
-    _: User = Depends(deps.allow_operator),
+    _: Principal = Depends(deps.allow_operator),
 ):
     return await service.reject_request(request_id, reason=payload.reason)
 
@@ -55,16 +59,21 @@ async def reject_request(
 @router.get("", response_model=list[PharmacyRead])
 async def list_all_pharmacies(
     service: PharmacyService = Depends(deps.get_pharmacy_service),
-    _: User = Depends(deps.allow_all_users),
+    _: Principal = Depends(deps.allow_all_users),
 ):
     """Get all pharmacies (only for operators/superadmins)"""
     return await service.list_all_pharmacies()
 
 
-
-
-
-
-
-
+@router.post("/{pharmacy_id}/staff/bulk", response_model=StaffBulkResult)
+async def bulk_create_staff(
+    pharmacy_id: int,
+    payload: StaffBulkCreate,
+    current_user: Principal = Depends(
+        deps.require_roles(UserRole.SUPERADMIN, UserRole.OPERATOR, UserRole.PHARMACY_ADMIN)
+    ),
+    service: StaffService = Depends(deps.get_staff_service),
+):
+    """Provision branch admins and cashiers in one call; returns a result per input row"""
+    return await service.bulk_provision(current_user, pharmacy_id, payload.users)
 
@@ -0,0 +1,85 @@
+import hashlib
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.principal import Principal
+
+API_KEY_HEADER = "X-API-Key"
+KEY_PREFIX = "pk_"
+
+_hits = metrics.counter("api_key_cache_hits_total", "API key lookups served from the in-process cache")
+_misses = metrics.counter("api_key_cache_misses_total", "API key lookups that read the api_keys table")
+
+# key digest -> (principal, expires_at on the monotonic clock), least recently used first
+_cache: OrderedDict[str, tuple[Principal, float]] = OrderedDict()
+# key digest -> expires_at, for unknown or revoked keys. Kept apart and smaller so that
+# guessed keys only evict each other, never a terminal's valid key
+_unknown: OrderedDict[str, float] = OrderedDict()
+
+def generate_api_key() -> str:
+    return KEY_PREFIX + secrets.token_urlsafe(32)
+
+
+def hash_api_key(key: str) -> str:
+    """
+    SHA-256 hex digest used as the lookup key. Keys are 256 random bits, so a fast
+    unsalted hash is enough; bcrypt would only add latency to every terminal request.
+    """
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+async def get_api_key_principal(
+    key: str,
+    load: Callable[[str], Awaitable[Principal | None]],
+) -> Principal | None:
+    """
+    Principal bound to an API key, from the in-process cache or `load` (the api_keys
+    table, by digest). Unknown keys are cached too (in a separate, smaller LRU), so guessing
+    does not reach the database.
+    """
+    digest = hash_api_key(key)
+    now = time.monotonic()
+    cached = _cache.get(digest)
+    if cached is not None and cached[1] > now:
+        _cache.move_to_end(digest)
+        _hits.inc()
+        return cached[0]
+    unknown_until = _unknown.get(digest)
+    if unknown_until is not None and unknown_until > now:
+        _unknown.move_to_end(digest)
+        _hits.inc()
+        return None
+
+    _misses.inc()
+    principal = await load(digest)
+    expires_at = time.monotonic() + settings.api_key_cache_ttl_seconds
+    if principal is None:
+        _cache.pop(digest, None)
+        _remember(_unknown, digest, expires_at, settings.api_key_cache_negative_max_entries)
+    else:
+        _unknown.pop(digest, None)
+        _remember(_cache, digest, (principal, expires_at), settings.api_key_cache_max_entries)
+    return principal
+
+
+def _remember(cache: OrderedDict, digest: str, value, max_entries: int) -> None:
+    cache[digest] = value
+    cache.move_to_end(digest)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+
+def invalidate_api_key(key_hash: str) -> None:
+    """Forget a revoked key in this worker; other workers drop it within the cache TTL"""
+    _cache.pop(key_hash, None)
+    _unknown.pop(key_hash, None)
+
+
+def invalidate_api_keys_of_user(user_id: int) -> None:
+    """Forget every key issued by a user whose role or scope changed, so it is re-checked"""
+    for digest in [digest for digest, (principal, _) in _cache.items() if principal.id == user_id]:
+        del _cache[digest]
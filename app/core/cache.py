@@ -1,7 +1,10 @@
+import json
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from typing import Any
 
 from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 from app.core.config import settings
 
@@ -12,10 +15,59 @@ _redis_client: Redis | None = None
 def get_redis_client() -> Redis:
     global _redis_client
     if _redis_client is None:
-        _redis_client = Redis.from_url(settings.redis_url, encoding="utf-8", decode_responses=True)
+        _redis_client = Redis.from_url(
+            settings.redis_url,
+            encoding="utf-8",
+            decode_responses=True,
+            socket_connect_timeout=settings.redis_socket_timeout_seconds,
+            socket_timeout=settings.redis_socket_timeout_seconds,
+        )
     return _redis_client
 
 
+# Cache helpers below are best-effort: a Redis outage degrades to a cache miss
+# so callers fall back to the database instead of failing the request.
+
+
+async def cache_get_json(key: str) -> Any | None:
+    try:
+        raw = await get_redis_client().get(key)
+    except RedisError:
+        return None
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+async def cache_set_json(key: str, value: Any, ttl_seconds: int) -> bool:
+    try:
+        await get_redis_client().set(key, json.dumps(value, default=str), ex=ttl_seconds)
+    except RedisError:
+        return False
+    return True
+
+
+async def cache_add_json(key: str, value: Any, ttl_seconds: int) -> bool | None:
+    """SET NX: True if the key was created, False if it already existed, None if Redis is unavailable"""
+    try:
+        created = await get_redis_client().set(key, json.dumps(value, default=str), ex=ttl_seconds, nx=True)
+    except RedisError:
+        return None
+    return bool(created)
+
+
+async def cache_delete(*keys: str) -> None:
+    if not keys:
+        return
+    try:
+        await get_redis_client().delete(*keys)
+    except RedisError:
+        pass
+
+
 @asynccontextmanager
 async def lifespan_redis() -> AsyncIterator[None]:
     client = get_redis_client()
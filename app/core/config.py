@@ -16,14 +16,91 @@ class Settings(BaseSettings):
     alembic_database_url: str | None = None
 
     redis_url: str = "redis://redis:6379/0"
+    redis_socket_timeout_seconds: float = 0.5
 
     jwt_secret_key: str = "change-me"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_minutes: int = 60 * 24 * 7
+    # Revoked refresh-token families are mirrored into a per-worker Bloom filter this often
+    refresh_revocation_sync_seconds: float = 5
+    refresh_revocation_bloom_capacity: int = 100_000
+
+    # Verified JWTs are cached until exp; invalid ones for a short while, in their own smaller LRU
+    token_cache_max_entries: int = 10_000
+    token_cache_negative_seconds: int = 60
+    token_cache_negative_max_entries: int = 1000
+
+    # "token": trust role/scope claims and only check token_version;
+    # "database": resolve every request against the (cached) users row
+    auth_identity_source: str = "token"
+    principal_cache_local_ttl_seconds: float = 5
+    principal_cache_local_max_entries: int = 10_000
+    principal_cache_redis_ttl_seconds: int = 60
+
+    # Revoked keys stop working on other workers once their cache entry expires
+    api_key_cache_ttl_seconds: float = 30
+    api_key_cache_max_entries: int = 10_000
+    api_key_cache_negative_max_entries: int = 1000
+
+    # bcrypt runs off the event loop on a bounded pool: "thread" or "process"
+    password_hash_executor: str = "thread"
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 256  # 0 = never reject
+    # Work factor is calibrated at startup to stay under the target on this host, never
+    # below bcrypt's default of 12 that existing hashes use
+    password_hash_target_ms: int = 250
+    password_hash_min_rounds: int = 12
+    password_hash_max_rounds: int = 15
+    password_hash_rounds: int | None = None  # pin the work factor, skipping calibration
+    password_bulk_hash_workers: int | None = None  # staff imports; defaults to one per core
+    staff_bulk_max_rows: int = 1000
+    password_rehash_flush_seconds: float = 5
+    password_rehash_batch_size: int = 500
+
+    # Login throttling (sliding window, 0 disables a limit) and per-worker bcrypt cap
+    login_rate_limit_window_seconds: int = 300
+    login_rate_limit_per_email: int = 10
+    login_rate_limit_per_ip: int = 100
+    login_max_concurrent_verifications: int = 16
 
     cors_origins: list[AnyHttpUrl] = []
 
+    order_number_timezone: str = "Asia/Tashkent"
+    order_reservation_ttl_minutes: int = 30
+    order_reservation_sweep_interval_seconds: int = 60  # 0 disables the sweeper
+    order_reservation_sweep_batch_size: int = 500
+
+    # Batched order writes: coalesce concurrent creates/scans arriving within the window
+    # into one set-based transaction (off = one commit per request)
+    order_batch_writes_enabled: bool = False
+    order_batch_window_ms: float = 5
+    order_batch_max_size: int = 64
+
+    # Confirmed/cancelled orders older than this move to the archive tables
+    order_archive_after_days: int = 90  # 0 disables the archiver
+    order_archive_interval_seconds: int = 60 * 60
+    order_archive_batch_size: int = 1000
+
+    idempotency_ttl_seconds: int = 60 * 60 * 24
+    idempotency_lock_seconds: int = 30
+
+    # Drug search: pg_trgm word-similarity cut-off and page size cap
+    drug_search_min_similarity: float = 0.3
+    drug_search_max_limit: int = 100
+    # In-process autocomplete; rebuilt (with fresh popularity) this often, 0 = startup only
+    drug_autocomplete_refresh_seconds: int = 10 * 60
+    drug_autocomplete_max_limit: int = 20
+    search_key_backfill_batch_size: int = 1000
+    # Catalogue listing (/drugs, /drugs/all): keyset page size cap
+    drug_list_max_limit: int = 500
+    # Batch SKU lookup (/drugs/variants/by-sku): SKUs per request
+    drug_sku_batch_max_items: int = 200
+    # In-process SKU map: shared catalogue version re-read at most this often, full
+    # rebuild this often (0 = startup and version changes only)
+    drug_variant_lookup_check_seconds: float = 1
+    drug_variant_lookup_refresh_seconds: int = 10 * 60
+
     @computed_field  # type: ignore[misc]
     @property
     def sync_database_url(self) -> str:
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+
+from app.core.cache import cache_add_json, cache_delete, cache_get_json, cache_set_json
+from app.core.config import settings
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+_POLL_SECONDS = 0.05
+
+# Leaders currently executing in this worker, by storage key (in-process single-flight)
+_in_flight: dict[str, asyncio.Future] = {}
+
+
+def _storage_key(scope: str, owner: str, key: str) -> str:
+    return f"idem:{scope}:{owner}:{key}"
+
+
+def _fingerprint(request_data: Any) -> str:
+    encoded = json.dumps(jsonable_encoder(request_data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _replay(entry: dict, fingerprint: str, response: Response) -> Any:
+    if entry.get("fingerprint") != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{IDEMPOTENCY_HEADER} was already used with a different request"
+        )
+    response.headers[REPLAYED_HEADER] = "true"
+    return entry["body"]
+
+
+async def run_idempotent(
+    *,
+    scope: str,
+    owner: str,
+    key: str,
+    request_data: Any,
+    response: Response,
+    operation: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Execute `operation` at most once per (scope, owner, Idempotency-Key).
+
+    The first successful result is stored in Redis for `idempotency_ttl_seconds` and
+    replayed for later retries without running the operation again. Duplicates that
+    arrive while the first request is still running wait for it: in-process through a
+    shared future, across workers by polling the stored entry. Failures are not stored,
+    so a retry after an error runs the operation again.
+    If Redis is unavailable only the in-process guarantee remains.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters"
+        )
+
+    storage_key = _storage_key(scope, owner, key)
+    fingerprint = _fingerprint(request_data)
+
+    leader = _in_flight.get(storage_key)
+    if leader is not None:
+        entry = await asyncio.shield(leader)
+        return _replay(entry, fingerprint, response)
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[storage_key] = future
+    try:
+        entry = await _execute_once(storage_key, fingerprint, operation)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Mark retrieved so a future nobody waited on does not log a warning
+        future.exception()
+        raise
+    else:
+        future.set_result(entry)
+    finally:
+        _in_flight.pop(storage_key, None)
+
+    if entry.pop("replayed", False):
+        return _replay(entry, fingerprint, response)
+    return entry["body"]
+
+
+async def _execute_once(
+    storage_key: str,
+    fingerprint: str,
+    operation: Callable[[], Awaitable[Any]],
+) -> dict:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.idempotency_lock_seconds
+    while True:
+        entry = await cache_get_json(storage_key)
+        if entry is not None and entry.get("state") == "done":
+            return {**entry, "replayed": True}
+
+        claimed = await cache_add_json(
+            storage_key,
+            {"state": "pending", "fingerprint": fingerprint},
+            settings.idempotency_lock_seconds
+        )
+        if claimed is not False:
+            break
+
+        # Another worker owns the key: wait for its result or for its marker to lapse
+        if loop.time() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A request with this {IDEMPOTENCY_HEADER} is still being processed"
+            )
+        await asyncio.sleep(_POLL_SECONDS)
+
+    try:
+        result = await operation()
+    except BaseException:
+        await cache_delete(storage_key)
+        raise
+
+    entry = {"state": "done", "fingerprint": fingerprint, "body": jsonable_encoder(result)}
+    await cache_set_json(storage_key, entry, settings.idempotency_ttl_seconds)
+    return entry
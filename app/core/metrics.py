@@ -0,0 +1,93 @@
+import threading
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self) -> list[tuple[str, float]]:
+        return [(self.name, self.value)]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self.value = value
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+
+class Summary:
+    """Running count and sum of observed values (e.g. durations in seconds)"""
+    kind = "summary"
+
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += value
+
+    def samples(self) -> list[tuple[str, float]]:
+        return [
+            (f"{self.name}_count", self.count),
+            (f"{self.name}_sum", self.total),
+        ]
+
+
+class MetricsRegistry:
+    """
+    In-process metrics for this worker, rendered in the Prometheus text format.
+    Metrics are created on first use and shared by name.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Gauge | Summary] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, description)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {name!r} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(Counter, name, description)
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._get_or_create(Gauge, name, description)
+
+    def summary(self, name: str, description: str) -> Summary:
+        return self._get_or_create(Summary, name, description)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for name in sorted(self._metrics):
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(f"{sample} {value:g}" for sample, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
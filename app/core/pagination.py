@@ -0,0 +1,21 @@
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    """Pack keyset position values into an opaque, URL-safe cursor string."""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Inverse of encode_cursor. Raises ValueError for anything that was not produced by it."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not isinstance(values, dict):
+        raise ValueError("Malformed cursor")
+    return values
@@ -0,0 +1,126 @@
+import heapq
+from bisect import bisect_left
+from collections.abc import Hashable, Iterable
+
+_MAX_CHAR = "\U0010ffff"
+
+
+class PrefixIndex:
+    """
+    Weighted top-k prefix completion over string keys.
+
+    A flattened trie: keys are kept in one sorted list, so every trie node (a prefix)
+    is a contiguous slice found with two bisections. Short prefixes cover large slices,
+    so their top-k entries are precomputed down to `cached_depth` characters; longer
+    prefixes are narrow enough to rank on the fly. An entry may have several keys
+    (name words, code, ...) and is returned at most once per query.
+    """
+
+    def __init__(self, k: int = 10, cached_depth: int = 3) -> None:
+        self.k = k
+        self.cached_depth = cached_depth
+        self._keys: list[str] = []
+        self._slots: list[int] = []  # parallel to _keys
+        self._entries: list[Hashable | None] = []
+        self._weights: list[float] = []
+        self._entry_keys: dict[int, tuple[str, ...]] = {}
+        self._slot_of: dict[Hashable, int] = {}
+        self._free: list[int] = []
+        self._top: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    @classmethod
+    def build(
+        cls,
+        entries: Iterable[tuple[Hashable, Iterable[str], float]],
+        k: int = 10,
+        cached_depth: int = 3,
+    ) -> "PrefixIndex":
+        """Bulk load (entry, keys, weight) triples with one sort"""
+        index = cls(k, cached_depth)
+        pairs: list[tuple[str, int]] = []
+        for entry, keys, weight in entries:
+            slot = index._allocate(entry, keys, weight)
+            pairs.extend((key, slot) for key in index._entry_keys[slot])
+        pairs.sort()
+        index._keys = [key for key, _ in pairs]
+        index._slots = [slot for _, slot in pairs]
+
+        candidates: dict[str, set[int]] = {}
+        for key, slot in pairs:
+            for depth in range(1, min(len(key), cached_depth) + 1):
+                candidates.setdefault(key[:depth], set()).add(slot)
+        index._top = {prefix: index._rank(slots, k) for prefix, slots in candidates.items()}
+        return index
+
+    def add(self, entry: Hashable, keys: Iterable[str], weight: float = 0.0) -> None:
+        """Insert or replace an entry"""
+        self.remove(entry)
+        slot = self._allocate(entry, keys, weight)
+        for key in self._entry_keys[slot]:
+            position = bisect_left(self._keys, key)
+            self._keys.insert(position, key)
+            self._slots.insert(position, slot)
+            for prefix in self._cached_prefixes(key):
+                top = self._top.setdefault(prefix, [])
+                if slot not in top:
+                    top.append(slot)
+                    top[:] = self._rank(top, self.k)
+
+    def remove(self, entry: Hashable) -> None:
+        slot = self._slot_of.pop(entry, None)
+        if slot is None:
+            return
+        keys = self._entry_keys.pop(slot)
+        for key in keys:
+            position = bisect_left(self._keys, key)
+            while self._slots[position] != slot:
+                position += 1
+            del self._keys[position]
+            del self._slots[position]
+        self._entries[slot] = None
+        self._free.append(slot)
+
+        for prefix in {prefix for key in keys for prefix in self._cached_prefixes(key)}:
+            if slot in self._top.get(prefix, ()):
+                self._top[prefix] = self._rank(self._range(prefix), self.k)
+                if not self._top[prefix]:
+                    del self._top[prefix]
+
+    def complete(self, prefix: str, limit: int | None = None) -> list[Hashable]:
+        """Entries having a key that starts with `prefix`, heaviest first"""
+        limit = limit or self.k
+        if not prefix:
+            return []
+        if len(prefix) <= self.cached_depth and limit <= self.k:
+            slots = self._top.get(prefix, [])[:limit]
+        else:
+            slots = self._rank(self._range(prefix), limit)
+        return [self._entries[slot] for slot in slots]
+
+    def _allocate(self, entry: Hashable, keys: Iterable[str], weight: float) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._entries[slot] = entry
+            self._weights[slot] = weight
+        else:
+            slot = len(self._entries)
+            self._entries.append(entry)
+            self._weights.append(weight)
+        self._slot_of[entry] = slot
+        self._entry_keys[slot] = tuple(dict.fromkeys(key for key in keys if key))
+        return slot
+
+    def _cached_prefixes(self, key: str) -> Iterable[str]:
+        return (key[:depth] for depth in range(1, min(len(key), self.cached_depth) + 1))
+
+    def _range(self, prefix: str) -> set[int]:
+        start = bisect_left(self._keys, prefix)
+        end = bisect_left(self._keys, prefix + _MAX_CHAR, start)
+        return set(self._slots[start:end])
+
+    def _rank(self, slots: Iterable[int], limit: int) -> list[int]:
+        weights = self._weights
+        return heapq.nsmallest(limit, slots, key=lambda slot: (-weights[slot], slot))
@@ -0,0 +1,77 @@
+from dataclasses import dataclass
+from typing import Any
+
+from app.models import User, UserRole
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    The authenticated caller, as carried in the access token claims.
+    Exposes the same id/role/pharmacy_id/branch_id attributes routes used to read
+    from the User model, without loading it.
+    """
+
+    id: int
+    role: UserRole
+    pharmacy_id: int | None
+    branch_id: int | None
+    is_active: bool
+    token_version: int
+    # Set for terminal API keys, which act for their branch under the issuing user's id
+    api_key_id: int | None = None
+
+    @property
+    def actor(self) -> str:
+        """Who is calling, for per-caller state (idempotency keys): the user, or one terminal key"""
+        if self.api_key_id is not None:
+            return f"key:{self.api_key_id}"
+        return str(self.id)
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            role=user.role,
+            pharmacy_id=user.pharmacy_id,
+            branch_id=user.branch_id,
+            is_active=user.is_active,
+            token_version=user.token_version,
+        )
+
+    @classmethod
+    def from_claims(cls, payload: dict[str, Any]) -> "Principal | None":
+        """Build from a decoded access token; None for tokens issued without identity claims"""
+        if "role" not in payload or "ver" not in payload:
+            return None
+        return cls(
+            id=int(payload["sub"]),
+            role=UserRole(payload["role"]),
+            pharmacy_id=payload.get("pharmacy_id"),
+            branch_id=payload.get("branch_id"),
+            is_active=bool(payload.get("active", True)),
+            token_version=int(payload["ver"]),
+        )
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict[str, Any]) -> "Principal":
+        return cls(**{**snapshot, "role": UserRole(snapshot["role"])})
+
+    def to_snapshot(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "role": self.role.value,
+            "pharmacy_id": self.pharmacy_id,
+            "branch_id": self.branch_id,
+            "is_active": self.is_active,
+            "token_version": self.token_version,
+        }
+
+    def to_claims(self) -> dict[str, Any]:
+        return {
+            "role": self.role.value,
+            "pharmacy_id": self.pharmacy_id,
+            "branch_id": self.branch_id,
+            "active": self.is_active,
+            "ver": self.token_version,
+        }
@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+
+from app.core.cache import cache_delete, cache_get_json, cache_set_json
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.principal import Principal
+
+KEY_PREFIX = "user:principal:"
+
+_local_hits = metrics.counter("principal_cache_local_hits_total", "Principal lookups served from the in-process LRU")
+_redis_hits = metrics.counter("principal_cache_redis_hits_total", "Principal lookups served from Redis")
+_misses = metrics.counter("principal_cache_misses_total", "Principal lookups that read the users table")
+
+# user_id -> (snapshot, expires_at on the monotonic clock), least recently used first
+_local: OrderedDict[int, tuple[Principal, float]] = OrderedDict()
+
+
+def _key(user_id: int) -> str:
+    return f"{KEY_PREFIX}{user_id}"
+
+
+def _remember(principal: Principal) -> None:
+    _local[principal.id] = (principal, time.monotonic() + settings.principal_cache_local_ttl_seconds)
+    _local.move_to_end(principal.id)
+    while len(_local) > settings.principal_cache_local_max_entries:
+        _local.popitem(last=False)
+
+
+async def get_principal(
+    user_id: int,
+    load: Callable[[int], Awaitable[Principal | None]],
+) -> Principal | None:
+    """
+    Frozen snapshot of a user's identity: in-process LRU with a short TTL, then Redis,
+    then `load` (the users table). None if the user does not exist.
+    """
+    cached = _local.get(user_id)
+    if cached is not None:
+        if cached[1] > time.monotonic():
+            _local.move_to_end(user_id)
+            _local_hits.inc()
+            return cached[0]
+        del _local[user_id]
+
+    snapshot = await cache_get_json(_key(user_id))
+    if snapshot is not None:
+        principal = Principal.from_snapshot(snapshot)
+        _redis_hits.inc()
+    else:
+        _misses.inc()
+        principal = await load(user_id)
+        if principal is None:
+            return None
+        await cache_set_json(_key(user_id), principal.to_snapshot(), settings.principal_cache_redis_ttl_seconds)
+
+    _remember(principal)
+    return principal
+
+
+async def invalidate_principal(user_id: int) -> None:
+    """Drop a user's snapshot after a change; other workers catch up within the local TTL"""
+    _local.pop(user_id, None)
+    await cache_delete(_key(user_id))
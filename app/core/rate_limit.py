@@ -0,0 +1,65 @@
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from redis.exceptions import RedisError
+
+from app.core.cache import get_redis_client
+
+
+class SlidingWindowLimiter:
+    """
+    Allows at most `limit` admitted hits per key within any `window_seconds` span.
+
+    Hits are stored as scored members of a Redis sorted set per key, so the window is
+    shared by every worker. When Redis is unavailable the limiter falls back to an
+    in-process window (per worker, bounded to `local_max_keys` keys). Rejected hits are
+    not recorded, so a client that backs off is admitted again once old hits age out.
+    """
+
+    def __init__(self, prefix: str, limit: int, window_seconds: int, local_max_keys: int = 10_000) -> None:
+        self.prefix = prefix
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.local_max_keys = local_max_keys
+        self._local: OrderedDict[str, deque[float]] = OrderedDict()
+
+    async def hit(self, key: str) -> bool:
+        """Record a hit for `key` and return whether it is within the limit"""
+        if self.limit <= 0:
+            return True
+        try:
+            return await self._hit_redis(f"{self.prefix}:{key}")
+        except RedisError:
+            return self._hit_local(key)
+
+    async def _hit_redis(self, key: str) -> bool:
+        now = time.time()
+        member = f"{now}:{uuid.uuid4().hex}"
+        async with get_redis_client().pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, 0, now - self.window_seconds)
+            pipe.zadd(key, {member: now})
+            pipe.zcard(key)
+            pipe.expire(key, self.window_seconds)
+            _, _, count, _ = await pipe.execute()
+
+        if count > self.limit:
+            await get_redis_client().zrem(key, member)
+            return False
+        return True
+
+    def _hit_local(self, key: str) -> bool:
+        now = time.monotonic()
+        hits = self._local.get(key)
+        if hits is None:
+            hits = self._local[key] = deque()
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_max_keys:
+            self._local.popitem(last=False)
+
+        while hits and hits[0] <= now - self.window_seconds:
+            hits.popleft()
+        if len(hits) >= self.limit:
+            return False
+        hits.append(now)
+        return True
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from redis.exceptions import RedisError
+
+from app.core.bloom import BloomFilter
+from app.core.cache import get_redis_client
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+USED_PREFIX = "auth:refresh:used:"
+# Sorted set of revoked token families, scored by when their last token expires
+REVOKED_FAMILIES_KEY = "auth:refresh:revoked_families"
+
+_bloom_skips = metrics.counter(
+    "refresh_family_bloom_skips_total", "Refresh family checks answered by the Bloom snapshot without Redis"
+)
+_bloom_size = metrics.gauge("refresh_family_bloom_entries", "Revoked refresh families in the Bloom snapshot")
+
+# Per-worker fallbacks while Redis is unavailable: id -> expires_at (unix time)
+_local_used: dict[str, float] = {}
+_local_revoked: dict[str, float] = {}
+
+_bloom = BloomFilter(settings.refresh_revocation_bloom_capacity)
+
+
+def _prune(entries: dict[str, float]) -> None:
+    now = time.time()
+    for key in [key for key, expires_at in entries.items() if expires_at <= now]:
+        del entries[key]
+
+
+async def consume_refresh_token(jti: str, expires_at: float) -> bool:
+    """
+    Mark a refresh token as used. True the first time, False on any later use,
+    including a concurrent request racing with the first one.
+    """
+    ttl = max(1, int(expires_at - time.time()))
+    try:
+        return bool(await get_redis_client().set(f"{USED_PREFIX}{jti}", 1, ex=ttl, nx=True))
+    except RedisError:
+        # Degraded: reuse is only detected within this worker
+        _prune(_local_used)
+        if jti in _local_used:
+            return False
+        _local_used[jti] = expires_at
+        return True
+
+
+async def is_family_revoked(family: str) -> bool:
+    """
+    Revoked families are rare, so the Bloom snapshot answers "not revoked" for almost
+    every refresh without a Redis round trip. Only a positive is confirmed in Redis.
+    """
+    if family not in _bloom:
+        _bloom_skips.inc()
+        return False
+    if _local_revoked.get(family, 0) > time.time():
+        return True
+    try:
+        return await get_redis_client().zscore(REVOKED_FAMILIES_KEY, family) is not None
+    except RedisError:
+        return False
+
+
+async def revoke_family(family: str, expires_at: float) -> None:
+    """Reject every token of a login session, e.g. after one of its refresh tokens was replayed"""
+    _local_revoked[family] = expires_at
+    _bloom.add(family)
+    try:
+        await get_redis_client().zadd(REVOKED_FAMILIES_KEY, {family: expires_at})
+    except RedisError:
+        logger.warning("Refresh family %s revoked in this worker only: Redis unavailable", family)
+
+
+async def refresh_revocation_snapshot() -> None:
+    """Rebuild the Bloom snapshot from Redis plus anything revoked locally"""
+    global _bloom
+    _prune(_local_revoked)
+    now = time.time()
+    async with get_redis_client().pipeline(transaction=False) as pipe:
+        pipe.zremrangebyscore(REVOKED_FAMILIES_KEY, 0, now)
+        pipe.zrange(REVOKED_FAMILIES_KEY, 0, -1)
+        _, families = await pipe.execute()
+
+    families = set(families) | set(_local_revoked)
+    bloom = BloomFilter(max(settings.refresh_revocation_bloom_capacity, 2 * len(families)))
+    for family in families:
+        bloom.add(family)
+    _bloom = bloom
+    _bloom_size.set(len(families))
+
+
+async def _run_snapshots(interval_seconds: float) -> None:
+    while True:
+        try:
+            await refresh_revocation_snapshot()
+        except RedisError:
+            pass
+        except Exception:  # noqa: BLE001
+            logger.exception("Refresh revocation snapshot failed")
+        await asyncio.sleep(interval_seconds)
+
+
+@asynccontextmanager
+async def lifespan_refresh_revocations() -> AsyncIterator[None]:
+    task = asyncio.create_task(_run_snapshots(settings.refresh_revocation_sync_seconds))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
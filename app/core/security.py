@@ -1,12 +1,25 @@
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta, timezone
 from typing import Any
+import asyncio
 import base64
 import hashlib
+import math
+import multiprocessing
+import os
+import time
+import uuid
 
 import jwt
 import bcrypt
+from fastapi import HTTPException, status
 
 from app.core.config import settings
+from app.core.metrics import metrics
 
 def _prepare_password_bytes(password: str) -> bytes:
     """
@@ -25,15 +38,67 @@ def _prepare_password_bytes(password: str) -> bytes:
     return password_bytes
 
 
-def get_password_hash(password: str) -> str:
+# bcrypt work factor for new hashes; replaced by calibrate_bcrypt_rounds() at startup
+_bcrypt_rounds = 12
+
+_hash_rounds_gauge = metrics.gauge("password_hash_rounds", "bcrypt work factor used for new password hashes")
+_hash_calibrated_seconds = metrics.gauge(
+    "password_hash_calibrated_seconds", "Measured time of one bcrypt hash at the chosen work factor"
+)
+
+
+def get_password_hash(password: str, rounds: int | None = None) -> str:
     """
     Hash password using bcrypt, applying preprocessing for long passwords.
+    Uses the calibrated work factor unless `rounds` is given.
     """
     prepared = _prepare_password_bytes(password)
-    hashed = bcrypt.hashpw(prepared, bcrypt.gensalt())
+    hashed = bcrypt.hashpw(prepared, bcrypt.gensalt(rounds=rounds or _bcrypt_rounds))
     return hashed.decode("utf-8")
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True when a stored hash was made with a lower work factor than the current one.
+    Never downgrades: nodes on different hardware may calibrate to different factors,
+    and a login on the slower node must not weaken a hash made on the faster one.
+    """
+    try:
+        return int(hashed_password.split("$")[2]) < _bcrypt_rounds
+    except (IndexError, ValueError):
+        return False
+
+
+def _time_hash(rounds: int) -> float:
+    started = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=rounds))
+    return time.perf_counter() - started
+
+
+def calibrate_bcrypt_rounds() -> int:
+    """
+    Pick the largest work factor within [password_hash_min_rounds, password_hash_max_rounds]
+    whose hash time on this host stays under password_hash_target_ms. Each extra round
+    doubles the cost, so one timing at the minimum is enough to extrapolate. The minimum
+    is never below the cost of hashes made before calibration existed (bcrypt's default 12).
+    password_hash_rounds pins the factor and skips the search; set it to one value across
+    the cluster so every node hashes alike.
+    """
+    global _bcrypt_rounds
+    rounds = settings.password_hash_rounds
+    if rounds is None:
+        target = settings.password_hash_target_ms / 1000
+        rounds = settings.password_hash_min_rounds
+        base = _time_hash(rounds)
+        while rounds < settings.password_hash_max_rounds and base * 2 ** (rounds + 1 - settings.password_hash_min_rounds) <= target:
+            rounds += 1
+
+    _bcrypt_rounds = rounds
+    _hash_rounds_gauge.set(rounds)
+    _hash_calibrated_seconds.set(_time_hash(rounds))
+    return rounds
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify password with the same preprocessing as get_password_hash.
@@ -43,22 +108,252 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(prepared, hashed_password.encode("utf-8"))
 
 
-def _create_token(subject: str | Any, expires_delta: timedelta, token_type: str) -> str:
+_hash_in_flight = metrics.gauge("password_hash_in_flight", "bcrypt operations running in the executor")
+_hash_queue_depth = metrics.gauge("password_hash_queue_depth", "bcrypt operations waiting for an executor slot")
+_hash_rejected = metrics.counter("password_hash_rejected_total", "bcrypt operations refused because the queue was full")
+_hash_seconds = metrics.summary("password_hash_seconds", "Wall time of bcrypt operations including queueing")
+_hash_bulk_seconds = metrics.summary("password_hash_bulk_seconds", "Wall time of bulk hashing batches")
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool whose workers do not fork the server: a forked child would inherit the
+    running event loop, open sockets and the locks of every other thread.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method))
+
+
+class _PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a bounded thread or process pool.
+    At most `password_hash_workers` operations run at once; callers beyond that wait
+    their turn, and once `password_hash_max_queue` are waiting new ones get a 503.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    def _ensure_started(self) -> None:
+        if self._executor is None:
+            workers = settings.password_hash_workers
+            if settings.password_hash_executor == "process":
+                self._executor = _process_pool(workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+            self._slots = asyncio.Semaphore(workers)
+
+    async def run(self, func, *args):
+        self._ensure_started()
+        max_queue = settings.password_hash_max_queue
+        if self._slots.locked() and max_queue and _hash_queue_depth.value >= max_queue:
+            _hash_rejected.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        started = time.perf_counter()
+        _hash_queue_depth.inc()
+        try:
+            await self._slots.acquire()
+        finally:
+            _hash_queue_depth.dec()
+        _hash_in_flight.inc()
+        try:
+            return await self._execute(func, *args)
+        finally:
+            _hash_in_flight.dec()
+            self._slots.release()
+            _hash_seconds.observe(time.perf_counter() - started)
+
+    async def _execute(self, func, *args):
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            # A worker died (OOM kill, crash) and took the pool with it: replace it, retry once
+            if self._executor is executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = _process_pool(settings.password_hash_workers)
+            return await loop.run_in_executor(self._executor, func, *args)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._slots = None
+
+
+_password_hasher = _PasswordHasher()
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash without blocking the event loop"""
+    # Pass the work factor explicitly: process-pool workers do not share this module's state
+    return await _password_hasher.run(get_password_hash, password, _bcrypt_rounds)
+
+
+def _hash_many(passwords: list[str], rounds: int) -> list[str]:
+    return [get_password_hash(password, rounds) for password in passwords]
+
+
+# Bulk hashing pool: started on the first staff import, kept until shutdown
+_bulk_executor: ProcessPoolExecutor | None = None
+
+
+async def get_password_hashes_bulk(passwords: list[str]) -> list[str]:
+    """
+    Hash a whole batch (staff imports) on a dedicated process pool, one process per core.
+    Kept apart from the login hasher so a large import neither waits behind logins nor
+    fills their queue. Hashes are returned in input order.
+    """
+    global _bulk_executor
+    if not passwords:
+        return []
+    workers = settings.password_bulk_hash_workers or os.cpu_count() or 1
+    # A few chunks per worker keeps every core busy without a round trip per password
+    chunk_size = max(1, math.ceil(len(passwords) / (workers * 4)))
+    chunks = [passwords[i:i + chunk_size] for i in range(0, len(passwords), chunk_size)]
+
+    loop = asyncio.get_running_loop()
+    started = time.perf_counter()
+    for attempt in range(2):
+        if _bulk_executor is None:
+            _bulk_executor = _process_pool(workers)
+        executor = _bulk_executor
+        try:
+            results = await asyncio.gather(
+                *(loop.run_in_executor(executor, _hash_many, chunk, _bcrypt_rounds) for chunk in chunks)
+            )
+            break
+        except BrokenProcessPool:
+            # A worker died (OOM kill, crash) and took the pool with it: start a new one, retry once
+            if _bulk_executor is executor:
+                _shutdown_bulk_executor()
+            if attempt:
+                raise
+    _hash_bulk_seconds.observe(time.perf_counter() - started)
+    return [hashed for chunk in results for hashed in chunk]
+
+
+def _shutdown_bulk_executor() -> None:
+    global _bulk_executor
+    if _bulk_executor is not None:
+        _bulk_executor.shutdown(wait=False, cancel_futures=True)
+    _bulk_executor = None
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password without blocking the event loop"""
+    return await _password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+@asynccontextmanager
+async def lifespan_password_hasher() -> AsyncIterator[None]:
+    await asyncio.to_thread(calibrate_bcrypt_rounds)
+    try:
+        yield
+    finally:
+        _password_hasher.shutdown()
+        _shutdown_bulk_executor()
+
+
+def _create_token(
+    subject: str | Any,
+    expires_delta: timedelta,
+    token_type: str,
+    claims: dict[str, Any] | None = None,
+) -> str:
     expire = datetime.now(tz=timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject), "type": token_type}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject), "type": token_type}
     return jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
 
 
-def create_access_token(subject: str | Any) -> str:
+def create_access_token(subject: str | Any, claims: dict[str, Any] | None = None) -> str:
     expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
-    return _create_token(subject, expires_delta, token_type="access")
+    return _create_token(subject, expires_delta, token_type="access", claims=claims)
 
 
-def create_refresh_token(subject: str | Any) -> str:
+def create_refresh_token(subject: str | Any, family: str | None = None) -> str:
+    """
+    Single-use refresh token. `jti` identifies this token, `fam` the login session it
+    was rotated from; a new login starts a new family.
+    """
     expires_delta = timedelta(minutes=settings.refresh_token_expire_minutes)
-    return _create_token(subject, expires_delta, token_type="refresh")
+    claims = {"jti": uuid.uuid4().hex, "fam": family or uuid.uuid4().hex}
+    return _create_token(subject, expires_delta, token_type="refresh", claims=claims)
+
+
+_token_cache_hits = metrics.counter("token_cache_hits_total", "decode_token calls answered from the verified-token cache")
+_token_cache_negative_hits = metrics.counter(
+    "token_cache_negative_hits_total", "decode_token calls rejected from the cache of invalid tokens"
+)
+_token_cache_misses = metrics.counter("token_cache_misses_total", "decode_token calls that verified the signature")
+_token_cache_size = metrics.gauge("token_cache_entries", "Entries in the verified-token cache")
+
+# sha256(token) -> (claims, cached-until unix time), least recently used first
+_token_cache: "OrderedDict[bytes, tuple[dict[str, Any], float]]" = OrderedDict()
+# Same, for tokens that failed verification. Kept apart and smaller so a flood of
+# garbage tokens only evicts other garbage, never the verified entries
+_invalid_token_cache: "OrderedDict[bytes, tuple[jwt.InvalidTokenError, float]]" = OrderedDict()
+
+
+def _remember_token(cache: OrderedDict, max_entries: int, key: bytes, outcome: Any, until: float) -> None:
+    cache[key] = (outcome, until)
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+
+def _cached_token(cache: OrderedDict, key: bytes, now: float) -> Any | None:
+    cached = cache.get(key)
+    if cached is None:
+        return None
+    outcome, until = cached
+    if until <= now:
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    return outcome
 
 
 def decode_token(token: str) -> dict[str, Any]:
-    return jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    """
+    Verify and decode a JWT. Verified claims are cached (keyed by a SHA-256 of the
+    token) until the token's exp, so repeat requests skip the HMAC check; tokens that
+    fail verification are remembered for token_cache_negative_seconds and fail fast.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).digest()
+    now = time.time()
+    claims = _cached_token(_token_cache, key, now)
+    if claims is not None:
+        _token_cache_hits.inc()
+        return dict(claims)
+    error = _cached_token(_invalid_token_cache, key, now)
+    if error is not None:
+        _token_cache_negative_hits.inc()
+        raise error.with_traceback(None)
+
+    _token_cache_misses.inc()
+    try:
+        claims = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
+    except jwt.InvalidTokenError as exc:
+        _remember_token(
+            _invalid_token_cache,
+            settings.token_cache_negative_max_entries,
+            key,
+            exc,
+            now + settings.token_cache_negative_seconds,
+        )
+        raise
+
+    expires_at = claims.get("exp")
+    if isinstance(expires_at, (int, float)):
+        _remember_token(_token_cache, settings.token_cache_max_entries, key, claims, float(expires_at))
+        _token_cache_size.set(len(_token_cache))
+    return dict(claims)
 
@@ -0,0 +1,32 @@
+import re
+import unicodedata
+
+# Uzbek and Russian Cyrillic to the official Uzbek Latin alphabet (without the
+# o'/g' apostrophes, which users type in half a dozen different ways)
+_CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "ғ": "g", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "қ": "q", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ў": "o",
+    "ф": "f", "х": "x", "ҳ": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+_TRANSLITERATION = str.maketrans(_CYRILLIC_TO_LATIN)
+
+# o‘ g‘ oʻ gʼ o' o` ... : every apostrophe-like mark is dropped
+_APOSTROPHES = str.maketrans("", "", "'`ʻʼʹ‘’′")
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_search_text(value: str | None) -> str:
+    """
+    Canonical search form of a name or query: case-folded, transliterated from
+    Cyrillic to Latin, stripped of diacritics and apostrophes, with punctuation and
+    runs of whitespace collapsed to single spaces. "Парацетамол", "PARATSETAMOL" and
+    "paratsetamol" all become "paratsetamol"; "Oʻzbek" and "o'zbek" become "ozbek".
+    """
+    if not value:
+        return ""
+    text = value.casefold().translate(_APOSTROPHES).translate(_TRANSLITERATION)
+    # Decompose so accents become separate combining marks, then drop them
+    text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    return _NON_WORD.sub(" ", text).strip()
@@ -0,0 +1,55 @@
+import uuid
+
+from redis.exceptions import RedisError
+
+from app.core.cache import get_redis_client
+
+# Distinguishes this worker's fallback versions from every other worker's
+_PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+
+class VersionCounter:
+    """
+    Monotonic version of a dataset, bumped on every write and used to build ETags.
+
+    The counter lives in Redis (INCR), so all workers agree. While Redis is unavailable
+    each worker falls back to its own counter, tagged with a per-process token so its
+    versions never equal a shared one; a bump that could not reach Redis is replayed on
+    the next successful read, so a cached ETag cannot outlive a write made during an outage.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self._local = 0
+        self._missed_bump = False
+
+    async def get(self) -> str:
+        try:
+            redis = get_redis_client()
+            if self._missed_bump:
+                value = await redis.incr(self.key)
+                self._missed_bump = False
+            else:
+                value = await redis.get(self.key) or 0
+        except RedisError:
+            return f"{_PROCESS_TOKEN}.{self._local}"
+        return str(value)
+
+    async def bump(self) -> tuple[str, str]:
+        """
+        Returns (replaced, new): the version this write superseded and the one it produced,
+        so a holder of derived state at `replaced` can apply the write and move to `new`.
+        """
+        self._local += 1
+        try:
+            value = await get_redis_client().incr(self.key)
+        except RedisError:
+            self._missed_bump = True
+            return f"{_PROCESS_TOKEN}.{self._local - 1}", f"{_PROCESS_TOKEN}.{self._local}"
+        # Any increment after an outage invalidates what was cached during it
+        self._missed_bump = False
+        return str(value - 1), str(value)
+
+
+# Drugs and their variants, as listed by the /drugs endpoints
+catalogue_version = VersionCounter("drugs:catalogue:version")
@@ -31,9 +31,10 @@ def init_models() -> None:
     from app.models.drug import Drug
     from app.models.drug_variant import DrugVariant
     from app.models.inventory import Inventory
-    from app.models.orders import Order, OrderItem
+    from app.models.orders import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderNumberCounter
     from app.models.branch import Branch
     from app.models.audit_log import AuditLog
+    from app.models.api_key import ApiKey
     from app.models.pharmacy_request import PharmacyRegistrationRequest
 
     _ = Base.metadata  # Alembic Base.metadata uchun
@@ -6,10 +6,30 @@ from fastapi.middleware.cors import CORSMiddleware
 from .api import api_router
 from app.core.cache import lifespan_redis
 from app.core.config import settings
+from app.core.refresh_tokens import lifespan_refresh_revocations
+from app.core.security import lifespan_password_hasher
+from app.services.drug_autocomplete import lifespan_drug_autocomplete
+from app.services.order_archiver import lifespan_order_archiver
+from app.services.order_writer import lifespan_order_batch_writer
+from app.services.password_rehash import lifespan_password_rehash
+from app.services.reservation_sweeper import lifespan_reservation_sweeper
+from app.services.search_key_backfill import lifespan_search_key_backfill
+from app.services.variant_lookup import lifespan_variant_lookup
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):  # noqa: ARG001
-    async with lifespan_redis():
+    async with (
+        lifespan_redis(),
+        lifespan_password_hasher(),
+        lifespan_password_rehash(),
+        lifespan_refresh_revocations(),
+        lifespan_order_batch_writer(),
+        lifespan_reservation_sweeper(),
+        lifespan_order_archiver(),
+        lifespan_drug_autocomplete(),
+        lifespan_search_key_backfill(),
+        lifespan_variant_lookup(),
+    ):
         yield
 
 
@@ -28,6 +48,8 @@ def create_app() -> FastAPI:
             allow_credentials=True,
             allow_methods=["*"],
             allow_headers=["*"],
+            # Paginated listings return their cursor and validators in headers
+            expose_headers=["X-Next-Cursor", "ETag"],
         )
 
     application.include_router(api_router, prefix=settings.api_v1_prefix)
@@ -1,15 +1,19 @@
+from .api_key import ApiKey
 from .audit_log import AuditLog
 from .base import Base
 from .branch import Branch
 from .drug import Drug
 from .drug_variant import DrugVariant
 from .inventory import Inventory
-from .orders import Order, OrderItem, OrderStatus
+from .orders import ArchivedOrder, ArchivedOrderItem, Order, OrderItem, OrderNumberCounter, OrderStatus
 from .pharmacy import Pharmacy
 from .pharmacy_request import PharmacyRegistrationRequest, PharmacyRequestStatus
 from .user import User, UserRole
 
 __all__ = [
+    "ApiKey",
+    "ArchivedOrder",
+    "ArchivedOrderItem",
     "AuditLog",
     "Base",
     "Branch",
@@ -18,6 +22,7 @@ __all__ = [
     "Inventory",
     "Order",
     "OrderItem",
+    "OrderNumberCounter",
     "OrderStatus",
     "Pharmacy",
     "PharmacyRegistrationRequest",
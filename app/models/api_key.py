@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from app.models.base import Base
+from app.models.mixins import TimestampMixin
+from app.models.user import UserRole
+
+
+class ApiKey(TimestampMixin, Base):
+    """
+    Long-lived credential for a POS terminal. Only the SHA-256 digest of the key is
+    stored; the plaintext is shown once, at creation.
+    """
+
+    __tablename__ = "api_keys"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    key_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False, index=True)
+    # First characters of the plaintext, so a key can be recognised in listings
+    prefix: Mapped[str] = mapped_column(String(16), nullable=False)
+    role: Mapped[UserRole] = mapped_column(
+        Enum(UserRole, name="user_role"), default=UserRole.CASHIER, nullable=False
+    )
+    branch_id: Mapped[int] = mapped_column(
+        ForeignKey("branches.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # Issuer: orders placed with the key are attributed to this user, and the key only
+    # works while the user is active and their role/scope could still issue it
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    branch = relationship("Branch")
+    user = relationship("User")
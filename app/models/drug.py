@@ -1,6 +1,7 @@
-from sqlalchemy import Boolean, JSON, Numeric, String
+from sqlalchemy import DDL, Boolean, Index, JSON, Numeric, String, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.text import normalize_search_text
 from app.models.base import Base
 from app.models.mixins import TimestampMixin
 
@@ -15,15 +16,58 @@ class Drug(TimestampMixin, Base):
     price: Mapped[float] = mapped_column(Numeric(10, 2), default=0.0, nullable=False)  # Base price
     images: Mapped[list[str] | None] = mapped_column(JSON, nullable=True)  # List of image URLs
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # normalize_search_text(name), maintained on write; indexed for equality/prefix lookups
+    search_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_drugs_name_id", "name", "id"),
+        Index(
+            "ix_drugs_search_key",
+            "search_key",
+            postgresql_ops={"search_key": "varchar_pattern_ops"},
+        ),
+    )
 
     variants = relationship(
-        "DrugVariant", back_populates="drug", cascade="all, delete-orphan"
+        "DrugVariant", back_populates="drug", cascade="all, delete-orphan", order_by="DrugVariant.id"
     )
     inventories = relationship(
         "Inventory", back_populates="drug", cascade="all, delete-orphan"
     )
 
 
+# Search indexes live outside the ORM table definition: a pg_trgm GIN index on
+# PostgreSQL, an FTS5 trigram shadow table kept in sync by triggers on SQLite.
+# Alembic creates the same objects (see the drug_search_indexes revision); these
+# hooks cover databases built with metadata.create_all.
+POSTGRESQL_SEARCH_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_drugs_name_trgm ON drugs USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_drugs_code_trgm ON drugs USING gin (code gin_trgm_ops)",
+)
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS drugs_fts USING fts5("
+    "name, code, content='drugs', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_ai AFTER INSERT ON drugs BEGIN "
+    "INSERT INTO drugs_fts(rowid, name, code) VALUES (new.id, new.name, new.code); END",
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_ad AFTER DELETE ON drugs BEGIN "
+    "INSERT INTO drugs_fts(drugs_fts, rowid, name, code) VALUES ('delete', old.id, old.name, old.code); END",
+    "CREATE TRIGGER IF NOT EXISTS drugs_fts_au AFTER UPDATE OF name, code ON drugs BEGIN "
+    "INSERT INTO drugs_fts(drugs_fts, rowid, name, code) VALUES ('delete', old.id, old.name, old.code); "
+    "INSERT INTO drugs_fts(rowid, name, code) VALUES (new.id, new.name, new.code); END",
+)
+
+for _statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(Drug.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Drug.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    Drug.__table__, "before_drop", DDL("DROP TABLE IF EXISTS drugs_fts").execute_if(dialect="sqlite")
+)
 
 
+@event.listens_for(Drug, "before_insert")
+@event.listens_for(Drug, "before_update")
+def _set_search_key(mapper, connection, target: Drug) -> None:  # noqa: ARG001
+    target.search_key = normalize_search_text(target.name)
 
@@ -1,6 +1,7 @@
-from sqlalchemy import Boolean, ForeignKey, Numeric, String
+from sqlalchemy import Boolean, ForeignKey, Index, Numeric, String, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.text import normalize_search_text
 from app.models.base import Base
 from app.models.mixins import TimestampMixin
 
@@ -16,9 +17,26 @@ class DrugVariant(TimestampMixin, Base):
     sku: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)  # Stock Keeping Unit
     price: Mapped[float] = mapped_column(Numeric(10, 2), default=0.0, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # normalize_search_text(name), maintained on write; indexed for equality/prefix lookups
+    search_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_drug_variants_drug_id", "drug_id"),
+        Index(
+            "ix_drug_variants_search_key",
+            "search_key",
+            postgresql_ops={"search_key": "varchar_pattern_ops"},
+        ),
+    )
 
     drug = relationship("Drug", back_populates="variants")
     inventories = relationship(
         "Inventory", back_populates="drug_variant", cascade="all, delete-orphan"
     )
 
+
+@event.listens_for(DrugVariant, "before_insert")
+@event.listens_for(DrugVariant, "before_update")
+def _set_search_key(mapper, connection, target: DrugVariant) -> None:  # noqa: ARG001
+    target.search_key = normalize_search_text(target.name)
+
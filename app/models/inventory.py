@@ -22,6 +22,8 @@ class Inventory(TimestampMixin, Base):
         ForeignKey("drug_variants.id", ondelete="CASCADE"), nullable=True
     )
     quantity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Units held by pending orders; available stock is quantity - reserved_quantity
+    reserved_quantity: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     reorder_level: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
 
     branch = relationship("Branch", back_populates="inventories")
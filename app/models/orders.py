@@ -1,5 +1,5 @@
-from datetime import datetime
-from sqlalchemy import String, Integer, ForeignKey, Numeric, Enum as SQLEnum, DateTime, func
+from datetime import date, datetime
+from sqlalchemy import String, Integer, ForeignKey, Index, Numeric, Enum as SQLEnum, Date, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List
 import enum
@@ -16,15 +16,29 @@ class OrderStatus(str, enum.Enum):
 
 class Order(TimestampMixin, Base):
     __tablename__ = "orders"
+    # Keyset pagination walks (created_at, id) newest first within each filter
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_branch_id_created_at_id", "branch_id", "created_at", "id"),
+        Index("ix_orders_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        Index("ix_orders_status_reservation_expires_at", "status", "reservation_expires_at"),
+        # Never hand out an archived order's id again (SQLite reuses the highest rowid otherwise)
+        {"sqlite_autoincrement": True},
+    )
+    # Fetch id/created_at via INSERT ... RETURNING instead of a refresh round trip
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    order_number: Mapped[str] = mapped_column(String(10), unique=True, index=True, nullable=False)
-    barcode: Mapped[str] = mapped_column(String(10), unique=True, index=True, nullable=False)
+    order_number: Mapped[str] = mapped_column(String(32), unique=True, index=True, nullable=False)
+    barcode: Mapped[str] = mapped_column(String(12), unique=True, index=True, nullable=False)
     branch_id: Mapped[int] = mapped_column(Integer, ForeignKey("branches.id"), nullable=False)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
     status: Mapped[str] = mapped_column(SQLEnum(OrderStatus), default=OrderStatus.PENDING, nullable=False)
     total_amount: Mapped[float] = mapped_column(Numeric(10, 2), default=0.0, nullable=False)
     confirmed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Set when creation reserved stock; NULL for orders placed before reservations existed
+    reservation_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     branch: Mapped["Branch"] = relationship("Branch", back_populates="orders")
@@ -41,9 +55,10 @@ class Order(TimestampMixin, Base):
 
 class OrderItem(Base):
     __tablename__ = "order_items"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    order_id: Mapped[int] = mapped_column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id: Mapped[int] = mapped_column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     drug_id: Mapped[int] = mapped_column(Integer, ForeignKey("drugs.id"), nullable=False)
     drug_variant_id: Mapped[int | None] = mapped_column(
         Integer, ForeignKey("drug_variants.id"), nullable=True
@@ -58,4 +73,77 @@ class OrderItem(Base):
     drug_variant: Mapped["DrugVariant | None"] = relationship("DrugVariant")
 
     def __repr__(self) -> str:
-        return f"<OrderItem(id={self.id}, drug_id={self.drug_id}, drug_variant_id={self.drug_variant_id}, quantity={self.quantity})>"
\ No newline at end of file
+        return f"<OrderItem(id={self.id}, drug_id={self.drug_id}, drug_variant_id={self.drug_variant_id}, quantity={self.quantity})>"
+
+
+class OrderNumberCounter(Base):
+    """Per-branch, per-day sequence used to build human-readable order numbers"""
+    __tablename__ = "order_number_counters"
+
+    branch_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("branches.id", ondelete="CASCADE"), primary_key=True
+    )
+    business_day: Mapped[date] = mapped_column(Date, primary_key=True)
+    last_value: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class ArchivedOrder(Base):
+    """
+    Cold copy of a confirmed/cancelled order moved out of `orders` by the archiver.
+    On PostgreSQL the table is range-partitioned by month on created_at, which is why
+    created_at is part of the primary key and codes are indexed rather than unique.
+    """
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        Index("ix_orders_archive_created_at_id", "created_at", "id"),
+        Index("ix_orders_archive_branch_id_created_at_id", "branch_id", "created_at", "id"),
+        Index("ix_orders_archive_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_orders_archive_barcode", "barcode"),
+        Index("ix_orders_archive_order_number", "order_number"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    order_number: Mapped[str] = mapped_column(String(32), nullable=False)
+    barcode: Mapped[str] = mapped_column(String(12), nullable=False)
+    branch_id: Mapped[int] = mapped_column(Integer, ForeignKey("branches.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    status: Mapped[str] = mapped_column(SQLEnum(OrderStatus), nullable=False)
+    total_amount: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    confirmed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    reservation_expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    # Order IDs stay unique after archival, so the ORM identifies rows by id alone
+    __mapper_args__ = {"primary_key": [id]}
+
+    items: Mapped[List["ArchivedOrderItem"]] = relationship(
+        "ArchivedOrderItem",
+        primaryjoin="ArchivedOrder.id == foreign(ArchivedOrderItem.order_id)",
+        viewonly=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<ArchivedOrder(id={self.id}, order_number={self.order_number}, status={self.status})>"
+
+
+class ArchivedOrderItem(Base):
+    """Cold copy of an order line; rows keep their original IDs"""
+    __tablename__ = "order_items_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    order_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    drug_id: Mapped[int] = mapped_column(Integer, ForeignKey("drugs.id"), nullable=False)
+    drug_variant_id: Mapped[int | None] = mapped_column(
+        Integer, ForeignKey("drug_variants.id"), nullable=True
+    )
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    subtotal: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+
+    drug: Mapped["Drug"] = relationship("Drug")
+    drug_variant: Mapped["DrugVariant | None"] = relationship("DrugVariant")
+
+    def __repr__(self) -> str:
+        return f"<ArchivedOrderItem(id={self.id}, order_id={self.order_id}, drug_id={self.drug_id})>"
@@ -28,6 +28,8 @@ class User(TimestampMixin, Base):
         Enum(UserRole, name="user_role"), default=UserRole.USER, nullable=False
     )
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # Bumped whenever role/scope changes; access tokens carrying an older value are rejected
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     pharmacy_id: Mapped[int | None] = mapped_column(
         ForeignKey("pharmacies.id", ondelete="SET NULL"), nullable=True
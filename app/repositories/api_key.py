@@ -0,0 +1,101 @@
+from collections.abc import Sequence
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.principal import Principal
+from app.models import ApiKey, Branch, User, UserRole
+from app.repositories.base import BaseRepository
+
+
+class ApiKeyRepository(BaseRepository):
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__(session)
+
+    async def create(
+        self,
+        *,
+        name: str,
+        key_hash: str,
+        prefix: str,
+        role: UserRole,
+        branch_id: int,
+        user_id: int,
+    ) -> ApiKey:
+        api_key = ApiKey(
+            name=name,
+            key_hash=key_hash,
+            prefix=prefix,
+            role=role,
+            branch_id=branch_id,
+            user_id=user_id,
+        )
+        self.session.add(api_key)
+        await self.session.flush()
+        await self.session.refresh(api_key)
+        return api_key
+
+    async def get_by_id(self, api_key_id: int) -> ApiKey | None:
+        stmt = select(ApiKey).where(ApiKey.id == api_key_id)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def get_principal(self, key_hash: str) -> Principal | None:
+        """
+        Identity of an active key whose owner is still active and could still issue it;
+        one indexed lookup by digest. The scope check mirrors ApiKeyService's issuing
+        rules, so a demoted or transferred issuer's keys stop working without a revoke.
+        """
+        issuer_in_scope = or_(
+            User.role.in_([UserRole.SUPERADMIN, UserRole.OPERATOR]),
+            and_(User.role == UserRole.PHARMACY_ADMIN, User.pharmacy_id == Branch.pharmacy_id),
+            and_(
+                User.role == UserRole.BRANCH_ADMIN,
+                User.branch_id == ApiKey.branch_id,
+                ApiKey.role == UserRole.CASHIER,
+            ),
+        )
+        stmt = (
+            select(ApiKey.id, ApiKey.user_id, ApiKey.role, ApiKey.branch_id, Branch.pharmacy_id)
+            .join(Branch, Branch.id == ApiKey.branch_id)
+            .join(User, User.id == ApiKey.user_id)
+            .where(
+                ApiKey.key_hash == key_hash,
+                ApiKey.is_active.is_(True),
+                User.is_active.is_(True),
+                issuer_in_scope,
+            )
+        )
+        row = (await self.session.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+        return Principal(
+            id=row.user_id,
+            role=row.role,
+            pharmacy_id=row.pharmacy_id,
+            branch_id=row.branch_id,
+            is_active=True,
+            token_version=0,
+            api_key_id=row.id,
+        )
+
+    async def list_keys(
+        self,
+        *,
+        pharmacy_id: int | None = None,
+        branch_id: int | None = None,
+    ) -> Sequence[ApiKey]:
+        stmt = select(ApiKey).order_by(ApiKey.id)
+        if pharmacy_id is not None:
+            stmt = stmt.join(Branch, Branch.id == ApiKey.branch_id).where(Branch.pharmacy_id == pharmacy_id)
+        if branch_id is not None:
+            stmt = stmt.where(ApiKey.branch_id == branch_id)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def revoke(self, api_key: ApiKey) -> ApiKey:
+        api_key.is_active = False
+        api_key.revoked_at = datetime.now(timezone.utc)
+        await self.session.flush()
+        return api_key
@@ -1,13 +1,21 @@
 from collections.abc import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Integer, Row, and_, bindparam, case, func, literal, or_, select, text, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.models import Drug
+from app.core.config import settings
+from app.core.text import normalize_search_text
+from app.models import ArchivedOrderItem, Drug, DrugVariant, OrderItem
 from app.repositories.base import BaseRepository
 
 
 class DrugRepository(BaseRepository):
+    # Columns of DrugRead
+    LIST_FIELDS = ("id", "name", "code", "description", "price", "images", "is_active", "created_at", "updated_at")
+    # Columns of DrugVariantRead
+    VARIANT_FIELDS = ("id", "drug_id", "name", "sku", "price", "is_active", "created_at", "updated_at")
+
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session)
 
@@ -32,18 +40,274 @@ class DrugRepository(BaseRepository):
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
-    async def list(self, *, is_active: bool | None = None, search: str | None = None) -> Sequence[Drug]:
-        stmt = select(Drug)
+    async def list(
+        self,
+        *,
+        limit: int,
+        after: tuple[str, int] | None = None,
+        is_active: bool | None = None,
+        search: str | None = None,
+    ) -> Sequence[Row]:
+        """
+        One page ordered by (name, id), continuing strictly after `after` (keyset).
+        Selects plain columns: no ORM identity map work for read-only listings.
+        """
+        stmt = select(*(getattr(Drug, field) for field in self.LIST_FIELDS))
+        stmt = self._page(stmt, limit=limit, after=after, is_active=is_active, search=search)
+        result = await self.session.execute(stmt)
+        return result.all()
+
+    async def list_with_variants(
+        self,
+        *,
+        limit: int,
+        after: tuple[str, int] | None = None,
+        is_active: bool | None = None,
+        search: str | None = None,
+    ) -> Sequence[Drug]:
+        """
+        Same page as `list`, as Drug objects with their active variants loaded:
+        one query for the page, one `drug_id IN (...)` query for all of its variants.
+        """
+        stmt = select(Drug).options(selectinload(Drug.variants.and_(DrugVariant.is_active.is_(True))))
+        stmt = self._page(stmt, limit=limit, after=after, is_active=is_active, search=search)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    def _page(
+        self,
+        stmt,
+        *,
+        limit: int,
+        after: tuple[str, int] | None,
+        is_active: bool | None,
+        search: str | None,
+    ):
         if is_active is not None:
             stmt = stmt.where(Drug.is_active == is_active)
         if search:
-            ilike_term = f"%{search.lower()}%"
-            stmt = stmt.where(
-                (Drug.name.ilike(ilike_term)) | (Drug.code.ilike(ilike_term))
-            )
-        result = await self.session.execute(stmt.order_by(Drug.name))
+            key = normalize_search_text(search)
+            condition = self._contains(search)
+            if key:
+                condition = or_(condition, self.key_prefix(Drug.search_key, key))
+            stmt = stmt.where(condition)
+        if after is not None:
+            name, drug_id = after
+            # The redundant `name >= ` bound is what lets the planner seek into
+            # ix_drugs_name_id instead of scanning it from the first name
+            stmt = stmt.where(Drug.name >= name, or_(Drug.name > name, Drug.id > drug_id))
+        return stmt.order_by(Drug.name, Drug.id).limit(limit)
+
+    def key_prefix(self, column, key: str):
+        """
+        `column` starts with the normalized `key`, as an index range scan: LIKE on the
+        varchar_pattern_ops index on PostgreSQL, a BINARY-collated range on SQLite.
+        Keys only contain [0-9a-z ], so neither needs escaping.
+        """
+        if self._dialect == "postgresql":
+            return column.like(f"{key}%")
+        return and_(column >= key, column < f"{key}\x7f")
+
+    def _contains(self, term: str):
+        """
+        Substring match on name or code. Served by the trigram GIN indexes on PostgreSQL
+        and the FTS5 trigram table on SQLite (which needs at least 3 characters).
+        """
+        ilike = or_(Drug.name.ilike(f"%{term}%"), Drug.code.ilike(f"%{term}%"))
+        if self._dialect != "sqlite" or len(term) < 3:
+            return ilike
+        phrase = '"' + term.replace('"', '""') + '"'
+        return Drug.id.in_(
+            text("SELECT rowid FROM drugs_fts WHERE drugs_fts MATCH :phrase")
+            .bindparams(phrase=phrase)
+            .columns(rowid=Integer)
+        )
+
+    async def search(
+        self,
+        term: str,
+        *,
+        limit: int,
+        offset: int = 0,
+        is_active: bool | None = None,
+    ) -> Sequence[Drug]:
+        """
+        Ranked, typo-tolerant search on name and code, best match first.
+        PostgreSQL ranks by pg_trgm word similarity; SQLite by BM25 over FTS5 trigrams.
+        """
+        term = term.strip()
+        if not term:
+            return []
+        if self._dialect == "postgresql":
+            stmt = await self._search_postgresql(term)
+        elif len(term) >= 3:
+            return await self._search_sqlite(term, limit=limit, offset=offset, is_active=is_active)
+        else:
+            # Too short for trigrams: plain substring match
+            stmt = select(Drug).where(self._contains(term)).order_by(Drug.name, Drug.id)
+
+        if is_active is not None:
+            stmt = stmt.where(Drug.is_active == is_active)
+        result = await self.session.execute(stmt.limit(limit).offset(offset))
         return result.scalars().all()
 
+    async def _search_postgresql(self, term: str):
+        # `<%` is the index-backed word-similarity operator; its cut-off is a setting,
+        # lowered for this transaction so one or two wrong letters still match
+        await self.session.execute(
+            select(func.set_config(
+                "pg_trgm.word_similarity_threshold", str(settings.drug_search_min_similarity), True
+            ))
+        )
+        query = literal(term)
+        score = func.greatest(func.word_similarity(query, Drug.name), func.word_similarity(query, Drug.code))
+        conditions = [
+            query.op("<%")(Drug.name),
+            query.op("<%")(Drug.code),
+            Drug.name.ilike(f"%{term}%"),
+            Drug.code.ilike(f"%{term}%"),
+        ]
+        order_by = [score.desc(), Drug.name, Drug.id]
+        key = normalize_search_text(term)
+        if key:
+            # Transliterated/case-folded prefix hits (e.g. a Cyrillic query) rank first
+            prefix = self.key_prefix(Drug.search_key, key)
+            conditions.append(prefix)
+            order_by.insert(0, case((prefix, 0), else_=1))
+        return select(Drug).where(or_(*conditions)).order_by(*order_by)
+
+    async def _search_sqlite(
+        self,
+        term: str,
+        *,
+        limit: int,
+        offset: int,
+        is_active: bool | None,
+    ) -> Sequence[Drug]:
+        """
+        Tiers, each only consulted if the previous ones do not fill the page: drugs
+        whose normalized name starts with the normalized term (search_key index), drugs
+        containing the term verbatim (FTS5 trigram phrase), then near misses ranked by
+        how many of the term's trigrams they share. BM25 over "any trigram" touches a large
+        part of the catalogue, so it is skipped whenever the exact tier is enough.
+        """
+        wanted = offset + limit
+        key = normalize_search_text(term)
+        ids = await self._key_prefix_ids(key, wanted, is_active) if key else {}
+        if len(ids) < wanted:
+            phrase = '"' + term.replace('"', '""') + '"'
+            for drug_id in await self._fts_ids(phrase, wanted, is_active):
+                ids.setdefault(drug_id, None)
+        if len(ids) < wanted:
+            # Trigrams of the normalized form, so a Cyrillic query still meets Latin names
+            lowered = key or term.lower()
+            trigrams = dict.fromkeys(lowered[i:i + 3] for i in range(len(lowered) - 2))
+            fuzzy = " OR ".join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+            # Exact hits also match the fuzzy query; over-fetch by their count and dedupe
+            for drug_id in await self._fts_ids(fuzzy, wanted + len(ids), is_active):
+                if drug_id not in ids:
+                    ids[drug_id] = None
+        page = list(ids)[offset:wanted]
+        if not page:
+            return []
+
+        result = await self.session.execute(select(Drug).where(Drug.id.in_(page)))
+        drugs = {drug.id: drug for drug in result.scalars()}
+        return [drugs[drug_id] for drug_id in page if drug_id in drugs]
+
+    async def _key_prefix_ids(self, key: str, limit: int, is_active: bool | None) -> dict[int, None]:
+        stmt = select(Drug.id).where(self.key_prefix(Drug.search_key, key))
+        if is_active is not None:
+            stmt = stmt.where(Drug.is_active == is_active)
+        result = await self.session.execute(stmt.order_by(Drug.search_key, Drug.id).limit(limit))
+        return dict.fromkeys(result.scalars())
+
+    async def _fts_ids(self, match: str, limit: int, is_active: bool | None) -> dict[int, None]:
+        """Best `limit` drug ids for an FTS5 query, in rank order (a dict keeps the order)"""
+        active_filter = "" if is_active is None else "AND drugs.is_active = :is_active"
+        stmt = text(
+            "SELECT drugs_fts.rowid FROM drugs_fts JOIN drugs ON drugs.id = drugs_fts.rowid "
+            f"WHERE drugs_fts MATCH :match {active_filter} "
+            "ORDER BY drugs_fts.rank LIMIT :limit"
+        )
+        params = {"match": match, "limit": limit}
+        if is_active is not None:
+            params["is_active"] = is_active
+        result = await self.session.execute(stmt, params)
+        return dict.fromkeys(result.scalars())
+
+    @property
+    def _dialect(self) -> str:
+        return self.session.bind.dialect.name
+
+    async def list_completion_sources(self) -> tuple[Sequence[Row], Sequence[Row], dict[tuple[int, int | None], int]]:
+        """
+        Everything the autocomplete index is built from, in three lean queries:
+        active drugs, active variants (with their drug's name) and units sold per
+        (drug_id, drug_variant_id) across live and archived order items.
+        """
+        drugs = (await self.session.execute(
+            select(Drug.id, Drug.name, Drug.code).where(Drug.is_active.is_(True))
+        )).all()
+        variants = (await self.session.execute(
+            select(DrugVariant.id, DrugVariant.drug_id, DrugVariant.name, DrugVariant.sku, Drug.name.label("drug_name"))
+            .join(Drug, Drug.id == DrugVariant.drug_id)
+            .where(DrugVariant.is_active.is_(True), Drug.is_active.is_(True))
+        )).all()
+
+        sold = union_all(*(
+            select(model.drug_id, model.drug_variant_id, model.quantity)
+            for model in (OrderItem, ArchivedOrderItem)
+        )).subquery()
+        popularity = (await self.session.execute(
+            select(sold.c.drug_id, sold.c.drug_variant_id, func.sum(sold.c.quantity))
+            .group_by(sold.c.drug_id, sold.c.drug_variant_id)
+        )).all()
+        return drugs, variants, {(drug_id, variant_id): int(total) for drug_id, variant_id, total in popularity}
+
+    async def list_variant_lookup_sources(
+        self, skus: Sequence[str] | None = None
+    ) -> tuple[Sequence[Row], Sequence[Row]]:
+        """
+        Active variants of active drugs (all, or those with the given SKUs, via the unique
+        sku index) as DrugVariantRead columns, and their drugs as DrugRead columns.
+        """
+        stmt = (
+            select(*(getattr(DrugVariant, field) for field in self.VARIANT_FIELDS))
+            .join(Drug, Drug.id == DrugVariant.drug_id)
+            .where(DrugVariant.is_active.is_(True), Drug.is_active.is_(True))
+        )
+        drugs_stmt = select(*(getattr(Drug, field) for field in self.LIST_FIELDS))
+        if skus is None:
+            drugs_stmt = drugs_stmt.where(Drug.is_active.is_(True))
+        else:
+            stmt = stmt.where(DrugVariant.sku.in_(skus))
+        variants = (await self.session.execute(stmt)).all()
+        if skus is not None:
+            if not variants:
+                return variants, []
+            drugs_stmt = drugs_stmt.where(Drug.id.in_({variant.drug_id for variant in variants}))
+        drugs = (await self.session.execute(drugs_stmt)).all()
+        return variants, drugs
+
+    async def list_missing_search_keys(
+        self, model: type[Drug] | type[DrugVariant], limit: int
+    ) -> Sequence[Row]:
+        result = await self.session.execute(
+            select(model.id, model.name).where(model.search_key.is_(None)).order_by(model.id).limit(limit)
+        )
+        return result.all()
+
+    async def set_search_keys(self, model: type[Drug] | type[DrugVariant], keys: Sequence[tuple[int, str]]) -> None:
+        """Write precomputed keys in one executemany UPDATE"""
+        if not keys:
+            return
+        table = model.__table__
+        await self.session.execute(
+            update(table).where(table.c.id == bindparam("b_id")).values(search_key=bindparam("b_key")),
+            [{"b_id": row_id, "b_key": key} for row_id, key in keys],
+        )
+
     async def get_variant_by_id(self, variant_id: int):
         from app.models import DrugVariant
         stmt = select(DrugVariant).where(DrugVariant.id == variant_id)
@@ -1,6 +1,6 @@
 from collections.abc import Sequence
 
-from sqlalchemy import func, select
+from sqlalchemy import Row, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import Branch, Inventory
@@ -25,6 +25,17 @@ class InventoryRepository(BaseRepository):
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_variant_stock(self, branch_id: int, variant_ids: Sequence[int]) -> dict[int, Row]:
+        """(quantity, reserved_quantity) per variant at one branch, in one uq_inventory_branch_variant lookup"""
+        if not variant_ids:
+            return {}
+        stmt = select(Inventory.drug_variant_id, Inventory.quantity, Inventory.reserved_quantity).where(
+            Inventory.branch_id == branch_id,
+            Inventory.drug_variant_id.in_(variant_ids),
+        )
+        result = await self.session.execute(stmt)
+        return {row.drug_variant_id: row for row in result}
+
     async def get_total_quantity_by_drug_for_pharmacy(
         self, pharmacy_id: int, drug_id: int, drug_variant_id: int | None = None
     ) -> int:
@@ -69,9 +80,21 @@ class InventoryRepository(BaseRepository):
         *,
         quantity: int | None = None,
         reorder_level: int | None = None,
-    ) -> Inventory:
+    ) -> Inventory | None:
+        """
+        Returns None, changing nothing, if quantity would drop below the units pending
+        orders hold. The check is part of the UPDATE so a concurrent reservation can't slip in.
+        """
         if quantity is not None:
-            inventory.quantity = quantity
+            stmt = (
+                update(Inventory)
+                .where(Inventory.id == inventory.id, Inventory.reserved_quantity <= quantity)
+                .values(quantity=quantity)
+                .execution_options(synchronize_session=False)
+            )
+            result = await self.session.execute(stmt)
+            if result.rowcount != 1:
+                return None
         if reorder_level is not None:
             inventory.reorder_level = reorder_level
         await self.session.flush()
@@ -140,6 +163,6 @@ class InventoryRepository(BaseRepository):
         if pharmacy_id is not None:
             stmt = stmt.where(Branch.pharmacy_id == pharmacy_id)
         if min_quantity is not None and min_quantity > 0:
-            stmt = stmt.where(Inventory.quantity >= min_quantity)
+            stmt = stmt.where(Inventory.quantity - Inventory.reserved_quantity >= min_quantity)
         result = await self.session.execute(stmt)
         return result.scalars().all()
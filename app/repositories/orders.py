@@ -1,59 +1,130 @@
+import heapq
+from datetime import date, datetime, timezone
+from itertools import islice
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import Row, bindparam, case, delete, insert, select, func, and_, or_, text, update
 from sqlalchemy.orm import selectinload, joinedload
-from typing import Optional, List
+from typing import Iterable, Optional, List
 
-from app.models.orders import Order, OrderItem, OrderStatus
-from app.models import Drug, Inventory, Branch
+from app.models.orders import (
+    ArchivedOrder,
+    ArchivedOrderItem,
+    Order,
+    OrderItem,
+    OrderNumberCounter,
+    OrderStatus
+)
+from app.models import Drug, DrugVariant, Inventory, Branch
 
 
 class OrderRepository:
+    # Columns needed by list endpoints; avoids hydrating Order/OrderItem objects
+    LIST_FIELDS = (
+        "id",
+        "order_number",
+        "barcode",
+        "branch_id",
+        "user_id",
+        "status",
+        "total_amount",
+        "created_at",
+    )
+
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def create_order(self, order: Order) -> Order:
-        """Create a new order"""
+        """Create a new order; server defaults come back with the INSERT (eager_defaults)"""
         self.db.add(order)
         await self.db.flush()
-        await self.db.refresh(order)
         return order
 
+    async def create_orders(self, orders: List[Order]) -> List[Order]:
+        """
+        Create many orders with one multi-row INSERT ... RETURNING. The objects are not
+        added to the session; their id and created_at are filled in from the insert.
+        """
+        if not orders:
+            return orders
+        columns = ("order_number", "barcode", "branch_id", "user_id", "status", "total_amount", "reservation_expires_at")
+        result = await self.db.execute(
+            insert(Order)
+            .values([{column: getattr(order, column) for column in columns} for order in orders])
+            .returning(Order.barcode, Order.id, Order.created_at)
+        )
+        inserted = {row.barcode: row for row in result}
+        for order in orders:
+            order.id = inserted[order.barcode].id
+            order.created_at = inserted[order.barcode].created_at
+        return orders
+
+    async def insert_order_items(self, order_items: List[OrderItem]) -> None:
+        """Create order items for many orders with one multi-row INSERT (no objects are loaded)"""
+        if not order_items:
+            return
+        columns = ("order_id", "drug_id", "drug_variant_id", "quantity", "price", "subtotal")
+        await self.db.execute(
+            insert(OrderItem).values([{column: getattr(item, column) for column in columns} for item in order_items])
+        )
+
     async def create_order_items(self, order_items: List[OrderItem]) -> List[OrderItem]:
         """Create order items in bulk"""
         self.db.add_all(order_items)
         await self.db.flush()
         return order_items
 
-    async def get_order_by_id(self, order_id: int) -> Optional[Order]:
-        """Get order by ID with items and drug details"""
-        query = (
-            select(Order)
-            .options(
-                selectinload(Order.items).selectinload(OrderItem.drug),
-                selectinload(Order.items).selectinload(OrderItem.drug_variant)
+    async def get_order_by_id(self, order_id: int) -> Optional[Order | ArchivedOrder]:
+        """Get order by ID with items and drug details; archived orders are looked up second"""
+        return await self._get_order_with_items(lambda model: model.id == order_id)
+
+    async def get_order_by_barcode(self, barcode: str) -> Optional[Order | ArchivedOrder]:
+        """Get order by barcode with items; archived orders are looked up second"""
+        return await self._get_order_with_items(lambda model: model.barcode == barcode)
+
+    async def _get_order_with_items(self, condition) -> Optional[Order | ArchivedOrder]:
+        for order_model, item_model in ((Order, OrderItem), (ArchivedOrder, ArchivedOrderItem)):
+            query = (
+                select(order_model)
+                .options(
+                    selectinload(order_model.items).selectinload(item_model.drug),
+                    selectinload(order_model.items).selectinload(item_model.drug_variant)
+                )
+                .where(condition(order_model))
             )
-            .where(Order.id == order_id)
-        )
-        result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+            result = await self.db.execute(query)
+            order = result.scalars().first()
+            if order is not None:
+                return order
+        return None
 
-    async def get_order_by_barcode(self, barcode: str) -> Optional[Order]:
-        """Get order by barcode with items"""
+    async def get_orders_by_barcodes(self, barcodes: Iterable[str]) -> dict[str, Order]:
+        """Hot-table orders (with items and drugs) for many barcodes in one query, keyed by barcode"""
+        codes = set(barcodes)
+        if not codes:
+            return {}
         query = (
             select(Order)
-            .options(
-                selectinload(Order.items).selectinload(OrderItem.drug),
-                selectinload(Order.items).selectinload(OrderItem.drug_variant)
-            )
-            .where(Order.barcode == barcode)
+            .options(selectinload(Order.items).selectinload(OrderItem.drug))
+            .where(Order.barcode.in_(codes))
         )
         result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+        return {order.barcode: order for order in result.scalars().all()}
 
-    async def get_order_by_number(self, order_number: str) -> Optional[Order]:
-        """Get order by order number"""
-        query = select(Order).where(Order.order_number == order_number)
-        result = await self.db.execute(query)
+    async def get_order_by_number(self, order_number: str) -> Optional[Order | ArchivedOrder]:
+        """Get order by order number; archived orders are looked up second"""
+        for order_model in (Order, ArchivedOrder):
+            query = select(order_model).where(order_model.order_number == order_number)
+            result = await self.db.execute(query)
+            order = result.scalars().first()
+            if order is not None:
+                return order
+        return None
+
+    async def get_order_status(self, order_id: int) -> Optional[OrderStatus]:
+        result = await self.db.execute(select(Order.status).where(Order.id == order_id))
         return result.scalar_one_or_none()
 
     async def update_order_status(self, order: Order, status: OrderStatus) -> Order:
@@ -63,51 +134,155 @@ class OrderRepository:
         await self.db.refresh(order)
         return order
 
+    async def confirm_pending_order(self, order_id: int, confirmed_at: datetime) -> bool:
+        """
+        Atomically move a pending order to confirmed.
+        Returns False if the order is no longer pending (e.g. a concurrent scan won).
+        """
+        stmt = (
+            update(Order)
+            .where(Order.id == order_id, Order.status == OrderStatus.PENDING)
+            .values(status=OrderStatus.CONFIRMED, confirmed_at=confirmed_at)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount == 1
+
+    async def confirm_pending_orders(self, order_ids: List[int], confirmed_at: datetime) -> set[int]:
+        """confirm_pending_order for many orders in one statement; returns the IDs actually claimed"""
+        if not order_ids:
+            return set()
+        stmt = (
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status == OrderStatus.PENDING)
+            .values(status=OrderStatus.CONFIRMED, confirmed_at=confirmed_at)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return set(result.scalars().all())
+
+    @staticmethod
+    def _paginate(query, model, *, skip: int, limit: int, after_id: Optional[int]):
+        """
+        Order newest first by (created_at, id). With after_id, continue strictly after
+        that order (keyset) instead of skipping rows, so every page costs the same.
+        The anchor's created_at is read in-database to avoid timestamp round-tripping,
+        from whichever of the hot and archive tables holds that order.
+        """
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+        if after_id is None:
+            return query.offset(skip).limit(limit)
+
+        anchor = func.coalesce(
+            select(Order.created_at).where(Order.id == after_id).scalar_subquery(),
+            select(ArchivedOrder.created_at).where(ArchivedOrder.id == after_id).scalar_subquery()
+        )
+        return query.where(
+            or_(
+                model.created_at < anchor,
+                and_(model.created_at == anchor, model.id < after_id)
+            )
+        ).limit(limit)
+
     async def get_all_orders(
         self, 
         skip: int = 0, 
         limit: int = 100,
         status: Optional[OrderStatus] = None,
         branch_id: Optional[int] = None,
-        user_id: Optional[int] = None
-    ) -> List[Order]:
-        """Get all orders with filters"""
-        query = select(Order).options(selectinload(Order.items))
-        
-        if status:
-            query = query.where(Order.status == status)
-        if branch_id:
-            query = query.where(Order.branch_id == branch_id)
-        if user_id:
-            query = query.where(Order.user_id == user_id)
-        
-        query = query.offset(skip).limit(limit).order_by(Order.created_at.desc())
-        
-        result = await self.db.execute(query)
-        return list(result.scalars().all())
+        user_id: Optional[int] = None,
+        after_id: Optional[int] = None
+    ) -> List[Row]:
+        """Get all orders with filters, newest first, as plain rows with item counts"""
+        def build(model):
+            query = select(*(getattr(model, field) for field in self.LIST_FIELDS))
+            if status:
+                query = query.where(model.status == status)
+            if branch_id:
+                query = query.where(model.branch_id == branch_id)
+            if user_id:
+                query = query.where(model.user_id == user_id)
+            return query
+
+        return await self._list_orders(build, skip=skip, limit=limit, after_id=after_id)
 
     async def get_orders_by_pharmacy(
         self,
         pharmacy_id: int,
         skip: int = 0,
         limit: int = 100,
-        status: Optional[OrderStatus] = None
-    ) -> List[Order]:
-        """Get orders for all branches under a pharmacy"""
+        status: Optional[OrderStatus] = None,
+        after_id: Optional[int] = None
+    ) -> List[Row]:
+        """Get orders for all branches under a pharmacy, newest first, as plain rows with item counts"""
+        def build(model):
+            query = (
+                select(*(getattr(model, field) for field in self.LIST_FIELDS))
+                .join(Branch, model.branch_id == Branch.id)
+                .where(Branch.pharmacy_id == pharmacy_id)
+            )
+            if status:
+                query = query.where(model.status == status)
+            return query
+
+        return await self._list_orders(build, skip=skip, limit=limit, after_id=after_id)
+
+    async def _list_orders(
+        self,
+        build,
+        *,
+        skip: int,
+        limit: int,
+        after_id: Optional[int]
+    ) -> List[Row]:
+        """
+        Merge the hot and archive tables into one newest-first listing. Archived orders
+        are not necessarily older than hot ones (an old order can stay pending long after
+        newer ones were archived), so both are read with the same keyset bound, up to a
+        full page each, and merged on (created_at, id).
+        """
+        if after_id is not None:
+            skip = 0
+        wanted = skip + limit
+        hot = await self._fetch_with_item_counts(
+            self._paginate(build(Order), Order, skip=0, limit=wanted, after_id=after_id), OrderItem
+        )
+        cold = await self._fetch_with_item_counts(
+            self._paginate(build(ArchivedOrder), ArchivedOrder, skip=0, limit=wanted, after_id=after_id),
+            ArchivedOrderItem
+        )
+        merged = heapq.merge(hot, cold, key=lambda row: (row.created_at, row.id), reverse=True)
+        return list(islice(merged, skip, wanted))
+
+    async def _fetch_with_item_counts(self, page_query, item_model) -> List[Row]:
+        """
+        Run a page query and attach items_count / units_count per order in the same
+        statement. Items are aggregated only for the order IDs on the page, so no
+        OrderItem objects are loaded.
+        """
+        page = page_query.cte("page")
+        counts = (
+            select(
+                item_model.order_id,
+                func.count(item_model.id).label("items_count"),
+                func.sum(item_model.quantity).label("units_count")
+            )
+            .where(item_model.order_id.in_(select(page.c.id)))
+            .group_by(item_model.order_id)
+            .subquery("counts")
+        )
         query = (
-            select(Order)
-            .join(Branch, Order.branch_id == Branch.id)
-            .options(selectinload(Order.items))
-            .where(Branch.pharmacy_id == pharmacy_id)
-        )
-        
-        if status:
-            query = query.where(Order.status == status)
-        
-        query = query.offset(skip).limit(limit).order_by(Order.created_at.desc())
-        
+            select(
+                page,
+                func.coalesce(counts.c.items_count, 0).label("items_count"),
+                func.coalesce(counts.c.units_count, 0).label("units_count")
+            )
+            .outerjoin(counts, counts.c.order_id == page.c.id)
+            .order_by(page.c.created_at.desc(), page.c.id.desc())
+        )
         result = await self.db.execute(query)
-        return list(result.scalars().all())
+        return list(result.all())
 
     async def get_drug_by_id(self, drug_id: int) -> Optional[Drug]:
         """Get drug by ID"""
@@ -115,12 +290,159 @@ class OrderRepository:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_drugs_by_ids(self, drug_ids: Iterable[int]) -> dict[int, Drug]:
+        """Get drugs for a set of IDs in one query, keyed by ID"""
+        ids = set(drug_ids)
+        if not ids:
+            return {}
+        query = select(Drug).where(Drug.id.in_(ids))
+        result = await self.db.execute(query)
+        return {drug.id: drug for drug in result.scalars().all()}
+
+    async def get_variants_by_ids(self, variant_ids: Iterable[int]) -> dict[int, DrugVariant]:
+        """Get drug variants for a set of IDs in one query, keyed by ID"""
+        ids = set(variant_ids)
+        if not ids:
+            return {}
+        query = select(DrugVariant).where(DrugVariant.id.in_(ids))
+        result = await self.db.execute(query)
+        return {variant.id: variant for variant in result.scalars().all()}
+
+    async def get_inventories_for_items(
+        self,
+        branch_id: int,
+        keys: Iterable[tuple[int, Optional[int]]]
+    ) -> dict[tuple[int, Optional[int]], Inventory]:
+        """
+        Get branch inventories for many (drug_id, drug_variant_id) pairs in one query,
+        keyed by that pair. Rows for pairs that were not requested are dropped.
+        """
+        wanted = set(keys)
+        if not wanted:
+            return {}
+        query = select(Inventory).where(self._inventory_keys_filter(branch_id, wanted))
+        result = await self.db.execute(query)
+        inventories = {}
+        for inventory in result.scalars().all():
+            key = (inventory.drug_id, inventory.drug_variant_id)
+            if key in wanted:
+                inventories[key] = inventory
+        return inventories
+
+    async def get_inventory_ids_for_items(
+        self,
+        branch_id: int,
+        keys: Iterable[tuple[int, Optional[int]]]
+    ) -> dict[tuple[int, Optional[int]], int]:
+        """Like get_inventories_for_items, but only the inventory IDs (lock-ordering keys)"""
+        wanted = set(keys)
+        if not wanted:
+            return {}
+        query = select(Inventory.id, Inventory.drug_id, Inventory.drug_variant_id).where(
+            self._inventory_keys_filter(branch_id, wanted)
+        )
+        result = await self.db.execute(query)
+        return {
+            (row.drug_id, row.drug_variant_id): row.id
+            for row in result
+            if (row.drug_id, row.drug_variant_id) in wanted
+        }
+
+    async def lock_inventories(
+        self,
+        keys: Iterable[tuple[int, int, Optional[int]]]
+    ) -> dict[tuple[int, int, Optional[int]], Inventory]:
+        """
+        Read and lock (FOR UPDATE on PostgreSQL) the inventories for many
+        (branch_id, drug_id, drug_variant_id) keys in one query, keyed by that triple.
+        Rows are locked in inventory-id order, like every other stock writer.
+        """
+        by_branch: dict[int, set[tuple[int, Optional[int]]]] = {}
+        for branch_id, drug_id, drug_variant_id in keys:
+            by_branch.setdefault(branch_id, set()).add((drug_id, drug_variant_id))
+        if not by_branch:
+            return {}
+
+        query = (
+            select(Inventory)
+            .where(or_(*(
+                self._inventory_keys_filter(branch_id, wanted)
+                for branch_id, wanted in by_branch.items()
+            )))
+            .order_by(Inventory.id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        result = await self.db.execute(query)
+        inventories = {}
+        for inventory in result.scalars().all():
+            if (inventory.drug_id, inventory.drug_variant_id) in by_branch[inventory.branch_id]:
+                inventories[(inventory.branch_id, inventory.drug_id, inventory.drug_variant_id)] = inventory
+        return inventories
+
+    async def apply_stock_deltas(self, deltas: dict[int, tuple[int, int]]) -> bool:
+        """
+        Add (quantity, reserved_quantity) deltas to many inventories in one UPDATE.
+        Every row must stay consistent (no negative or oversold stock) or nothing is
+        applied and False is returned.
+        """
+        if not deltas:
+            return True
+        quantity_delta = case(
+            {inventory_id: delta[0] for inventory_id, delta in deltas.items()},
+            value=Inventory.id,
+            else_=0
+        )
+        reserved_delta = case(
+            {inventory_id: delta[1] for inventory_id, delta in deltas.items()},
+            value=Inventory.id,
+            else_=0
+        )
+        new_quantity = Inventory.quantity + quantity_delta
+        new_reserved = Inventory.reserved_quantity + reserved_delta
+        stmt = (
+            update(Inventory)
+            .where(
+                Inventory.id.in_(list(deltas)),
+                new_reserved >= 0,
+                new_quantity - new_reserved >= 0
+            )
+            .values(quantity=new_quantity, reserved_quantity=new_reserved)
+            .returning(Inventory.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return len(result.scalars().all()) == len(deltas)
+
+    @staticmethod
+    def _inventory_keys_filter(branch_id: int, wanted: set[tuple[int, Optional[int]]]):
+        drug_ids = {drug_id for drug_id, _ in wanted}
+        variant_ids = {variant_id for _, variant_id in wanted if variant_id is not None}
+
+        variant_filter = Inventory.drug_variant_id.is_(None)
+        if variant_ids:
+            variant_filter = or_(variant_filter, Inventory.drug_variant_id.in_(variant_ids))
+
+        return and_(
+            Inventory.branch_id == branch_id,
+            Inventory.drug_id.in_(drug_ids),
+            variant_filter
+        )
+
     async def get_branch_by_id(self, branch_id: int) -> Optional[Branch]:
         """Get branch by ID"""
         query = select(Branch).where(Branch.id == branch_id)
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
 
+    async def get_branches_by_ids(self, branch_ids: Iterable[int]) -> dict[int, Branch]:
+        """Get branches for a set of IDs in one query, keyed by ID"""
+        ids = set(branch_ids)
+        if not ids:
+            return {}
+        result = await self.db.execute(select(Branch).where(Branch.id.in_(ids)))
+        return {branch.id: branch for branch in result.scalars().all()}
+
     async def get_inventory_by_branch_and_drug(
         self, 
         branch_id: int, 
@@ -150,16 +472,211 @@ class OrderRepository:
         await self.db.refresh(inventory)
         return inventory
 
-    async def check_barcode_exists(self, barcode: str) -> bool:
-        """Check if barcode already exists"""
-        query = select(func.count(Order.id)).where(Order.barcode == barcode)
-        result = await self.db.execute(query)
-        count = result.scalar()
-        return count > 0
+    async def decrement_inventory_if_available(self, inventory_id: int, quantity: int) -> bool:
+        """
+        Subtract quantity from stock only if enough unreserved stock is on hand, in a
+        single conditional UPDATE. Returns False if stock is short.
+        """
+        stmt = (
+            update(Inventory)
+            .where(
+                Inventory.id == inventory_id,
+                Inventory.quantity - Inventory.reserved_quantity >= quantity
+            )
+            .values(quantity=Inventory.quantity - quantity)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount == 1
+
+    async def convert_reservation(self, inventory_id: int, quantity: int) -> bool:
+        """Turn reserved units into a sale: both quantity and reserved_quantity drop by quantity"""
+        stmt = (
+            update(Inventory)
+            .where(
+                Inventory.id == inventory_id,
+                Inventory.reserved_quantity >= quantity,
+                Inventory.quantity >= quantity
+            )
+            .values(
+                quantity=Inventory.quantity - quantity,
+                reserved_quantity=Inventory.reserved_quantity - quantity
+            )
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return result.rowcount == 1
 
-    async def check_order_number_exists(self, order_number: str) -> bool:
-        """Check if order number already exists"""
-        query = select(func.count(Order.id)).where(Order.order_number == order_number)
+    async def get_expired_pending_order_ids(self, now: datetime, limit: int) -> List[int]:
+        """IDs of pending orders whose stock reservation has run out, oldest first"""
+        query = (
+            select(Order.id)
+            .where(
+                Order.status == OrderStatus.PENDING,
+                Order.reservation_expires_at < now
+            )
+            .order_by(Order.reservation_expires_at)
+            .limit(limit)
+        )
         result = await self.db.execute(query)
-        count = result.scalar()
-        return count > 0
\ No newline at end of file
+        return list(result.scalars().all())
+
+    async def cancel_pending_orders(self, order_ids: List[int]) -> List[int]:
+        """
+        Cancel the given orders that are still pending, in one statement.
+        Returns the IDs actually cancelled, so reservations are released exactly once.
+        """
+        if not order_ids:
+            return []
+        stmt = (
+            update(Order)
+            .where(Order.id.in_(order_ids), Order.status == OrderStatus.PENDING)
+            .values(status=OrderStatus.CANCELLED)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def release_reservations(self, order_ids: List[int]) -> None:
+        """
+        Give back the stock held by the given orders, one grouped read plus one batched
+        update. Rows are updated in inventory-id order, the same order creates and scans
+        lock them in, so a large sweep cannot deadlock against them.
+        """
+        if not order_ids:
+            return
+        held = await self.db.execute(
+            select(Inventory.id, func.sum(OrderItem.quantity).label("quantity"))
+            .select_from(OrderItem)
+            .join(Order, OrderItem.order_id == Order.id)
+            .join(
+                Inventory,
+                and_(
+                    Inventory.branch_id == Order.branch_id,
+                    Inventory.drug_id == OrderItem.drug_id,
+                    Inventory.drug_variant_id.is_not_distinct_from(OrderItem.drug_variant_id)
+                )
+            )
+            .where(Order.id.in_(order_ids), Order.reservation_expires_at.is_not(None))
+            .group_by(Inventory.id)
+            .order_by(Inventory.id)
+        )
+        params = [{"b_id": row.id, "b_quantity": row.quantity} for row in held]
+        if not params:
+            return
+
+        inventories = Inventory.__table__
+        stmt = (
+            update(inventories)
+            .where(inventories.c.id == bindparam("b_id"))
+            .values(reserved_quantity=inventories.c.reserved_quantity - bindparam("b_quantity"))
+        )
+        await self.db.execute(stmt, params)
+
+    async def next_order_number_sequence(self, branch_id: int, business_day: date) -> int:
+        """
+        Increment and return the branch's order counter for the given day in one
+        upsert round trip. The counter row stays locked until the transaction ends.
+        """
+        dialect = self.db.bind.dialect.name
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = (
+            insert(OrderNumberCounter)
+            .values(branch_id=branch_id, business_day=business_day, last_value=1)
+            .on_conflict_do_update(
+                index_elements=[OrderNumberCounter.branch_id, OrderNumberCounter.business_day],
+                set_={"last_value": OrderNumberCounter.last_value + 1}
+            )
+            .returning(OrderNumberCounter.last_value)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalar_one()
+
+    async def next_order_number_sequences(
+        self,
+        business_day: date,
+        counts: dict[int, int]
+    ) -> dict[int, int]:
+        """
+        next_order_number_sequence for many branches at once: advance each branch's
+        counter by its count in one multi-row upsert and return the new last value per
+        branch. The branch's numbers are the `count` values ending at that one.
+        """
+        if not counts:
+            return {}
+        dialect = self.db.bind.dialect.name
+        insert = pg_insert if dialect == "postgresql" else sqlite_insert
+        stmt = insert(OrderNumberCounter).values([
+            {"branch_id": branch_id, "business_day": business_day, "last_value": count}
+            for branch_id, count in sorted(counts.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrderNumberCounter.branch_id, OrderNumberCounter.business_day],
+            set_={"last_value": OrderNumberCounter.last_value + stmt.excluded.last_value}
+        ).returning(OrderNumberCounter.branch_id, OrderNumberCounter.last_value)
+        result = await self.db.execute(stmt)
+        return {row.branch_id: row.last_value for row in result}
+
+    async def archive_orders(self, before: datetime, limit: int) -> int:
+        """
+        Move one batch of confirmed/cancelled orders created before `before`, with their
+        items, into the archive tables using set-based INSERT ... SELECT and DELETE.
+        Returns the number of orders moved.
+        """
+        result = await self.db.execute(
+            select(Order.id, Order.created_at)
+            .where(
+                Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.CANCELLED]),
+                Order.created_at < before
+            )
+            .order_by(Order.created_at, Order.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        batch = result.all()
+        if not batch:
+            return 0
+        order_ids = [row.id for row in batch]
+
+        if self.db.bind.dialect.name == "postgresql":
+            await self._ensure_archive_partitions(row.created_at for row in batch)
+
+        for source, target, key in (
+            (Order, ArchivedOrder, Order.id),
+            (OrderItem, ArchivedOrderItem, OrderItem.order_id),
+        ):
+            columns = [column.name for column in target.__table__.columns]
+            await self.db.execute(
+                insert(target).from_select(
+                    columns,
+                    select(*(source.__table__.c[name] for name in columns)).where(key.in_(order_ids))
+                )
+            )
+
+        await self.db.execute(
+            delete(OrderItem)
+            .where(OrderItem.order_id.in_(order_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.execute(
+            delete(Order)
+            .where(Order.id.in_(order_ids))
+            .execution_options(synchronize_session=False)
+        )
+        return len(order_ids)
+
+    async def _ensure_archive_partitions(self, timestamps: Iterable[datetime]) -> None:
+        """Create the monthly orders_archive partitions (PostgreSQL) a batch will land in"""
+        months = {
+            (moment.astimezone(timezone.utc).year, moment.astimezone(timezone.utc).month)
+            for moment in timestamps
+        }
+        for year, month in sorted(months):
+            start = date(year, month, 1)
+            end = date(year + month // 12, month % 12 + 1, 1)
+            await self.db.execute(text(
+                f"CREATE TABLE IF NOT EXISTS orders_archive_y{year}m{month:02d} "
+                f"PARTITION OF orders_archive "
+                f"FOR VALUES FROM ('{start} 00:00:00+00') TO ('{end} 00:00:00+00')"
+            ))
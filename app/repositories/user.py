@@ -1,12 +1,21 @@
-from typing import Sequence
+from typing import Any, Sequence
 
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.api_keys import invalidate_api_keys_of_user
+from app.core.principal import Principal
+from app.core.principal_cache import invalidate_principal
 from app.models import Branch, User, UserRole
 from app.repositories.base import BaseRepository
 
 
+# session.info key: users whose cached principal must be dropped once the session commits
+_CHANGED_PRINCIPALS = "changed_principals"
+
+
 class UserRepository(BaseRepository):
     def __init__(self, session: AsyncSession) -> None:
         super().__init__(session)
@@ -21,30 +30,95 @@ class UserRepository(BaseRepository):
         result = await self.session.execute(stmt)
         return result.scalar_one_or_none()
 
+    async def get_principal(self, user_id: int) -> Principal | None:
+        user = await self.get_by_id(user_id)
+        return Principal.from_user(user) if user is not None else None
+
     async def create(self, *, email: str, hashed_password: str, full_name: str | None = None) -> User:
         user = User(email=email, hashed_password=hashed_password, full_name=full_name)
         self.session.add(user)
         await self.session.flush()
         return user
 
+    async def get_existing_emails(self, emails: Sequence[str]) -> set[str]:
+        if not emails:
+            return set()
+        stmt = select(User.email).where(User.email.in_(emails))
+        result = await self.session.execute(stmt)
+        return set(result.scalars().all())
+
+    async def bulk_create(self, rows: Sequence[dict[str, Any]], chunk_size: int = 500) -> dict[str, int]:
+        """
+        Multi-row INSERT ... ON CONFLICT (email) DO NOTHING RETURNING id, email.
+        Returns email -> id for the rows actually inserted; emails already taken are
+        skipped rather than failing the batch.
+        """
+        insert = pg_insert if self.session.bind.dialect.name == "postgresql" else sqlite_insert
+        created: dict[str, int] = {}
+        for start in range(0, len(rows), chunk_size):
+            stmt = (
+                insert(User)
+                .values(list(rows[start:start + chunk_size]))
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User.id, User.email)
+            )
+            result = await self.session.execute(stmt)
+            created.update((email, user_id) for user_id, email in result.all())
+        return created
+
     async def set_role(self, user: User, role: UserRole) -> User:
         user.role = role
-        await self.session.flush()
-        await self.session.refresh(user)
-        return user
+        return await self._identity_changed(user)
 
     async def assign_pharmacy(self, user: User, pharmacy_id: int | None) -> User:
         user.pharmacy_id = pharmacy_id
-        await self.session.flush()
-        await self.session.refresh(user)
-        return user
+        return await self._identity_changed(user)
 
     async def assign_branch(self, user: User, branch_id: int | None) -> User:
         user.branch_id = branch_id
+        return await self._identity_changed(user)
+
+    async def _identity_changed(self, user: User) -> User:
+        """
+        Role/scope changed: revoke outstanding access tokens. The cached snapshot (and any
+        API keys the user issued, which are re-checked against the new scope) is only
+        dropped by invalidate_changed_principals, after the caller commits.
+        """
+        user.token_version = User.token_version + 1
         await self.session.flush()
         await self.session.refresh(user)
+        self.session.info.setdefault(_CHANGED_PRINCIPALS, set()).add(user.id)
         return user
 
+    async def invalidate_changed_principals(self) -> None:
+        """
+        Call right after commit. Invalidating any earlier lets a concurrent request reload
+        the still-committed old row and cache it again for the Redis TTL.
+        """
+        for user_id in self.session.info.pop(_CHANGED_PRINCIPALS, ()):
+            await invalidate_principal(user_id)
+            invalidate_api_keys_of_user(user_id)
+
+    async def replace_password_hashes(self, rehashes: Sequence[tuple[int, str, str]]) -> int:
+        """
+        Swap (user_id, old_hash, new_hash) in one executemany UPDATE. A row is only
+        touched if its hash is still old_hash, so a concurrent password change wins.
+        """
+        if not rehashes:
+            return 0
+        users = User.__table__
+        # Core table UPDATE so the parameter list runs as a plain executemany
+        stmt = (
+            update(users)
+            .where(users.c.id == bindparam("b_id"), users.c.hashed_password == bindparam("b_old"))
+            .values(hashed_password=bindparam("b_new"))
+        )
+        result = await self.session.execute(
+            stmt,
+            [{"b_id": user_id, "b_old": old, "b_new": new} for user_id, old, new in rehashes],
+        )
+        return result.rowcount
+
     async def list_by_role(self, role: UserRole) -> Sequence[User]:
         stmt = select(User).where(User.role == role)
         result = await self.session.execute(stmt)
@@ -14,7 +14,17 @@ from .branch import (
     BranchUpdate,
     BranchNearby,
 )
-from .drug import DrugBase, DrugCreate, DrugRead
+from .drug import (
+    DrugBase,
+    DrugCatalogueRead,
+    DrugCreate,
+    DrugRead,
+    DrugSuggestion,
+    DrugVariantLookup,
+    DrugVariantLookupBatch,
+    DrugVariantLookupResult,
+    VariantStock,
+)
 from .drug_variant import (
     DrugVariantBase,
     DrugVariantCreate,
@@ -28,7 +38,15 @@ from .pharmacy_request import (
     PharmacyRequestDecision,
     PharmacyRequestRead,
 )
-from .user import UserBase, UserCreate, UserRead
+from .user import (
+    StaffBulkCreate,
+    StaffBulkResult,
+    StaffCreate,
+    StaffRowResult,
+    UserBase,
+    UserCreate,
+    UserRead,
+)
 
 __all__ = [
     "AuditLogBase",
@@ -42,10 +60,15 @@ __all__ = [
     "BranchUpdate",
     "BranchNearby",
     "DrugBase",
+    "DrugCatalogueRead",
     "DrugCreate",
     "DrugRead",
+    "DrugSuggestion",
     "DrugVariantBase",
     "DrugVariantCreate",
+    "DrugVariantLookup",
+    "DrugVariantLookupBatch",
+    "DrugVariantLookupResult",
     "DrugVariantRead",
     "DrugVariantUpdate",
     "InventoryBase",
@@ -58,8 +81,13 @@ __all__ = [
     "PharmacyRequestCreate",
     "PharmacyRequestDecision",
     "PharmacyRequestRead",
+    "StaffBulkCreate",
+    "StaffBulkResult",
+    "StaffCreate",
+    "StaffRowResult",
     "UserBase",
     "UserCreate",
     "UserRead",
+    "VariantStock",
 ]
 
@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from pydantic import Field
+
+from app.models.user import UserRole
+from app.schemas import BaseSchema
+
+
+class ApiKeyCreate(BaseSchema):
+    name: str = Field(..., min_length=1, max_length=255)
+    branch_id: int | None = None
+    role: UserRole = UserRole.CASHIER
+
+
+class ApiKeyRead(BaseSchema):
+    id: int
+    name: str
+    prefix: str
+    role: UserRole
+    branch_id: int
+    user_id: int
+    is_active: bool
+    revoked_at: datetime | None = None
+    created_at: datetime
+
+
+class ApiKeyCreated(ApiKeyRead):
+    # Plaintext key; returned only once, it cannot be recovered later
+    key: str
@@ -1,6 +1,10 @@
 from datetime import datetime
+from typing import Literal
+
+from pydantic import Field
 
 from app.schemas import BaseSchema
+from app.schemas.drug_variant import DrugVariantRead
 
 
 class DrugBase(BaseSchema):
@@ -22,6 +26,35 @@ class DrugRead(DrugBase):
     updated_at: datetime
 
 
+class DrugCatalogueRead(DrugRead):
+    variants: list[DrugVariantRead] = []  # active variants only
+
+
+class DrugSuggestion(BaseSchema):
+    kind: Literal["drug", "variant"]
+    drug_id: int
+    variant_id: int | None = None
+    label: str
+    code: str  # drug code, or SKU for a variant
+
+
+class VariantStock(BaseSchema):
+    branch_id: int
+    quantity: int
+    reserved_quantity: int
+    available: int  # quantity - reserved_quantity
+
+
+class DrugVariantLookup(BaseSchema):
+    variant: DrugVariantRead
+    drug: DrugRead
+    stock: VariantStock | None = None  # at the caller's branch; None when the caller has none
+
 
+class DrugVariantLookupBatch(BaseSchema):
+    skus: list[str] = Field(..., min_length=1)
 
 
+class DrugVariantLookupResult(BaseSchema):
+    items: list[DrugVariantLookup]
+    missing: list[str]  # requested SKUs with no active variant
@@ -19,6 +19,7 @@ class InventoryRead(InventoryBase):
     model_config = {"from_attributes": True}
     
     id: int
+    reserved_quantity: int = 0
     created_at: datetime
     updated_at: datetime
     drug: dict | None = None  # Will be populated from relationship
@@ -98,4 +98,5 @@ class OrderListResponse(BaseModel):
     status: OrderStatus
     total_amount: float
     created_at: datetime
-    items_count: int
\ No newline at end of file
+    items_count: int
+    units_count: int = 0
\ No newline at end of file
@@ -1,6 +1,8 @@
 from datetime import datetime
 
-from pydantic import EmailStr
+from typing import Literal
+
+from pydantic import EmailStr, Field
 
 from app.models.user import UserRole
 from app.schemas import BaseSchema
@@ -25,15 +27,28 @@ class UserRead(UserBase):
     updated_at: datetime
 
 
+class StaffCreate(BaseSchema):
+    email: EmailStr
+    password: str = Field(..., min_length=6)
+    full_name: str | None = None
+    role: Literal[UserRole.BRANCH_ADMIN, UserRole.CASHIER] = UserRole.CASHIER
+    branch_id: int
 
 
+class StaffBulkCreate(BaseSchema):
+    users: list[StaffCreate] = Field(..., min_length=1)
 
 
+class StaffRowResult(BaseSchema):
+    index: int
+    email: EmailStr
+    # created | exists (email already registered) | duplicate (repeated in this batch) | invalid_branch
+    status: str
+    user_id: int | None = None
 
 
-
-
-
-
-
+class StaffBulkResult(BaseSchema):
+    created: int
+    skipped: int
+    results: list[StaffRowResult]
 
@@ -0,0 +1,88 @@
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.api_keys import generate_api_key, hash_api_key, invalidate_api_key
+from app.core.principal import Principal
+from app.models import ApiKey, UserRole
+from app.repositories.api_key import ApiKeyRepository
+from app.repositories.branch import BranchRepository
+
+# Roles a terminal key may carry, by the role of whoever issues it
+_ISSUABLE_ROLES = {
+    UserRole.SUPERADMIN: {UserRole.CASHIER, UserRole.BRANCH_ADMIN},
+    UserRole.OPERATOR: {UserRole.CASHIER, UserRole.BRANCH_ADMIN},
+    UserRole.PHARMACY_ADMIN: {UserRole.CASHIER, UserRole.BRANCH_ADMIN},
+    UserRole.BRANCH_ADMIN: {UserRole.CASHIER},
+}
+
+
+class ApiKeyService:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self.api_key_repo = ApiKeyRepository(session)
+        self.branch_repo = BranchRepository(session)
+
+    async def create_key(
+        self,
+        current_user: Principal,
+        *,
+        name: str,
+        branch_id: int | None,
+        role: UserRole,
+    ) -> tuple[ApiKey, str]:
+        """Issue a key bound to a branch and role; returns the row and the plaintext key"""
+        if role not in _ISSUABLE_ROLES.get(current_user.role, set()):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot issue a key with this role")
+
+        branch_id = branch_id or current_user.branch_id
+        if branch_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Branch context required")
+        await self._check_branch_access(current_user, branch_id)
+
+        key = generate_api_key()
+        api_key = await self.api_key_repo.create(
+            name=name,
+            key_hash=hash_api_key(key),
+            prefix=key[:8],
+            role=role,
+            branch_id=branch_id,
+            user_id=current_user.id,
+        )
+        await self.session.commit()
+        return api_key, key
+
+    async def list_keys(self, current_user: Principal) -> list[ApiKey]:
+        if current_user.role in (UserRole.SUPERADMIN, UserRole.OPERATOR):
+            keys = await self.api_key_repo.list_keys()
+        elif current_user.role == UserRole.PHARMACY_ADMIN and current_user.pharmacy_id:
+            keys = await self.api_key_repo.list_keys(pharmacy_id=current_user.pharmacy_id)
+        elif current_user.role == UserRole.BRANCH_ADMIN and current_user.branch_id:
+            keys = await self.api_key_repo.list_keys(branch_id=current_user.branch_id)
+        else:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions")
+        return list(keys)
+
+    async def revoke_key(self, current_user: Principal, api_key_id: int) -> ApiKey:
+        api_key = await self.api_key_repo.get_by_id(api_key_id)
+        if api_key is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API key not found")
+        await self._check_branch_access(current_user, api_key.branch_id)
+
+        if api_key.is_active:
+            await self.api_key_repo.revoke(api_key)
+            await self.session.commit()
+            invalidate_api_key(api_key.key_hash)
+        return api_key
+
+    async def _check_branch_access(self, current_user: Principal, branch_id: int) -> None:
+        branch = await self.branch_repo.get_by_id(branch_id)
+        if branch is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Branch not found")
+
+        if current_user.role in (UserRole.SUPERADMIN, UserRole.OPERATOR):
+            return
+        if current_user.role == UserRole.PHARMACY_ADMIN and branch.pharmacy_id == current_user.pharmacy_id:
+            return
+        if current_user.role == UserRole.BRANCH_ADMIN and branch.id == current_user.branch_id:
+            return
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot manage keys of another branch")
@@ -1,15 +1,45 @@
+import hashlib
+import time
+
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.principal import Principal
+from app.core.principal_cache import get_principal
+from app.core.rate_limit import SlidingWindowLimiter
+from app.core.refresh_tokens import consume_refresh_token, is_family_revoked, revoke_family
 from app.core.security import (
     create_access_token,
     create_refresh_token,
-    get_password_hash,
-    verify_password,
+    decode_token,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
 )
 from app.models import User
 from app.repositories.user import UserRepository
 from app.schemas.auth import LoginRequest, RegisterRequest
+from app.services.password_rehash import schedule_rehash
+
+
+_login_by_email = SlidingWindowLimiter(
+    "login:email", settings.login_rate_limit_per_email, settings.login_rate_limit_window_seconds
+)
+_login_by_ip = SlidingWindowLimiter(
+    "login:ip", settings.login_rate_limit_per_ip, settings.login_rate_limit_window_seconds
+)
+_login_admitted = metrics.counter("login_attempts_admitted_total", "Login attempts that reached password verification")
+_login_throttled = metrics.counter("login_attempts_throttled_total", "Login attempts rejected by the email/IP rate limit")
+_refresh_rotated = metrics.counter("refresh_rotations_total", "Refresh tokens exchanged for a new pair")
+_refresh_reused = metrics.counter(
+    "refresh_reuse_detected_total", "Already-used refresh tokens presented again; their family is revoked"
+)
+_login_shed = metrics.counter("login_attempts_shed_total", "Login attempts rejected because the worker was saturated")
+
+# Logins in this worker currently waiting for or running bcrypt
+_verifications_in_progress = 0
 
 
 class AuthService:
@@ -22,7 +52,7 @@ class AuthService:
         if existing:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-        hashed_password = get_password_hash(data.password)
+        hashed_password = await get_password_hash_async(data.password)
         user = await self.user_repo.create(
             email=data.email,
             hashed_password=hashed_password,
@@ -32,16 +62,101 @@ class AuthService:
         await self.session.refresh(user)
         return user
 
-    async def authenticate(self, data: LoginRequest) -> tuple[str, str]:
+    async def authenticate(self, data: LoginRequest, client_ip: str | None = None) -> tuple[str, str]:
+        # Throttle before any database or bcrypt work: per account and per client address
+        admitted = await _login_by_email.hit(data.email.lower())
+        if admitted and client_ip:
+            admitted = await _login_by_ip.hit(client_ip)
+        if not admitted:
+            _login_throttled.inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts, try again later",
+                headers={"Retry-After": str(settings.login_rate_limit_window_seconds)},
+            )
+
         user = await self.user_repo.get_by_email(data.email)
-        if user is None or not verify_password(data.password, user.hashed_password):
+        if user is None or not await self._verify_password(data.password, user.hashed_password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         if not user.is_active:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
-        access = create_access_token(user.id)
-        refresh = create_refresh_token(user.id)
+        await self._upgrade_hash(user, data.password)
+        return self.issue_tokens(user)
+
+    @staticmethod
+    async def _upgrade_hash(user: User, password: str) -> None:
+        """Re-hash at the current work factor while the plaintext is at hand; stored in the background"""
+        if not password_needs_rehash(user.hashed_password):
+            return
+        try:
+            new_hash = await get_password_hash_async(password)
+        except HTTPException:
+            # Hasher is saturated: the login still succeeds, the upgrade waits for the next one
+            return
+        schedule_rehash(user.id, user.hashed_password, new_hash)
+
+    @staticmethod
+    async def _verify_password(password: str, hashed_password: str) -> bool:
+        """bcrypt check with a per-worker cap, so a login burst cannot take every CPU slot"""
+        global _verifications_in_progress
+        if _verifications_in_progress >= settings.login_max_concurrent_verifications:
+            _login_shed.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        _login_admitted.inc()
+        _verifications_in_progress += 1
+        try:
+            return await verify_password_async(password, hashed_password)
+        finally:
+            _verifications_in_progress -= 1
+
+    @staticmethod
+    def issue_tokens(user: User | Principal, family: str | None = None) -> tuple[str, str]:
+        """Access token carries the user's role/scope claims; refresh token only the subject"""
+        principal = user if isinstance(user, Principal) else Principal.from_user(user)
+        access = create_access_token(principal.id, claims=principal.to_claims())
+        refresh = create_refresh_token(principal.id, family)
         return access, refresh
 
+    async def rotate_refresh_token(self, refresh_token: str) -> tuple[str, str]:
+        """
+        Exchange a refresh token for a new pair. Each refresh token works once; presenting
+        a used one again revokes its whole family, so a stolen token and the session it
+        was stolen from are both logged out.
+        """
+        invalid = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        try:
+            token_data = decode_token(refresh_token)
+        except Exception as exc:  # noqa: BLE001
+            raise invalid from exc
+
+        user_id = token_data.get("sub")
+        if token_data.get("type") != "refresh" or user_id is None:
+            raise invalid
+
+        # Tokens issued before rotation have no jti/fam: their digest stands in for both
+        jti = token_data.get("jti") or hashlib.sha256(refresh_token.encode("utf-8")).hexdigest()
+        family = token_data.get("fam") or jti
+        expires_at = float(token_data["exp"])
+
+        if await is_family_revoked(family):
+            raise invalid
+        if not await consume_refresh_token(jti, expires_at):
+            _refresh_reused.inc()
+            await revoke_family(family, time.time() + settings.refresh_token_expire_minutes * 60)
+            raise invalid
+
+        principal = await get_principal(int(user_id), self.user_repo.get_principal)
+        if principal is None or not principal.is_active:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+        _refresh_rotated.inc()
+        return self.issue_tokens(principal, family)
+
     async def get_user_by_id(self, user_id: int) -> User | None:
         return await self.user_repo.get_by_id(user_id)
 
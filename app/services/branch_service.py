@@ -60,6 +60,7 @@ class BranchService:
         await self.user_repo.set_role(user, UserRole.BRANCH_ADMIN)
         await self.user_repo.assign_branch(user, branch.id)
         await self.session.commit()
+        await self.user_repo.invalidate_changed_principals()
         await self.session.refresh(branch)
         return branch
 
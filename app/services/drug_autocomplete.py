@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager, suppress
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.prefix_index import PrefixIndex
+from app.core.text import normalize_search_text
+from app.db import AsyncSessionLocal
+from app.models import Drug, DrugVariant
+from app.repositories.drug import DrugRepository
+
+logger = logging.getLogger(__name__)
+
+_index_entries = metrics.gauge("drug_autocomplete_entries", "Drugs and variants in the autocomplete index")
+_index_build_seconds = metrics.gauge("drug_autocomplete_build_seconds", "Duration of the last autocomplete index build")
+
+
+def _word_keys(*values: str) -> list[str]:
+    """The full text plus every suffix starting at a word, so "500" finds "Paracetamol 500mg" """
+    keys = []
+    for value in values:
+        words = normalize_search_text(value).split()
+        keys.extend(" ".join(words[i:]) for i in range(len(words)))
+    return keys
+
+
+class DrugAutocomplete:
+    """
+    Popularity-weighted completion over drug names/codes and variant names/SKUs,
+    held in process. Built from the database at startup and on an interval, and
+    patched in place by the drug and variant services when they write.
+    """
+
+    def __init__(self) -> None:
+        self._index: PrefixIndex | None = None
+        self._suggestions: dict[tuple[str, int], dict[str, Any]] = {}
+        self._weights: dict[tuple[str, int], float] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def complete(self, prefix: str, limit: int) -> list[dict[str, Any]]:
+        if self._index is None:
+            return []
+        return [self._suggestions[entry] for entry in self._index.complete(normalize_search_text(prefix), limit)]
+
+    async def rebuild(self) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with AsyncSessionLocal() as session:
+            drugs, variants, sold = await DrugRepository(session).list_completion_sources()
+
+        drug_sales: dict[int, int] = defaultdict(int)
+        for (drug_id, _), quantity in sold.items():
+            drug_sales[drug_id] += quantity
+
+        suggestions: dict[tuple[str, int], dict[str, Any]] = {}
+        weights: dict[tuple[str, int], float] = {}
+        entries: list[tuple[tuple[str, int], list[str], float]] = []
+        for row in drugs:
+            entry, suggestion, keys = self._drug_entry(row.id, row.name, row.code)
+            weights[entry] = drug_sales.get(row.id, 0)
+            suggestions[entry] = suggestion
+            entries.append((entry, keys, weights[entry]))
+        for row in variants:
+            entry, suggestion, keys = self._variant_entry(row.id, row.drug_id, row.name, row.sku, row.drug_name)
+            weights[entry] = sold.get((row.drug_id, row.id), 0)
+            suggestions[entry] = suggestion
+            entries.append((entry, keys, weights[entry]))
+
+        # About a second per 100k entries of pure Python: keep it off the event loop
+        index = await asyncio.to_thread(PrefixIndex.build, entries, settings.drug_autocomplete_max_limit)
+        self._index, self._suggestions, self._weights = index, suggestions, weights
+        _index_entries.set(len(index))
+        _index_build_seconds.set(loop.time() - started)
+
+    def upsert_drug(self, drug: Drug) -> None:
+        if not drug.is_active:
+            self._remove(("drug", drug.id))
+            return
+        self._add(*self._drug_entry(drug.id, drug.name, drug.code))
+
+    def upsert_variant(self, variant: DrugVariant, drug_name: str) -> None:
+        if not variant.is_active:
+            self._remove(("variant", variant.id))
+            return
+        self._add(*self._variant_entry(variant.id, variant.drug_id, variant.name, variant.sku, drug_name))
+
+    def remove_variant(self, variant_id: int) -> None:
+        self._remove(("variant", variant_id))
+
+    def _add(self, entry: tuple[str, int], suggestion: dict[str, Any], keys: Iterable[str]) -> None:
+        if self._index is None:
+            return
+        self._suggestions[entry] = suggestion
+        self._index.add(entry, keys, self._weights.setdefault(entry, 0))
+        _index_entries.set(len(self._index))
+
+    def _remove(self, entry: tuple[str, int]) -> None:
+        if self._index is None:
+            return
+        self._index.remove(entry)
+        self._suggestions.pop(entry, None)
+        _index_entries.set(len(self._index))
+
+    @staticmethod
+    def _drug_entry(drug_id: int, name: str, code: str):
+        suggestion = {"kind": "drug", "drug_id": drug_id, "variant_id": None, "label": name, "code": code}
+        return ("drug", drug_id), suggestion, [*_word_keys(name), normalize_search_text(code)]
+
+    @staticmethod
+    def _variant_entry(variant_id: int, drug_id: int, name: str, sku: str, drug_name: str):
+        label = f"{drug_name} {name}"
+        suggestion = {"kind": "variant", "drug_id": drug_id, "variant_id": variant_id, "label": label, "code": sku}
+        return ("variant", variant_id), suggestion, [*_word_keys(label), normalize_search_text(sku)]
+
+
+drug_autocomplete = DrugAutocomplete()
+
+
+async def _run_refresher(interval_seconds: int) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await drug_autocomplete.rebuild()
+        except Exception:  # noqa: BLE001
+            logger.exception("Drug autocomplete rebuild failed")
+
+
+@asynccontextmanager
+async def lifespan_drug_autocomplete() -> AsyncIterator[None]:
+    try:
+        await drug_autocomplete.rebuild()
+    except Exception:  # noqa: BLE001
+        # /drugs/autocomplete falls back to the search query until the next rebuild
+        logger.exception("Drug autocomplete build failed")
+
+    if settings.drug_autocomplete_refresh_seconds <= 0:
+        yield
+        return
+    task = asyncio.create_task(_run_refresher(settings.drug_autocomplete_refresh_seconds))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
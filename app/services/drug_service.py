@@ -1,7 +1,15 @@
+from collections.abc import Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.versioning import catalogue_version
 from app.models import Drug
 from app.repositories.drug import DrugRepository
+from app.services.drug_autocomplete import drug_autocomplete
+from app.services.variant_lookup import variant_lookup
 
 
 class DrugService:
@@ -24,15 +32,103 @@ class DrugService:
         )
         await self.session.commit()
         await self.session.refresh(drug)
+        drug_autocomplete.upsert_drug(drug)
+        variant_lookup.note_write(await catalogue_version.bump())
         return drug
 
-    async def list_drugs(self, *, is_active: bool | None = None, search: str | None = None) -> list[Drug]:
-        drugs = await self.drug_repo.list(is_active=is_active, search=search)
+    async def list_drugs(
+        self,
+        *,
+        limit: int,
+        cursor: str | None = None,
+        is_active: bool | None = None,
+        search: str | None = None,
+    ) -> Sequence[Row]:
+        """One page of the catalogue ordered by (name, id); see next_cursor for the following one"""
+        return await self.drug_repo.list(
+            limit=limit, after=self._keyset(cursor), is_active=is_active, search=search
+        )
+
+    async def list_catalogue(
+        self,
+        *,
+        limit: int,
+        cursor: str | None = None,
+        is_active: bool | None = None,
+        search: str | None = None,
+    ) -> list[Drug]:
+        """Same pages as list_drugs, each drug with its active variants"""
+        drugs = await self.drug_repo.list_with_variants(
+            limit=limit, after=self._keyset(cursor), is_active=is_active, search=search
+        )
+        return list(drugs)
+
+    @staticmethod
+    def next_cursor(drugs: Sequence[Row | Drug], limit: int) -> str | None:
+        """Opaque cursor for the page after this one, or None when this is the last page"""
+        if len(drugs) < limit:
+            return None
+        return encode_cursor({"name": drugs[-1].name, "id": drugs[-1].id})
+
+    async def search_drugs(
+        self,
+        query: str,
+        *,
+        limit: int,
+        offset: int = 0,
+        is_active: bool | None = None,
+    ) -> list[Drug]:
+        drugs = await self.drug_repo.search(query, limit=limit, offset=offset, is_active=is_active)
         return list(drugs)
 
+    def search_offset(self, cursor: str | None, offset: int) -> int:
+        """Ranked results have no stable keyset, so a search cursor carries the offset"""
+        if not cursor:
+            return offset
+        try:
+            offset = int(self._decode_cursor(cursor)["offset"])
+        except (KeyError, TypeError, ValueError):
+            raise self._invalid_cursor()
+        if offset < 0:
+            raise self._invalid_cursor()
+        return offset
+
+    @staticmethod
+    def next_search_cursor(drugs: list[Drug], limit: int, offset: int) -> str | None:
+        if len(drugs) < limit:
+            return None
+        return encode_cursor({"offset": offset + limit})
+
+    async def autocomplete(self, query: str, *, limit: int) -> list[dict]:
+        """Served from the in-process index; falls back to search until it is built"""
+        if drug_autocomplete.ready:
+            return drug_autocomplete.complete(query, limit)
+        return [
+            {"kind": "drug", "drug_id": drug.id, "variant_id": None, "label": drug.name, "code": drug.code}
+            for drug in await self.drug_repo.search(query, limit=limit, is_active=True)
+        ]
+
     async def get_drug(self, drug_id: int) -> Drug | None:
         return await self.drug_repo.get_by_id(drug_id)
 
+    def _keyset(self, cursor: str | None) -> tuple[str, int] | None:
+        if not cursor:
+            return None
+        values = self._decode_cursor(cursor)
+        try:
+            return str(values["name"]), int(values["id"])
+        except (KeyError, TypeError, ValueError):
+            raise self._invalid_cursor()
+
+    def _decode_cursor(self, cursor: str) -> dict:
+        try:
+            return decode_cursor(cursor)
+        except ValueError:
+            raise self._invalid_cursor()
+
+    @staticmethod
+    def _invalid_cursor() -> HTTPException:
+        return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
 
 
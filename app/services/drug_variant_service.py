@@ -1,9 +1,14 @@
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.versioning import catalogue_version
 from app.models import Drug, DrugVariant
 from app.repositories.drug import DrugRepository
 from app.repositories.drug_variant import DrugVariantRepository
+from app.repositories.inventory import InventoryRepository
+from app.services.drug_autocomplete import drug_autocomplete
+from app.services.variant_lookup import variant_lookup
 
 
 class DrugVariantService:
@@ -11,6 +16,7 @@ class DrugVariantService:
         self.session = session
         self.variant_repo = DrugVariantRepository(session)
         self.drug_repo = DrugRepository(session)
+        self.inventory_repo = InventoryRepository(session)
 
     async def create_variant(
         self,
@@ -30,6 +36,8 @@ class DrugVariantService:
         )
         await self.session.commit()
         await self.session.refresh(variant)
+        drug_autocomplete.upsert_variant(variant, drug.name)
+        variant_lookup.upsert_variant(variant, drug, await catalogue_version.bump())
         return variant
 
     async def list_variants_by_drug(self, drug_id: int) -> list[DrugVariant]:
@@ -52,11 +60,16 @@ class DrugVariantService:
         if variant is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Variant not found")
 
+        previous_sku = variant.sku
         variant = await self.variant_repo.update(
             variant, name=name, sku=sku, price=price, is_active=is_active
         )
         await self.session.commit()
         await self.session.refresh(variant)
+        drug = await self.drug_repo.get_by_id(variant.drug_id)
+        if drug is not None:
+            drug_autocomplete.upsert_variant(variant, drug.name)
+        variant_lookup.upsert_variant(variant, drug, await catalogue_version.bump(), previous_sku=previous_sku)
         return variant
 
     async def delete_variant(self, variant_id: int) -> None:
@@ -65,4 +78,46 @@ class DrugVariantService:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Variant not found")
         await self.variant_repo.delete(variant)
         await self.session.commit()
+        drug_autocomplete.remove_variant(variant_id)
+        variant_lookup.remove_variant(variant.sku, await catalogue_version.bump())
+
+    async def lookup_by_skus(self, skus: list[str], *, branch_id: int | None) -> dict:
+        """
+        Active variants by SKU with their drug and, for a caller attached to a branch, its
+        stock there. Variants and drugs come from the in-process map when it is current;
+        SKUs it does not have are read from the unique sku index. Stock is always read live.
+        """
+        if len(skus) > settings.drug_sku_batch_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {settings.drug_sku_batch_max_items} SKUs per request"
+            )
+        skus = list(dict.fromkeys(sku.strip() for sku in skus))
+        found = await variant_lookup.get(skus) or {}
+        # The map only knows writes made through this service; anything it lacks is
+        # looked up in the sku index before it is reported missing
+        unresolved = [sku for sku in skus if sku not in found]
+        if unresolved:
+            variants, drugs = await self.drug_repo.list_variant_lookup_sources(unresolved)
+            drugs_by_id = {drug.id: drug for drug in drugs}
+            found.update((variant.sku, (variant, drugs_by_id[variant.drug_id])) for variant in variants)
+
+        stock = {}
+        if branch_id is not None:
+            stock = await self.inventory_repo.get_variant_stock(branch_id, [variant.id for variant, _ in found.values()])
+
+        items = []
+        for variant, drug in found.values():
+            item = {"variant": variant, "drug": drug, "stock": None}
+            if branch_id is not None:
+                row = stock.get(variant.id)
+                quantity, reserved = (row.quantity, row.reserved_quantity) if row is not None else (0, 0)
+                item["stock"] = {
+                    "branch_id": branch_id,
+                    "quantity": quantity,
+                    "reserved_quantity": reserved,
+                    "available": max(quantity - reserved, 0),
+                }
+            items.append(item)
+        return {"items": items, "missing": [sku for sku in skus if sku not in found]}
 
@@ -62,9 +62,17 @@ class InventoryService:
         inventory = await self.inventory_repo.get_by_id(inventory_id)
         if inventory is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Inventory not found")
-        inventory = await self.inventory_repo.update_stock(
+        updated = await self.inventory_repo.update_stock(
             inventory, quantity=quantity, reorder_level=reorder_level
         )
+        if updated is None:
+            await self.session.rollback()
+            await self.session.refresh(inventory)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Quantity cannot be below the {inventory.reserved_quantity} units reserved by pending orders",
+            )
+        inventory = updated
         await self.session.commit()
         await self.session.refresh(inventory)
         return inventory
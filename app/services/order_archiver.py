@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.services.orders import OrderService
+
+logger = logging.getLogger(__name__)
+
+
+async def archive_finished_orders(batch_size: int | None = None) -> int:
+    """Move every finished order past the archive horizon in bulk batches; returns the total moved."""
+    batch_size = batch_size or settings.order_archive_batch_size
+    before = datetime.now(timezone.utc) - timedelta(days=settings.order_archive_after_days)
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            archived = await OrderService(session).archive_old_orders(before, batch_size)
+        total += archived
+        if archived < batch_size:
+            return total
+
+
+async def _run_archiver(interval_seconds: int) -> None:
+    while True:
+        try:
+            archived = await archive_finished_orders()
+            if archived:
+                logger.info("Archived %s finished orders", archived)
+        except Exception:  # noqa: BLE001
+            logger.exception("Order archival failed")
+        await asyncio.sleep(interval_seconds)
+
+
+@asynccontextmanager
+async def lifespan_order_archiver() -> AsyncIterator[None]:
+    if settings.order_archive_after_days <= 0 or settings.order_archive_interval_seconds <= 0:
+        yield
+        return
+
+    task = asyncio.create_task(_run_archiver(settings.order_archive_interval_seconds))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
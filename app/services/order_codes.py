@@ -0,0 +1,77 @@
+import secrets
+import string
+
+from app.core.bloom import BloomFilter
+
+
+BARCODE_LENGTH = 12
+
+# A-Z map to 10..35 so letters and digits share one weighted checksum
+_CHAR_VALUES = {char: value for value, char in enumerate(string.digits + string.ascii_uppercase)}
+
+
+def barcode_check_digit(body: str) -> str:
+    """
+    Weighted mod-10 check digit (EAN-style 3/1 weights) over an 11-character barcode body.
+    Catches single-character typos and most adjacent swaps at the till.
+    """
+    total = sum(
+        _CHAR_VALUES[char] * (3 if index % 2 == 0 else 1)
+        for index, char in enumerate(body)
+    )
+    return str((10 - total % 10) % 10)
+
+
+def is_valid_barcode(barcode: str) -> bool:
+    """
+    Check barcode shape: 3 letters + 9 digits. Codes issued before BarcodeAllocator have
+    the same shape but no check digit, so a failed check digit is not a rejection; the
+    lookup decides whether such a code exists.
+    """
+    if len(barcode) != BARCODE_LENGTH:
+        return False
+    letters, digits = barcode[:3], barcode[3:]
+    return all(char in string.ascii_uppercase for char in letters) and digits.isdigit()
+
+
+class BarcodeAllocator:
+    """
+    Issues order barcodes without asking the database whether they are taken.
+
+    Codes are random (3 letters + 8 digits + check digit, ~1.7e12 values), so a clash
+    with an existing order is left to the unique index and an insert retry. An
+    in-process Bloom filter of recently issued codes stops this worker from handing
+    out the same code twice in a row; it is reset once it reaches capacity.
+    """
+
+    def __init__(self, recent_capacity: int = 100_000, max_attempts: int = 10) -> None:
+        self.recent_capacity = recent_capacity
+        self.max_attempts = max_attempts
+        self._recent = BloomFilter(recent_capacity)
+
+    @staticmethod
+    def generate() -> str:
+        letters = ''.join(secrets.choice(string.ascii_uppercase) for _ in range(3))
+        digits = ''.join(secrets.choice(string.digits) for _ in range(8))
+        body = f"{letters}{digits}"
+        return f"{body}{barcode_check_digit(body)}"
+
+    def allocate(self) -> str:
+        barcode = self.generate()
+        for _ in range(self.max_attempts - 1):
+            if barcode not in self._recent:
+                break
+            barcode = self.generate()
+
+        if self._recent.is_full:
+            self._recent = BloomFilter(self.recent_capacity)
+        self._recent.add(barcode)
+        return barcode
+
+
+def format_order_number(branch_id: int, business_day, sequence: int) -> str:
+    """Human-readable order number, e.g. 12-261017-0042 (branch, yymmdd, daily sequence)"""
+    return f"{branch_id}-{business_day:%y%m%d}-{sequence:04d}"
+
+
+barcode_allocator = BarcodeAllocator()
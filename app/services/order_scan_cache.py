@@ -0,0 +1,28 @@
+from typing import Any
+
+from app.core.cache import cache_delete, cache_get_json, cache_set_json
+from app.core.config import settings
+
+KEY_PREFIX = "order:scan:"
+
+# Entries outlive the reservation a little; an expired order is cancelled by the sweeper
+# and its scan is rejected by the status guard even if a stale entry is still cached.
+_GRACE_SECONDS = 300
+
+
+def _key(barcode: str) -> str:
+    return f"{KEY_PREFIX}{barcode}"
+
+
+async def get_scan_payload(barcode: str) -> dict[str, Any] | None:
+    """Compact pending-order payload for the cashier scan, or None on miss / Redis outage"""
+    return await cache_get_json(_key(barcode))
+
+
+async def store_scan_payload(payload: dict[str, Any]) -> None:
+    ttl = settings.order_reservation_ttl_minutes * 60 + _GRACE_SECONDS
+    await cache_set_json(_key(payload["barcode"]), payload, ttl)
+
+
+async def invalidate_scan_payloads(*barcodes: str) -> None:
+    await cache_delete(*(_key(barcode) for barcode in barcodes))
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.services.orders import OrderService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Job:
+    kind: str
+    args: tuple
+    future: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class OrderBatchWriter:
+    """
+    Coalesces concurrent order creates and scans into set-based batches.
+
+    Writes submitted within `window_ms` of the first waiting one (up to `max_batch`)
+    go to OrderService.write_batch together: one transaction, one stock UPDATE,
+    multi-row inserts and a single COMMIT. Each caller gets its own response or
+    exception; a rejected order does not fail the others.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        window_ms: float,
+        max_batch: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.window_seconds = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue[_Job] | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def submit(self, kind: str, *args: Any) -> Any:
+        if not self.running or self._queue is None:
+            raise RuntimeError("Order batch writer is not running")
+        job = _Job(kind, args)
+        await self._queue.put(job)
+        return await job.future
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        # Anything still queued never reached the database
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.set_exception(RuntimeError("Order batch writer stopped"))
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            jobs = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.window_seconds
+            while len(jobs) < self.max_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    jobs.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._execute(jobs)
+            except asyncio.CancelledError:
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(RuntimeError("Order batch writer stopped"))
+                raise
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Order write batch failed")
+                for job in jobs:
+                    if not job.future.done():
+                        job.future.set_exception(exc)
+
+    async def _execute(self, jobs: list[_Job]) -> None:
+        # Callers that already gave up (client disconnected) are not written
+        jobs = [job for job in jobs if not job.future.done()]
+        if not jobs:
+            return
+        async with self.session_factory() as session:
+            outcomes = await OrderService(session).write_batch([(job.kind, job.args) for job in jobs])
+
+        for job, outcome in zip(jobs, outcomes):
+            if job.future.done():
+                continue
+            if isinstance(outcome, BaseException):
+                job.future.set_exception(outcome)
+            else:
+                job.future.set_result(outcome)
+
+
+# Shared by every request in this worker; only started when batched writes are enabled
+order_batch_writer = OrderBatchWriter(
+    AsyncSessionLocal,
+    window_ms=settings.order_batch_window_ms,
+    max_batch=settings.order_batch_max_size,
+)
+
+
+@asynccontextmanager
+async def lifespan_order_batch_writer() -> AsyncIterator[None]:
+    if not settings.order_batch_writes_enabled:
+        yield
+        return
+
+    order_batch_writer.start()
+    try:
+        yield
+    finally:
+        await order_batch_writer.stop()
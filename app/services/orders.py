@@ -1,14 +1,26 @@
-from datetime import datetime, timezone
-from typing import List
-import secrets
-import string
-
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Awaitable, Callable, List
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
 from app.repositories.orders import OrderRepository
+from app.services.order_codes import barcode_allocator, format_order_number, is_valid_barcode
+from app.services.order_scan_cache import (
+    get_scan_payload,
+    invalidate_scan_payloads,
+    store_scan_payload
+)
 from app.models.orders import Order, OrderItem, OrderStatus
-from app.models import User, UserRole
+from app.core.principal import Principal
+from app.models import UserRole
 from app.schemas.orders import (
     OrderCreate, 
     OrderResponse, 
@@ -18,58 +30,185 @@ from app.schemas.orders import (
     OrderItemResponse
 )
 
+CREATE = "create"
+SCAN = "scan"
+
+
+class _BatchConflict(Exception):
+    """A batched order write no longer matches the database; its jobs run one by one"""
+
 
 class OrderService:
     def __init__(self, session: AsyncSession):
         self.session = session
         self.repository = OrderRepository(session)
+        self._after_commit: List[Callable[[], Awaitable[None]]] = []
 
-    @staticmethod
-    def generate_barcode(length: int = 12) -> str:
+    MAX_BARCODE_ATTEMPTS = 5
+    MAX_LOCK_RETRIES = 10
+
+    async def create_order(
+        self, 
+        order_data: OrderCreate, 
+        user_id: int
+    ) -> OrderCreateResponse:
+        """
+        Create a new order.
+        Barcodes are not probed for existence up front; in the rare case the unique
+        index rejects one, the order's writes are rolled back and retried.
+        With batched order writes enabled, the order is written together with other
+        concurrent creates and scans.
+        """
+        from app.services.order_writer import order_batch_writer
+
+        if order_batch_writer.running:
+            return await order_batch_writer.submit(CREATE, order_data, user_id)
+        return await self._write(OrderService._create_order, order_data, user_id)
+
+    async def scan_order(self, barcode: str) -> OrderScanResponse:
+        """Scan and confirm order (cashier only)"""
+        from app.services.order_writer import order_batch_writer
+
+        if order_batch_writer.running:
+            return await order_batch_writer.submit(SCAN, barcode)
+        return await self._write(OrderService._scan_order, barcode)
+
+    async def _write(self, method, *args):
         """
-        Generate cryptographically secure barcode
-        Format: 3 letters + 9 digits (e.g., ABC123456789)
+        Run an order write method and commit it, retrying on a barcode clash and when the
+        database aborted the transaction over lock contention (nothing of it was kept).
+        Post-commit work (scan cache updates) only runs once the write is durable.
         """
-        letters = ''.join(secrets.choice(string.ascii_uppercase) for _ in range(3))
-        digits = ''.join(secrets.choice(string.digits) for _ in range(9))
-        return f"{letters}{digits}"
-
-    async def generate_unique_barcode(self) -> str:
-        """Generate unique barcode with collision handling"""
-        max_attempts = 20
-        for attempt in range(max_attempts):
-            barcode = self.generate_barcode()
-            if not await self.repository.check_barcode_exists(barcode):
-                return barcode
-        
-        raise HTTPException(
+        barcode_attempts = 0
+        lock_retries = 0
+        while True:
+            self._after_commit = []
+            try:
+                result = await method(self, *args)
+                await self.session.commit()
+            except IntegrityError as exc:
+                await self.session.rollback()
+                if not self._is_barcode_conflict(exc):
+                    raise
+                barcode_attempts += 1
+                if barcode_attempts >= self.MAX_BARCODE_ATTEMPTS:
+                    raise self._barcode_exhausted()
+                continue
+            except DBAPIError as exc:
+                await self.session.rollback()
+                if not self._is_lock_conflict(exc) or lock_retries >= self.MAX_LOCK_RETRIES:
+                    raise
+                lock_retries += 1
+                await asyncio.sleep(random.uniform(0, 0.005 * lock_retries))
+                continue
+            except Exception:
+                await self.session.rollback()
+                raise
+
+            await self._run_after_commit()
+            return result
+
+    async def _run_after_commit(self) -> None:
+        for callback in self._after_commit:
+            await callback()
+        self._after_commit = []
+
+    @staticmethod
+    def _is_barcode_conflict(exc: IntegrityError) -> bool:
+        return "barcode" in str(exc.orig)
+
+    @staticmethod
+    def _is_lock_conflict(exc: DBAPIError) -> bool:
+        """Deadlock / serialization abort (PostgreSQL) or a busy database (SQLite)"""
+        sqlstate = getattr(exc.orig, "sqlstate", None)
+        return sqlstate in ("40001", "40P01") or "database is locked" in str(exc.orig)
+
+    @staticmethod
+    def _barcode_exhausted() -> HTTPException:
+        return HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate unique barcode after multiple attempts"
         )
 
-    async def create_order(
-        self, 
-        order_data: OrderCreate, 
+    async def _create_order(
+        self,
+        order_data: OrderCreate,
         user_id: int
     ) -> OrderCreateResponse:
-        """Create a new order"""
-        
-        # 1. Validate branch exists
+        # 1-2. Validate the branch exists and the cart is not empty
         branch = await self.repository.get_branch_by_id(order_data.branch_id)
+        self._check_order(order_data, branch)
+
+        # 3. Load drugs, variants and branch inventories for the whole cart at once
+        drugs = await self.repository.get_drugs_by_ids(item.drug_id for item in order_data.items)
+        variants = await self.repository.get_variants_by_ids(
+            item.drug_variant_id for item in order_data.items if item.drug_variant_id
+        )
+        inventories = await self.repository.get_inventories_for_items(
+            order_data.branch_id,
+            ((item.drug_id, item.drug_variant_id) for item in order_data.items)
+        )
+
+        # 4. Validate items, check inventory, and calculate totals in memory
+        validated_items, total_amount = self._price_items(order_data, drugs, variants, inventories)
+
+        # 5. Reserve stock for the whole cart in one UPDATE; it re-checks every row it changes
+        reserved: dict[int, int] = {}
+        for item in validated_items:
+            reserved[item["inventory_id"]] = reserved.get(item["inventory_id"], 0) + item["quantity"]
+        deltas = {inventory_id: (0, reserved[inventory_id]) for inventory_id in sorted(reserved)}
+        if not await self.repository.apply_stock_deltas(deltas):
+            drug_names = ", ".join(dict.fromkeys(item["drug_name"] for item in validated_items))
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"'{drug_names}' uchun yetarli miqdor yo'q"
+            )
+
+        # 6. Allocate the branch's daily order number
+        business_day = datetime.now(ZoneInfo(settings.order_number_timezone)).date()
+        sequence = await self.repository.next_order_number_sequence(order_data.branch_id, business_day)
+
+        # 7. Create order (barcode allocated without a probe query)
+        order = await self.repository.create_order(
+            self._new_order(order_data, user_id, total_amount, business_day, sequence)
+        )
+
+        # 8. Create order items with one multi-row INSERT
+        await self.repository.insert_order_items(self._order_items(order, validated_items))
+
+        # 9. Once committed, warm the scan cache so the cashier's scan skips the order + items load
+        self._after_commit.append(partial(store_scan_payload, self._created_payload(order, validated_items)))
+
+        # 10. Return response
+        return self._created(order)
+
+    @staticmethod
+    def _check_order(order_data: OrderCreate, branch) -> None:
         if not branch:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Branch with id {order_data.branch_id} not found"
             )
 
-        # 2. Validate items are not empty
         if not order_data.items or len(order_data.items) == 0:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Order must contain at least one item"
             )
 
-        # 3. Validate all drugs exist, check inventory, and calculate totals
+    @staticmethod
+    def _price_items(
+        order_data: OrderCreate,
+        drugs: dict,
+        variants: dict,
+        inventories: dict,
+        held: dict[int, int] | None = None
+    ) -> tuple[List[dict], float]:
+        """
+        Validate the cart against loaded drugs and inventories and price it.
+        `held` is stock already taken by earlier orders in the same batch, per inventory id.
+        """
+        held = held or {}
         total_amount = 0.0
         validated_items = []
 
@@ -81,7 +220,7 @@ class OrderService:
                     detail=f"Quantity must be greater than 0 for drug_id {item.drug_id}"
                 )
 
-            drug = await self.repository.get_drug_by_id(item.drug_id)
+            drug = drugs.get(item.drug_id)
             if not drug:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -89,11 +228,7 @@ class OrderService:
                 )
             
             # Check inventory availability
-            inventory = await self.repository.get_inventory_by_branch_and_drug(
-                order_data.branch_id,
-                item.drug_id,
-                item.drug_variant_id
-            )
+            inventory = inventories.get((item.drug_id, item.drug_variant_id))
             
             if not inventory:
                 drug_name = drug.name
@@ -103,19 +238,18 @@ class OrderService:
                     detail=f"'{drug_name}'{variant_msg} uchun omborda mahsulot mavjud emas"
                 )
             
-            if inventory.quantity < item.qty:
+            available = inventory.quantity - inventory.reserved_quantity - held.get(inventory.id, 0)
+            if available < item.qty:
                 drug_name = drug.name
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"'{drug_name}' uchun yetarli miqdor yo'q. Omborda: {inventory.quantity}, Talab: {item.qty}"
+                    detail=f"'{drug_name}' uchun yetarli miqdor yo'q. Omborda: {available}, Talab: {item.qty}"
                 )
             
             # Get price (variant price takes precedence)
             price = float(drug.price)
             if item.drug_variant_id:
-                from app.repositories.drug import DrugRepository
-                drug_repo = DrugRepository(self.session)
-                variant = await drug_repo.get_variant_by_id(item.drug_variant_id)
+                variant = variants.get(item.drug_variant_id)
                 if variant:
                     price = float(variant.price)
             
@@ -124,6 +258,8 @@ class OrderService:
             total_amount += subtotal
             
             validated_items.append({
+                "inventory_id": inventory.id,
+                "drug_name": drug.name,
                 "drug_id": item.drug_id,
                 "drug_variant_id": item.drug_variant_id,
                 "quantity": item.qty,
@@ -131,24 +267,30 @@ class OrderService:
                 "subtotal": subtotal
             })
 
-        # 4. Generate unique barcode and order number
-        barcode = await self.generate_unique_barcode()
-        order_number = barcode  # Use same value for simplicity
+        return validated_items, total_amount
 
-        # 5. Create order
-        new_order = Order(
-            order_number=order_number,
-            barcode=barcode,
+    @staticmethod
+    def _new_order(
+        order_data: OrderCreate,
+        user_id: int,
+        total_amount: float,
+        business_day,
+        sequence: int
+    ) -> Order:
+        return Order(
+            order_number=format_order_number(order_data.branch_id, business_day, sequence),
+            barcode=barcode_allocator.allocate(),
             branch_id=order_data.branch_id,
             user_id=user_id,
             status=OrderStatus.PENDING,
-            total_amount=total_amount
+            total_amount=total_amount,
+            reservation_expires_at=datetime.now(timezone.utc)
+            + timedelta(minutes=settings.order_reservation_ttl_minutes)
         )
 
-        order = await self.repository.create_order(new_order)
-
-        # 6. Create order items
-        order_items = [
+    @staticmethod
+    def _order_items(order: Order, validated_items: List[dict]) -> List[OrderItem]:
+        return [
             OrderItem(
                 order_id=order.id,
                 drug_id=item["drug_id"],
@@ -160,13 +302,18 @@ class OrderService:
             for item in validated_items
         ]
 
-        await self.repository.create_order_items(order_items)
-
-        # 7. Commit transaction
-        await self.session.commit()
-        await self.session.refresh(order)
+    @classmethod
+    def _created_payload(cls, order: Order, validated_items: List[dict]) -> dict:
+        return cls._scan_payload(
+            order,
+            [
+                (item["drug_id"], item["drug_variant_id"], item["quantity"], item["drug_name"])
+                for item in validated_items
+            ]
+        )
 
-        # 8. Return response
+    @staticmethod
+    def _created(order: Order) -> OrderCreateResponse:
         return OrderCreateResponse(
             id=order.id,
             order_number=order.order_number,
@@ -176,84 +323,358 @@ class OrderService:
             created_at=order.created_at
         )
 
-    async def scan_order(self, barcode: str) -> OrderScanResponse:
-        """Scan and confirm order (cashier only)"""
-        
-        # 1. Validate barcode format
-        if not barcode or len(barcode) != 12:
+    async def _scan_order(self, barcode: str) -> OrderScanResponse:
+        # 1. Validate barcode format before touching the database
+        self._check_barcode(barcode)
+
+        # 2. Find the pending order: scan cache first, then the database
+        payload = await get_scan_payload(barcode)
+        if payload is None:
+            order = await self.repository.get_order_by_barcode(barcode)
+            if not order:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Barcode '{barcode}' bo'yicha buyurtma topilmadi"
+                )
+
+            # 3. Check order status
+            self._ensure_pending(order.status)
+
+            payload = self._stored_payload(order)
+
+        # 4. Claim the order: only one concurrent scan can move it out of PENDING.
+        #    A cached payload may be stale, so the claim is also its status check.
+        order_id = payload["id"]
+        branch_id = payload["branch_id"]
+        has_reservation = payload["has_reservation"]
+        confirmed_at = datetime.now(timezone.utc)
+        claimed = await self.repository.confirm_pending_order(order_id, confirmed_at)
+        if not claimed:
+            await invalidate_scan_payloads(barcode)
+            self._ensure_pending(await self.repository.get_order_status(order_id))
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid barcode format"
+                detail="Buyurtma allaqachon tasdiqlangan"
             )
 
-        # 2. Find order by barcode
-        order = await self.repository.get_order_by_barcode(barcode)
-        if not order:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Barcode '{barcode}' bo'yicha buyurtma topilmadi"
-            )
+        # 5. Reduce inventory with conditional updates, in inventory-id order like
+        #    reservations and releases, so concurrent writers always lock rows in the
+        #    same sequence. Reserved stock is converted to a sale; older unreserved
+        #    orders take from available stock.
+        lines = [tuple(line) for line in payload["lines"]]
+        inventory_ids = await self.repository.get_inventory_ids_for_items(
+            branch_id,
+            ((drug_id, drug_variant_id) for drug_id, drug_variant_id, _, _ in lines)
+        )
+        for drug_id, drug_variant_id, quantity, drug_name in lines:
+            if (drug_id, drug_variant_id) not in inventory_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"'{drug_name}' uchun omborda inventar topilmadi"
+                )
 
-        # 3. Check order status
-        if order.status == OrderStatus.CONFIRMED:
+        for drug_id, drug_variant_id, quantity, drug_name in sorted(
+            lines, key=lambda line: inventory_ids[(line[0], line[1])]
+        ):
+            inventory_id = inventory_ids[(drug_id, drug_variant_id)]
+            if has_reservation:
+                decremented = await self.repository.convert_reservation(inventory_id, quantity)
+            else:
+                decremented = await self.repository.decrement_inventory_if_available(inventory_id, quantity)
+            if decremented:
+                continue
+
+            # The caller rolls back the claim and any earlier decrements
+            inventory = await self.repository.get_inventory_by_branch_and_drug(
+                branch_id,
+                drug_id,
+                drug_variant_id
+            )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Buyurtma allaqachon tasdiqlangan"
+                detail=f"'{drug_name}' uchun yetarli miqdor yo'q. Mavjud: {inventory.quantity}, Kerak: {quantity}"
             )
 
-        if order.status == OrderStatus.CANCELLED:
+        # 6. Drop the cached payload once the confirmation is committed
+        self._after_commit.append(partial(invalidate_scan_payloads, barcode))
+
+        # 7. Return response
+        return self._confirmed(payload, confirmed_at)
+
+    @staticmethod
+    def _check_barcode(barcode: str) -> None:
+        if not barcode or not is_valid_barcode(barcode):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Buyurtma bekor qilingan"
+                detail="Invalid barcode format"
             )
 
-        # 4. Process each order item and reduce inventory
-        for item in order.items:
-            inventory = await self.repository.get_inventory_by_branch_and_drug(
-                order.branch_id, 
-                item.drug_id,
-                getattr(item, 'drug_variant_id', None)
-            )
+    @staticmethod
+    def _confirmed(payload: dict, confirmed_at: datetime) -> OrderScanResponse:
+        return OrderScanResponse(
+            id=payload["id"],
+            order_number=payload["order_number"],
+            barcode=payload["barcode"],
+            status=OrderStatus.CONFIRMED,
+            total_amount=payload["total_amount"],
+            confirmed_at=confirmed_at,
+            message="Buyurtma muvaffaqiyatli tasdiqlandi"
+        )
 
-            if not inventory:
-                drug_name = item.drug.name if item.drug else f"ID:{item.drug_id}"
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=f"'{drug_name}' uchun omborda inventar topilmadi"
-                )
+    async def write_batch(self, jobs: List[tuple[str, tuple]]) -> List[object]:
+        """
+        Run many concurrent create_order / scan_order calls ((CREATE, (order_data, user_id))
+        or (SCAN, (barcode,))) as one transaction and return, per job, its response or
+        the exception it raised.
+
+        Carts and barcodes are validated in memory against one locked read of every
+        inventory row involved; a rejected request only loses its own place in the
+        batch. The accepted ones are then written set-based: one stock UPDATE, one
+        order-number upsert, one multi-row INSERT each for orders and items, one COMMIT.
+        If the batch cannot be applied as a whole (stock changed under it, a barcode
+        clash, a scan that needs its own error handling), the affected jobs run one by
+        one on the ordinary path instead.
+        """
+        outcomes: List[object] = [None] * len(jobs)
+        self._after_commit = []
+        try:
+            alone = await self._write_batch(jobs, outcomes)
+            await self.session.commit()
+        except (_BatchConflict, DBAPIError):
+            await self.session.rollback()
+            alone = range(len(jobs))
+        except Exception:
+            await self.session.rollback()
+            raise
+        else:
+            await self._run_after_commit()
+
+        for index in alone:
+            kind, args = jobs[index]
+            method = OrderService._create_order if kind == CREATE else OrderService._scan_order
+            try:
+                outcomes[index] = await self._write(method, *args)
+            except Exception as exc:  # noqa: BLE001 - handed to that job's caller
+                outcomes[index] = exc
+        return outcomes
+
+    async def _write_batch(self, jobs: List[tuple[str, tuple]], outcomes: List[object]) -> List[int]:
+        """The batched write itself; returns the indexes of jobs left for the ordinary path"""
+        alone: List[int] = []
+
+        # 1. Scans: validate barcodes, find pending payloads (cache, then one query)
+        scans: dict[str, int] = {}
+        for index, (kind, args) in enumerate(jobs):
+            if kind != SCAN:
+                continue
+            barcode = args[0]
+            try:
+                self._check_barcode(barcode)
+            except HTTPException as exc:
+                outcomes[index] = exc
+                continue
+            if barcode in scans:
+                # A repeated scan sees the first one's confirmation on its own
+                alone.append(index)
+            else:
+                scans[barcode] = index
+
+        payloads: dict[int, dict] = {}
+        uncached = []
+        for barcode, index in scans.items():
+            payload = await get_scan_payload(barcode)
+            if payload is None:
+                uncached.append(barcode)
+            else:
+                payloads[index] = payload
+        orders = await self.repository.get_orders_by_barcodes(uncached)
+        for barcode in uncached:
+            index = scans[barcode]
+            order = orders.get(barcode)
+            if order is None:
+                # Unknown or archived: the ordinary path has the full lookup and errors
+                alone.append(index)
+                continue
+            try:
+                self._ensure_pending(order.status)
+            except HTTPException as exc:
+                outcomes[index] = exc
+                continue
+            payloads[index] = self._stored_payload(order)
+
+        # 2. Claim them in one statement; losers get their error on the ordinary path
+        confirmed_at = datetime.now(timezone.utc)
+        claimed = await self.repository.confirm_pending_orders(
+            [payload["id"] for payload in payloads.values()],
+            confirmed_at
+        )
+        for index, payload in list(payloads.items()):
+            if payload["id"] not in claimed:
+                alone.append(index)
+                del payloads[index]
+
+        # 3. Creates: branch and cart checks, then drugs and variants for every cart
+        creates: dict[int, tuple[OrderCreate, int]] = {}
+        branches = await self.repository.get_branches_by_ids(
+            args[0].branch_id for kind, args in jobs if kind == CREATE
+        )
+        for index, (kind, args) in enumerate(jobs):
+            if kind != CREATE:
+                continue
+            try:
+                self._check_order(args[0], branches.get(args[0].branch_id))
+            except HTTPException as exc:
+                outcomes[index] = exc
+                continue
+            creates[index] = args
+
+        items = [item for order_data, _ in creates.values() for item in order_data.items]
+        drugs = await self.repository.get_drugs_by_ids(item.drug_id for item in items)
+        variants = await self.repository.get_variants_by_ids(
+            item.drug_variant_id for item in items if item.drug_variant_id
+        )
 
-            # Check quantity availability (re-check before confirming)
-            if inventory.quantity < item.quantity:
-                drug_name = item.drug.name if item.drug else f"ID:{item.drug_id}"
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"'{drug_name}' uchun yetarli miqdor yo'q. Mavjud: {inventory.quantity}, Kerak: {item.quantity}"
-                )
+        # 4. Lock every inventory row the batch touches, in inventory-id order
+        inventories = await self.repository.lock_inventories(
+            [
+                (order_data.branch_id, item.drug_id, item.drug_variant_id)
+                for order_data, _ in creates.values()
+                for item in order_data.items
+            ]
+            + [
+                (payload["branch_id"], line[0], line[1])
+                for payload in payloads.values()
+                for line in payload["lines"]
+            ]
+        )
 
-            # Reduce inventory
-            new_quantity = inventory.quantity - item.quantity
-            await self.repository.update_inventory_quantity(inventory, new_quantity)
+        # 5. Apply the claimed scans to the locked stock, as _scan_order would
+        quantity_deltas: dict[int, int] = {}
+        reserved_deltas: dict[int, int] = {}
+        held: dict[int, int] = {}
+        for payload in payloads.values():
+            for drug_id, drug_variant_id, quantity, _ in payload["lines"]:
+                inventory = inventories.get((payload["branch_id"], drug_id, drug_variant_id))
+                if inventory is None:
+                    raise _BatchConflict()
+                on_hand = inventory.quantity + quantity_deltas.get(inventory.id, 0)
+                reserved = inventory.reserved_quantity + reserved_deltas.get(inventory.id, 0)
+                if payload["has_reservation"]:
+                    if reserved < quantity or on_hand < quantity:
+                        raise _BatchConflict()
+                    reserved_deltas[inventory.id] = reserved_deltas.get(inventory.id, 0) - quantity
+                else:
+                    if on_hand - reserved < quantity:
+                        raise _BatchConflict()
+                    held[inventory.id] = held.get(inventory.id, 0) + quantity
+                quantity_deltas[inventory.id] = quantity_deltas.get(inventory.id, 0) - quantity
+
+        # 6. Price and reserve the carts in arrival order; a short cart only fails itself
+        accepted = []
+        for index, (order_data, user_id) in creates.items():
+            branch_inventories = {
+                (drug_id, drug_variant_id): inventory
+                for (branch_id, drug_id, drug_variant_id), inventory in inventories.items()
+                if branch_id == order_data.branch_id
+            }
+            try:
+                validated_items, total_amount = self._price_items(
+                    order_data, drugs, variants, branch_inventories, held
+                )
+            except HTTPException as exc:
+                outcomes[index] = exc
+                continue
+            for item in validated_items:
+                held[item["inventory_id"]] = held.get(item["inventory_id"], 0) + item["quantity"]
+                reserved_deltas[item["inventory_id"]] = (
+                    reserved_deltas.get(item["inventory_id"], 0) + item["quantity"]
+                )
+            accepted.append((index, order_data, user_id, validated_items, total_amount))
+
+        # 7. One stock UPDATE for the whole batch; it re-checks every row it changes
+        deltas = {
+            inventory_id: (quantity_deltas.get(inventory_id, 0), reserved_deltas.get(inventory_id, 0))
+            for inventory_id in sorted(quantity_deltas.keys() | reserved_deltas.keys())
+        }
+        if not await self.repository.apply_stock_deltas(deltas):
+            raise _BatchConflict()
+
+        # 8. Order numbers for every branch in one upsert, then multi-row inserts
+        business_day = datetime.now(ZoneInfo(settings.order_number_timezone)).date()
+        counts: dict[int, int] = {}
+        for _, order_data, _, _, _ in accepted:
+            counts[order_data.branch_id] = counts.get(order_data.branch_id, 0) + 1
+        last_values = await self.repository.next_order_number_sequences(business_day, counts)
+
+        new_orders = []
+        for _, order_data, user_id, _, total_amount in accepted:
+            branch_id = order_data.branch_id
+            sequence = last_values[branch_id] - counts[branch_id] + 1
+            counts[branch_id] -= 1
+            new_orders.append(self._new_order(order_data, user_id, total_amount, business_day, sequence))
+        await self.repository.create_orders(new_orders)
+        await self.repository.insert_order_items([
+            order_item
+            for order, (_, _, _, validated_items, _) in zip(new_orders, accepted)
+            for order_item in self._order_items(order, validated_items)
+        ])
+
+        # 9. Results, plus the cache work that waits for the commit
+        for order, (index, _, _, validated_items, _) in zip(new_orders, accepted):
+            outcomes[index] = self._created(order)
+            self._after_commit.append(
+                partial(store_scan_payload, self._created_payload(order, validated_items))
+            )
+        for index, payload in payloads.items():
+            outcomes[index] = self._confirmed(payload, confirmed_at)
+        if payloads:
+            self._after_commit.append(
+                partial(invalidate_scan_payloads, *(payload["barcode"] for payload in payloads.values()))
+            )
+        return alone
 
-        # 5. Update order status to confirmed
-        order.status = OrderStatus.CONFIRMED
-        order.confirmed_at = datetime.now(timezone.utc)
-        await self.repository.update_order_status(order, OrderStatus.CONFIRMED)
+    @staticmethod
+    def _ensure_pending(order_status: OrderStatus | None) -> None:
+        if order_status == OrderStatus.CONFIRMED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Buyurtma allaqachon tasdiqlangan"
+            )
 
-        # 6. Commit transaction
-        await self.session.commit()
-        await self.session.refresh(order)
+        if order_status == OrderStatus.CANCELLED:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Buyurtma bekor qilingan"
+            )
 
-        # 7. Return response
-        return OrderScanResponse(
-            id=order.id,
-            order_number=order.order_number,
-            barcode=order.barcode,
-            status=order.status,
-            total_amount=order.total_amount,
-            confirmed_at=order.confirmed_at,
-            message="Buyurtma muvaffaqiyatli tasdiqlandi"
+    @classmethod
+    def _stored_payload(cls, order: Order) -> dict:
+        return cls._scan_payload(
+            order,
+            [
+                (
+                    item.drug_id,
+                    item.drug_variant_id,
+                    item.quantity,
+                    item.drug.name if item.drug else f"ID:{item.drug_id}"
+                )
+                for item in order.items
+            ]
         )
 
+    @staticmethod
+    def _scan_payload(order: Order, lines: List[tuple]) -> dict:
+        """Everything scan_order needs from a pending order, as a JSON-friendly dict"""
+        return {
+            "id": order.id,
+            "order_number": order.order_number,
+            "barcode": order.barcode,
+            "branch_id": order.branch_id,
+            "total_amount": float(order.total_amount),
+            "has_reservation": order.reservation_expires_at is not None,
+            "lines": [list(line) for line in lines]
+        }
+
     async def get_order_by_id(self, order_id: int) -> OrderResponse:
         """Get order details by ID"""
         order = await self.repository.get_order_by_id(order_id)
@@ -297,61 +718,58 @@ class OrderService:
         limit: int = 100,
         status: OrderStatus = None,
         branch_id: int = None,
-        user_id: int = None
+        user_id: int = None,
+        cursor: str = None
     ) -> List[OrderListResponse]:
-        """Get list of orders with filters"""
+        """Get list of orders with filters (offset or cursor pagination)"""
         orders = await self.repository.get_all_orders(
             skip=skip,
             limit=limit,
             status=status,
             branch_id=branch_id,
-            user_id=user_id
+            user_id=user_id,
+            after_id=self._cursor_order_id(cursor)
         )
 
-        return [
-            OrderListResponse(
-                id=order.id,
-                order_number=order.order_number,
-                barcode=order.barcode,
-                branch_id=order.branch_id,
-                user_id=order.user_id,
-                status=order.status,
-                total_amount=order.total_amount,
-                created_at=order.created_at,
-                items_count=len(order.items)
-            )
-            for order in orders
-        ]
+        return [OrderListResponse.model_validate(row) for row in orders]
 
     async def get_orders_by_pharmacy(
         self,
         pharmacy_id: int,
         skip: int = 0,
         limit: int = 100,
-        status: OrderStatus = None
+        status: OrderStatus = None,
+        cursor: str = None
     ) -> List[OrderListResponse]:
-        """Get orders for all branches under a pharmacy"""
+        """Get orders for all branches under a pharmacy (offset or cursor pagination)"""
         orders = await self.repository.get_orders_by_pharmacy(
             pharmacy_id=pharmacy_id,
             skip=skip,
             limit=limit,
-            status=status
+            status=status,
+            after_id=self._cursor_order_id(cursor)
         )
 
-        return [
-            OrderListResponse(
-                id=order.id,
-                order_number=order.order_number,
-                barcode=order.barcode,
-                branch_id=order.branch_id,
-                user_id=order.user_id,
-                status=order.status,
-                total_amount=order.total_amount,
-                created_at=order.created_at,
-                items_count=len(order.items)
+        return [OrderListResponse.model_validate(row) for row in orders]
+
+    @staticmethod
+    def next_cursor(orders: List[OrderListResponse], limit: int) -> str | None:
+        """Opaque cursor for the page after this one, or None when this is the last page"""
+        if len(orders) < limit:
+            return None
+        return encode_cursor({"id": orders[-1].id})
+
+    @staticmethod
+    def _cursor_order_id(cursor: str | None) -> int | None:
+        if not cursor:
+            return None
+        try:
+            return int(decode_cursor(cursor)["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
             )
-            for order in orders
-        ]
 
     async def verify_branch_belongs_to_pharmacy(
         self,
@@ -362,7 +780,7 @@ class OrderService:
         branch = await self.repository.get_branch_by_id(branch_id)
         return branch and branch.pharmacy_id == pharmacy_id
 
-    async def cancel_order(self, order_id: int, current_user: User) -> None:
+    async def cancel_order(self, order_id: int, current_user: Principal) -> None:
         """Cancel a pending order"""
         order = await self.repository.get_order_by_id(order_id)
         if not order:
@@ -402,7 +820,35 @@ class OrderService:
                     detail="You can only cancel orders for your pharmacy's branches"
                 )
 
-        # Cancel order
-        order.status = OrderStatus.CANCELLED
-        await self.repository.update_order_status(order, OrderStatus.CANCELLED)
-        await self.session.commit()
\ No newline at end of file
+        # Cancel order (guarded against a concurrent scan) and release its reserved stock
+        barcode = order.barcode
+        cancelled_ids = await self.repository.cancel_pending_orders([order.id])
+        if not cancelled_ids:
+            await self.session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only pending orders can be cancelled"
+            )
+        await self.repository.release_reservations(cancelled_ids)
+        await self.session.commit()
+        await invalidate_scan_payloads(barcode)
+
+    async def expire_stale_orders(self, batch_size: int) -> int:
+        """
+        Cancel one batch of pending orders whose reservation has expired and release
+        their stock. Returns the number of orders cancelled.
+        """
+        expired_ids = await self.repository.get_expired_pending_order_ids(
+            datetime.now(timezone.utc),
+            batch_size
+        )
+        cancelled_ids = await self.repository.cancel_pending_orders(expired_ids)
+        await self.repository.release_reservations(cancelled_ids)
+        await self.session.commit()
+        return len(cancelled_ids)
+
+    async def archive_old_orders(self, before: datetime, batch_size: int) -> int:
+        """Move one batch of finished orders older than `before` to the archive; returns the count"""
+        archived = await self.repository.archive_orders(before, batch_size)
+        await self.session.commit()
+        return archived
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db import AsyncSessionLocal
+from app.repositories.user import UserRepository
+
+logger = logging.getLogger(__name__)
+
+_rehash_pending = metrics.gauge("password_rehash_pending", "Upgraded password hashes waiting to be written")
+_rehash_written = metrics.counter("password_rehash_written_total", "Stored password hashes upgraded to the current work factor")
+
+# user_id -> (old_hash, new_hash); a later login for the same user replaces the entry
+_pending: dict[int, tuple[str, str]] = {}
+
+
+def schedule_rehash(user_id: int, old_hash: str, new_hash: str) -> None:
+    """Queue a hash upgrade; written by the background flusher, off the login path"""
+    if len(_pending) >= settings.password_rehash_batch_size * 10 and user_id not in _pending:
+        # The flusher is behind (database down?); the upgrade is retried on a later login
+        return
+    _pending[user_id] = (old_hash, new_hash)
+    _rehash_pending.set(len(_pending))
+
+
+async def flush_rehashes() -> int:
+    """Write queued upgrades in batches of password_rehash_batch_size; returns rows updated"""
+    written = 0
+    while _pending:
+        batch = []
+        for user_id in list(_pending)[:settings.password_rehash_batch_size]:
+            old_hash, new_hash = _pending.pop(user_id)
+            batch.append((user_id, old_hash, new_hash))
+        _rehash_pending.set(len(_pending))
+
+        async with AsyncSessionLocal() as session:
+            written += await UserRepository(session).replace_password_hashes(batch)
+            await session.commit()
+    _rehash_written.inc(written)
+    return written
+
+
+async def _run_flusher(interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await flush_rehashes()
+        except Exception:  # noqa: BLE001
+            logger.exception("Password rehash flush failed")
+
+
+@asynccontextmanager
+async def lifespan_password_rehash() -> AsyncIterator[None]:
+    task = asyncio.create_task(_run_flusher(settings.password_rehash_flush_seconds))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+        try:
+            await flush_rehashes()
+        except Exception:  # noqa: BLE001
+            logger.exception("Password rehash flush failed")
@@ -52,6 +52,7 @@ class PharmacyService:
         await self.request_repo.set_status(request, PharmacyRequestStatus.APPROVED)
 
         await self.session.commit()
+        await self.user_repo.invalidate_changed_principals()
         await self.session.refresh(pharmacy)
         return pharmacy
 
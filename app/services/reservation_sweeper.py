@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from app.core.config import settings
+from app.db import AsyncSessionLocal
+from app.services.orders import OrderService
+
+logger = logging.getLogger(__name__)
+
+
+async def sweep_expired_reservations(batch_size: int | None = None) -> int:
+    """Cancel every expired pending order in bulk batches; returns the total cancelled."""
+    batch_size = batch_size or settings.order_reservation_sweep_batch_size
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as session:
+            cancelled = await OrderService(session).expire_stale_orders(batch_size)
+        total += cancelled
+        if cancelled < batch_size:
+            return total
+
+
+async def _run_sweeper(interval_seconds: int) -> None:
+    while True:
+        try:
+            cancelled = await sweep_expired_reservations()
+            if cancelled:
+                logger.info("Cancelled %s expired pending orders", cancelled)
+        except Exception:  # noqa: BLE001
+            logger.exception("Reservation sweep failed")
+        await asyncio.sleep(interval_seconds)
+
+
+@asynccontextmanager
+async def lifespan_reservation_sweeper() -> AsyncIterator[None]:
+    interval = settings.order_reservation_sweep_interval_seconds
+    if interval <= 0:
+        yield
+        return
+
+    task = asyncio.create_task(_run_sweeper(interval))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
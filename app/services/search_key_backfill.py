@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
+
+from app.core.config import settings
+from app.core.text import normalize_search_text
+from app.db import AsyncSessionLocal
+from app.models import Drug, DrugVariant
+from app.repositories.drug import DrugRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_search_keys(batch_size: int | None = None) -> int:
+    """
+    Fill search_key for drugs and variants written before the column existed, one
+    committed batch at a time. New and updated rows get their key on write, so this
+    only has work to do after the migration. Returns the number of rows filled.
+    """
+    batch_size = batch_size or settings.search_key_backfill_batch_size
+    total = 0
+    for model in (Drug, DrugVariant):
+        while True:
+            async with AsyncSessionLocal() as session:
+                repository = DrugRepository(session)
+                rows = await repository.list_missing_search_keys(model, batch_size)
+                if not rows:
+                    break
+                await repository.set_search_keys(model, [(row.id, normalize_search_text(row.name)) for row in rows])
+                await session.commit()
+            total += len(rows)
+    return total
+
+
+@asynccontextmanager
+async def lifespan_search_key_backfill() -> AsyncIterator[None]:
+    async def run() -> None:
+        try:
+            filled = await backfill_search_keys()
+            if filled:
+                logger.info("Backfilled search keys for %s drugs and variants", filled)
+        except Exception:  # noqa: BLE001
+            logger.exception("Search key backfill failed")
+
+    task = asyncio.create_task(run())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
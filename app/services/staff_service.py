@@ -0,0 +1,84 @@
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.principal import Principal
+from app.core.security import get_password_hashes_bulk
+from app.models import UserRole
+from app.repositories.branch import BranchRepository
+from app.repositories.user import UserRepository
+from app.schemas import StaffBulkResult, StaffCreate, StaffRowResult
+
+
+class StaffService:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+        self.branch_repo = BranchRepository(session)
+        self.user_repo = UserRepository(session)
+
+    async def bulk_provision(
+        self,
+        current_user: Principal,
+        pharmacy_id: int,
+        staff: list[StaffCreate],
+    ) -> StaffBulkResult:
+        """
+        Create branch admins and cashiers for a pharmacy in one transaction.
+        Rows are validated up front, passwords are hashed in parallel only for rows that
+        can be inserted, and the insert skips emails that are already registered.
+        Every input row gets a result, in input order.
+        """
+        if current_user.role == UserRole.PHARMACY_ADMIN and current_user.pharmacy_id != pharmacy_id:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot manage another pharmacy")
+        if len(staff) > settings.staff_bulk_max_rows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {settings.staff_bulk_max_rows} users per request"
+            )
+
+        branch_ids = {branch.id for branch in await self.branch_repo.list_by_pharmacy(pharmacy_id)}
+        existing = await self.user_repo.get_existing_emails([row.email for row in staff])
+
+        results: list[StaffRowResult] = []
+        pending: list[tuple[int, StaffCreate]] = []
+        seen: set[str] = set()
+        for index, row in enumerate(staff):
+            if row.email in seen:
+                row_status = "duplicate"
+            elif row.email in existing:
+                row_status = "exists"
+            elif row.branch_id not in branch_ids:
+                row_status = "invalid_branch"
+            else:
+                row_status = None
+                pending.append((index, row))
+            seen.add(row.email)
+            results.append(StaffRowResult(index=index, email=row.email, status=row_status or "created"))
+
+        hashes = await get_password_hashes_bulk([row.password for _, row in pending])
+        created = await self.user_repo.bulk_create([
+            {
+                "email": row.email,
+                "hashed_password": hashed_password,
+                "full_name": row.full_name,
+                "role": row.role,
+                "pharmacy_id": pharmacy_id,
+                "branch_id": row.branch_id,
+            }
+            for (_, row), hashed_password in zip(pending, hashes)
+        ])
+        await self.session.commit()
+
+        for index, row in pending:
+            user_id = created.get(row.email)
+            if user_id is None:
+                # Registered concurrently, between the email check and the insert
+                results[index].status = "exists"
+            else:
+                results[index].user_id = user_id
+
+        return StaffBulkResult(
+            created=len(created),
+            skipped=len(staff) - len(created),
+            results=results,
+        )
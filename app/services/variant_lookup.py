@@ -0,0 +1,157 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager, suppress
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.versioning import catalogue_version
+from app.db import AsyncSessionLocal
+from app.models import Drug, DrugVariant
+from app.repositories.drug import DrugRepository
+
+logger = logging.getLogger(__name__)
+
+_map_entries = metrics.gauge("variant_lookup_entries", "SKUs in the in-process variant lookup map")
+_map_build_seconds = metrics.gauge("variant_lookup_build_seconds", "Duration of the last variant lookup map build")
+
+
+class VariantLookup:
+    """
+    SKU -> (variant, drug) for point-of-sale scans, held in process.
+
+    The map is tagged with the catalogue version it reflects. Writes made through
+    DrugVariantService are applied in place and move the tag forward when nothing else
+    was written in between; a write from another worker leaves the tag behind, so
+    lookups go to the unique sku index while the map is rebuilt in the background.
+    The shared version is read at most once per drug_variant_lookup_check_seconds,
+    so most lookups never leave the process. Writes that bypass the service (seed
+    scripts, SQL) do not bump the version: callers look map misses up in the database,
+    and the periodic rebuild picks up everything else.
+    """
+
+    def __init__(self) -> None:
+        self._by_sku: dict[str, Any] = {}
+        self._drugs: dict[int, Any] = {}
+        self._version: str | None = None
+        self._checked_at = float("-inf")
+        self._rebuild_task: asyncio.Task | None = None
+
+    async def get(self, skus: Iterable[str]) -> dict[str, tuple[Any, Any]] | None:
+        """Hits among `skus`, or None when the map is not current and the database must answer"""
+        if self._version is None or not await self._is_current():
+            self._schedule_rebuild()
+            return None
+        found = {}
+        for sku in skus:
+            variant = self._by_sku.get(sku)
+            if variant is not None:
+                found[sku] = (variant, self._drugs[variant.drug_id])
+        return found
+
+    async def _is_current(self) -> bool:
+        now = asyncio.get_running_loop().time()
+        if now - self._checked_at < settings.drug_variant_lookup_check_seconds:
+            return True
+        version = await catalogue_version.get()
+        self._checked_at = now
+        return version == self._version
+
+    async def rebuild(self) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        # Read before loading: a write landing during the load leaves the map one version behind
+        version = await catalogue_version.get()
+        async with AsyncSessionLocal() as session:
+            variants, drugs = await DrugRepository(session).list_variant_lookup_sources()
+        self._drugs = {drug.id: drug for drug in drugs}
+        self._by_sku = {variant.sku: variant for variant in variants}
+        self._version = version
+        self._checked_at = started
+        _map_entries.set(len(self._by_sku))
+        _map_build_seconds.set(loop.time() - started)
+
+    def upsert_variant(
+        self,
+        variant: DrugVariant,
+        drug: Drug | None,
+        versions: tuple[str, str],
+        previous_sku: str | None = None,
+    ) -> None:
+        if not self._advance(versions):
+            return
+        if previous_sku is not None:
+            self._by_sku.pop(previous_sku, None)
+        if drug is None or not drug.is_active or not variant.is_active:
+            self._by_sku.pop(variant.sku, None)
+        else:
+            self._drugs[drug.id] = drug
+            self._by_sku[variant.sku] = variant
+        _map_entries.set(len(self._by_sku))
+
+    def remove_variant(self, sku: str, versions: tuple[str, str]) -> None:
+        if self._advance(versions):
+            self._by_sku.pop(sku, None)
+            _map_entries.set(len(self._by_sku))
+
+    def note_write(self, versions: tuple[str, str]) -> None:
+        """A catalogue write that does not change any SKU mapping (e.g. a new drug)"""
+        self._advance(versions)
+
+    def _advance(self, versions: tuple[str, str]) -> bool:
+        """Move to the write's version if the map was current just before it"""
+        replaced, new = versions
+        if self._version is None or self._version != replaced:
+            return False
+        self._version = new
+        return True
+
+    def _schedule_rebuild(self) -> None:
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._rebuild_logged())
+
+    async def _rebuild_logged(self) -> None:
+        try:
+            await self.rebuild()
+        except Exception:  # noqa: BLE001
+            logger.exception("Variant lookup rebuild failed")
+
+    async def close(self) -> None:
+        if self._rebuild_task is not None:
+            self._rebuild_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._rebuild_task
+
+
+variant_lookup = VariantLookup()
+
+
+async def _run_refresher(interval_seconds: int) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await variant_lookup.rebuild()
+        except Exception:  # noqa: BLE001
+            logger.exception("Variant lookup rebuild failed")
+
+
+@asynccontextmanager
+async def lifespan_variant_lookup() -> AsyncIterator[None]:
+    try:
+        await variant_lookup.rebuild()
+    except Exception:  # noqa: BLE001
+        # Lookups use the sku index and retry the build on demand
+        logger.exception("Variant lookup build failed")
+
+    task = None
+    if settings.drug_variant_lookup_refresh_seconds > 0:
+        task = asyncio.create_task(_run_refresher(settings.drug_variant_lookup_refresh_seconds))
+    try:
+        yield
+    finally:
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await variant_lookup.close()
@@ -1,10 +1,21 @@
 import api from './api'
 
+// Listings come a page at a time; follow X-Next-Cursor until the last page
+const getAllPages = async (url, params = {}) => {
+  const items = []
+  let cursor
+  do {
+    const response = await api.get(url, { params: cursor ? { ...params, cursor } : params })
+    items.push(...response.data)
+    cursor = response.headers['x-next-cursor']
+  } while (cursor)
+  return items
+}
+
 export const drugService = {
   // Get all drugs
   getAll: async () => {
-    const response = await api.get('/drugs/all')
-    return response.data
+    return getAllPages('/drugs/all')
   },
 
   // Get drugs with filters
@@ -15,8 +26,7 @@ export const drugService = {
 
   // Search drugs
   search: async (query) => {
-    const response = await api.get('/drugs/search', { params: { query } })
-    return response.data
+    return getAllPages('/drugs/search', { query })
   },
 
   // Create drug
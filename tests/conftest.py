@@ -0,0 +1,100 @@
+import itertools
+import os
+import tempfile
+from types import SimpleNamespace
+
+# Settings are read at import time: point the app at a throwaway SQLite database and
+# an unreachable Redis (every Redis use is best-effort) before anything imports it
+_db_dir = tempfile.mkdtemp(prefix="farm-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/test.db"
+os.environ["REDIS_URL"] = "redis://127.0.0.1:1/0"
+os.environ["PASSWORD_HASH_ROUNDS"] = "4"
+os.environ["DEBUG"] = "false"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from app.core import principal_cache  # noqa: E402
+from app.db import AsyncSessionLocal, engine  # noqa: E402
+from app.models import Base, Branch, Drug, Inventory, Pharmacy, UserRole  # noqa: E402
+from app.repositories.user import UserRepository  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    # Ids restart with the database; snapshots cached by an earlier test must not leak in
+    principal_cache._local.clear()
+
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test/api/v1") as http:
+            yield http
+
+
+@pytest.fixture
+async def shop(client):
+    """
+    A branch with a logged-in customer and cashier. `shop.stock(n)` adds a drug with n
+    units; `shop.login(email, role)` registers another user (on this branch for a role).
+    """
+    async with AsyncSessionLocal() as session:
+        pharmacy = Pharmacy(name="Pharmacy")
+        session.add(pharmacy)
+        await session.flush()
+        branch = Branch(name="Branch", pharmacy_id=pharmacy.id)
+        session.add(branch)
+        await session.commit()
+        branch_id = branch.id
+
+    async def login(email: str, role: UserRole | None = None) -> dict[str, str]:
+        response = await client.post("/auth/register", json={"email": email, "password": "secret1"})
+        assert response.status_code == 201, response.text
+        if role is not None:
+            async with AsyncSessionLocal() as session:
+                users = UserRepository(session)
+                user = await users.get_by_id(response.json()["id"])
+                await users.set_role(user, role)
+                await users.assign_branch(user, branch_id)
+                await session.commit()
+        response = await client.post("/auth/login", json={"email": email, "password": "secret1"})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    drug_numbers = itertools.count(1)
+
+    async def stock(quantity: int, price: float = 10) -> int:
+        number = next(drug_numbers)
+        async with AsyncSessionLocal() as session:
+            drug = Drug(name=f"Drug {number}", code=f"D-{number}", price=price)
+            session.add(drug)
+            await session.flush()
+            session.add(Inventory(branch_id=branch_id, drug_id=drug.id, quantity=quantity))
+            await session.commit()
+            return drug.id
+
+    async def inventory(drug_id: int) -> tuple[int, int]:
+        async with AsyncSessionLocal() as session:
+            row = await session.scalar(
+                select(Inventory).where(Inventory.branch_id == branch_id, Inventory.drug_id == drug_id)
+            )
+            return row.quantity, row.reserved_quantity
+
+    return SimpleNamespace(
+        branch_id=branch_id,
+        customer=await login("customer@example.com"),
+        cashier=await login("cashier@example.com", UserRole.CASHIER),
+        login=login,
+        stock=stock,
+        inventory=inventory,
+    )
@@ -0,0 +1,53 @@
+import pytest
+
+from app.db import AsyncSessionLocal
+from app.models import UserRole
+from app.repositories.user import UserRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def _issue_key(client, headers) -> dict[str, str]:
+    response = await client.post("/auth/api-keys", json={"name": "Till"}, headers=headers)
+    assert response.status_code == 201, response.text
+    return {"X-API-Key": response.json()["key"]}
+
+
+async def _order(client, shop, headers, idempotency_key=None):
+    drug_id = await shop.stock(10)
+    if idempotency_key is not None:
+        headers = {**headers, "Idempotency-Key": idempotency_key}
+    return await client.post(
+        "/order/",
+        json={"branch_id": shop.branch_id, "items": [{"drug_id": drug_id, "qty": 1}]},
+        headers=headers,
+    )
+
+
+async def test_key_is_not_its_issuer(client, shop):
+    admin = await shop.login("admin@example.com", UserRole.BRANCH_ADMIN)
+    first, second = await _issue_key(client, admin), await _issue_key(client, admin)
+
+    assert (await client.get("/auth/me", headers=first)).status_code == 401
+    assert (await client.get("/order/my-orders", headers=first)).status_code == 401
+
+    # Terminals under one issuer do not share idempotency keys
+    one = await _order(client, shop, first, idempotency_key="till-retry-1")
+    other = await _order(client, shop, second, idempotency_key="till-retry-1")
+    assert one.status_code == other.status_code == 201
+    assert one.json()["id"] != other.json()["id"]
+
+
+async def test_key_stops_working_when_issuer_leaves_scope(client, shop):
+    admin = await shop.login("admin@example.com", UserRole.BRANCH_ADMIN)
+    key = await _issue_key(client, admin)
+    assert (await _order(client, shop, key)).status_code == 201
+
+    async with AsyncSessionLocal() as session:
+        users = UserRepository(session)
+        user = await users.get_by_email("admin@example.com")
+        await users.set_role(user, UserRole.USER)
+        await session.commit()
+        await users.invalidate_changed_principals()
+
+    assert (await _order(client, shop, key)).status_code == 401
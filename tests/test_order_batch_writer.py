@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import pytest
+
+from app.repositories.orders import OrderRepository
+from app.services.order_writer import order_batch_writer
+from app.services.orders import OrderService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def batch_sizes(monkeypatch):
+    """Start the batch writer for one test and record the size of every batch it writes"""
+    sizes = []
+    write_batch = OrderService.write_batch
+
+    async def recording_write_batch(self, jobs):
+        sizes.append(len(jobs))
+        return await write_batch(self, jobs)
+
+    monkeypatch.setattr(OrderService, "write_batch", recording_write_batch)
+    order_batch_writer.start()
+    yield sizes
+    await order_batch_writer.stop()
+
+
+async def _create(client, shop, *items):
+    return await client.post(
+        "/order/",
+        json={"branch_id": shop.branch_id, "items": [{"drug_id": drug_id, "qty": qty} for drug_id, qty in items]},
+        headers=shop.customer,
+    )
+
+
+async def _scan(client, shop, barcode):
+    return await client.post("/order/scan", params={"barcode": barcode}, headers=shop.cashier)
+
+
+async def test_rejected_orders_only_fail_themselves(client, shop, batch_sizes):
+    scarce = await shop.stock(5)
+    plenty = await shop.stock(100)
+
+    responses = await asyncio.gather(
+        *(_create(client, shop, (scarce, 1), (plenty, 2)) for _ in range(8)),
+        _create(client, shop, (999, 1)),
+        client.post(
+            "/order/",
+            json={"branch_id": 999, "items": [{"drug_id": plenty, "qty": 1}]},
+            headers=shop.customer,
+        ),
+    )
+    created = [response.json() for response in responses[:8] if response.status_code == 201]
+    assert len(created) == 5
+    assert [response.status_code for response in responses[:8]].count(400) == 3
+    assert responses[8].status_code == 404
+    assert responses[9].status_code == 404
+    assert len({order["order_number"] for order in created}) == 5
+    assert max(batch_sizes) > 1
+    assert await shop.inventory(scarce) == (5, 5)
+    assert await shop.inventory(plenty) == (100, 10)
+
+    barcodes = [order["barcode"] for order in created]
+    responses = await asyncio.gather(
+        *(_scan(client, shop, barcode) for barcode in barcodes),
+        _scan(client, shop, barcodes[0]),
+        _scan(client, shop, "not-a-barcode"),
+    )
+    # One of the two scans of the first barcode confirms it, the other is told it already was
+    assert sorted(response.status_code for response in responses[:6]) == [200] * 5 + [400]
+    assert responses[6].status_code == 400
+    assert await shop.inventory(scarce) == (0, 0)
+    assert await shop.inventory(plenty) == (90, 0)
+
+
+async def test_batch_falls_back_to_single_writes_when_stock_moved(client, shop, batch_sizes, monkeypatch):
+    drug = await shop.stock(10)
+
+    apply_stock_deltas = OrderRepository.apply_stock_deltas
+    calls = []
+
+    async def stock_moved_once(self, deltas):
+        # Only the first (batch) update sees the stock move; the single writes go through
+        calls.append(deltas)
+        if len(calls) == 1:
+            return False
+        return await apply_stock_deltas(self, deltas)
+
+    monkeypatch.setattr(OrderRepository, "apply_stock_deltas", stock_moved_once)
+    responses = await asyncio.gather(*(_create(client, shop, (drug, 3)) for _ in range(4)))
+
+    assert sorted(response.status_code for response in responses) == [201, 201, 201, 400]
+    assert await shop.inventory(drug) == (10, 9)
+
+
+@pytest.mark.parametrize("batched", [False, True], ids=["commit-per-request", "batched"])
+async def test_order_write_throughput(client, shop, batched, request):
+    """
+    Orders/sec for creates followed by their scans; run with -s to see the figures.
+    SQLite serialises writers (overlapping ones abort with "database is locked" and
+    retry), so the one-commit-per-request path is measured one request at a time;
+    batches take all of them at once.
+    """
+    orders = 200
+    drug = await shop.stock(orders)
+
+    async def run(calls):
+        if batched:
+            return await asyncio.gather(*(call() for call in calls))
+        return [await call() for call in calls]
+
+    if batched:
+        order_batch_writer.start()
+    try:
+        started = time.perf_counter()
+        created = await run([lambda: _create(client, shop, (drug, 1))] * orders)
+        scanned = await run([
+            lambda barcode=response.json()["barcode"]: _scan(client, shop, barcode) for response in created
+        ])
+        elapsed = time.perf_counter() - started
+    finally:
+        await order_batch_writer.stop()
+
+    assert {response.status_code for response in created} == {201}
+    assert {response.status_code for response in scanned} == {200}
+    assert await shop.inventory(drug) == (0, 0)
+    print(f"\n{request.node.callspec.id}: {orders / elapsed:.0f} orders/s (create + scan)")
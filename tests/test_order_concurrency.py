@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_parallel_scans_never_oversell_a_hot_sku(client, shop):
+    drug_id = await shop.stock(50)
+
+    created = await asyncio.gather(*(
+        client.post(
+            "/order/",
+            json={"branch_id": shop.branch_id, "items": [{"drug_id": drug_id, "qty": 1}]},
+            headers=shop.customer,
+        )
+        for _ in range(100)
+    ))
+    orders = [response.json() for response in created if response.status_code == 201]
+    assert len(orders) == 50
+    assert {response.status_code for response in created} == {201, 400}
+    assert await shop.inventory(drug_id) == (50, 50)
+
+    # Every order scanned three times over, all at once
+    barcodes = [order["barcode"] for order in orders] * 3
+    scanned = await asyncio.gather(*(
+        client.post("/order/scan", params={"barcode": barcode}, headers=shop.cashier)
+        for barcode in barcodes
+    ))
+    statuses = [response.status_code for response in scanned]
+    assert statuses.count(200) == 50
+    assert statuses.count(400) == 100
+    assert {response.json()["barcode"] for response in scanned if response.status_code == 200} == set(
+        order["barcode"] for order in orders
+    )
+    assert await shop.inventory(drug_id) == (0, 0)
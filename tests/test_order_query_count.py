@@ -0,0 +1,48 @@
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.db import engine
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def statements():
+    """Count the SQL statements sent to the database while the test runs"""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+async def test_order_create_query_count_is_flat_in_cart_size(client, shop, statements):
+    """Statements and latency per create for 1..100 line carts; run with -s to see the figures."""
+    drug_ids = [await shop.stock(1000) for _ in range(100)]
+
+    async def create(lines):
+        return await client.post(
+            "/order/",
+            json={"branch_id": shop.branch_id, "items": [{"drug_id": drug_id, "qty": 1} for drug_id in drug_ids[:lines]]},
+            headers=shop.customer,
+        )
+
+    # The first request also loads the customer's principal into the cache
+    assert (await create(1)).status_code == 201
+
+    counts = {}
+    for lines in (1, 10, 30, 100):
+        statements.clear()
+        started = time.perf_counter()
+        response = await create(lines)
+        elapsed = time.perf_counter() - started
+        assert response.status_code == 201, response.text
+        counts[lines] = len(statements)
+        print(f"\n{lines} lines: {counts[lines]} statements, {elapsed * 1000:.1f} ms")
+
+    assert len(set(counts.values())) == 1
@@ -0,0 +1,45 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.core import security
+from app.core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+async def _kill_worker(executor):
+    """Take a pool down the way an OOM kill does: a worker exits mid-task"""
+    with pytest.raises(BrokenProcessPool):
+        await asyncio.get_running_loop().run_in_executor(executor, os._exit, 1)
+
+
+async def test_bulk_hashing_replaces_a_broken_pool():
+    security._bulk_executor = security._process_pool(1)
+    broken = security._bulk_executor
+    await _kill_worker(broken)
+    passwords = ["secret1", "secret2"]
+    try:
+        hashes = await security.get_password_hashes_bulk(passwords)
+        assert security._bulk_executor is not broken
+    finally:
+        security._shutdown_bulk_executor()
+
+    assert all(security.verify_password(password, hashed) for password, hashed in zip(passwords, hashes))
+
+
+async def test_login_hasher_replaces_a_broken_pool(monkeypatch):
+    monkeypatch.setattr(settings, "password_hash_executor", "process")
+    hasher = security._PasswordHasher()
+    hasher._ensure_started()
+    broken = hasher._executor
+    await _kill_worker(broken)
+    try:
+        hashed = await hasher.run(security.get_password_hash, "secret1", 4)
+        assert hasher._executor is not broken
+    finally:
+        hasher.shutdown()
+
+    assert security.verify_password("secret1", hashed)
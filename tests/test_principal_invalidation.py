@@ -0,0 +1,71 @@
+import pytest
+
+from app.db import AsyncSessionLocal
+from app.models import Branch, Pharmacy, UserRole
+from app.repositories.user import UserRepository
+from app.services.branch_service import BranchService
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "staff@example.com"
+PASSWORD = "secret1"
+
+
+async def _login(client) -> dict[str, str]:
+    response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _register_and_login(client) -> tuple[int, dict[str, str]]:
+    response = await client.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+    assert response.status_code == 201, response.text
+    headers = await _login(client)
+    # Prime the principal cache with the pre-promotion snapshot
+    assert (await client.get("/auth/me", headers=headers)).status_code == 200
+    return response.json()["id"], headers
+
+
+async def _create_branch() -> int:
+    async with AsyncSessionLocal() as session:
+        pharmacy = Pharmacy(name="Pharmacy")
+        session.add(pharmacy)
+        await session.flush()
+        branch = Branch(name="Branch", pharmacy_id=pharmacy.id)
+        session.add(branch)
+        await session.commit()
+        return branch.id
+
+
+async def test_promotion_revokes_old_token_and_accepts_new_one(client):
+    user_id, old_headers = await _register_and_login(client)
+    branch_id = await _create_branch()
+
+    async with AsyncSessionLocal() as session:
+        await BranchService(session).assign_admin(branch_id, user_id)
+
+    assert (await client.get("/auth/me", headers=old_headers)).status_code == 401
+    response = await client.get("/auth/me", headers=await _login(client))
+    assert response.status_code == 200
+    assert response.json()["role"] == UserRole.BRANCH_ADMIN.value
+
+
+async def test_request_between_promotion_and_commit_does_not_pin_stale_snapshot(client):
+    user_id, old_headers = await _register_and_login(client)
+
+    async with AsyncSessionLocal() as session:
+        user_repo = UserRepository(session)
+        user = await user_repo.get_by_id(user_id)
+        await user_repo.set_role(user, UserRole.CASHIER)
+
+        # Lands after the change is flushed but before it is committed: it still sees
+        # (and caches) the old row
+        assert (await client.get("/auth/me", headers=old_headers)).status_code == 200
+
+        await session.commit()
+        await user_repo.invalidate_changed_principals()
+
+    assert (await client.get("/auth/me", headers=old_headers)).status_code == 401
+    response = await client.get("/auth/me", headers=await _login(client))
+    assert response.status_code == 200
+    assert response.json()["role"] == UserRole.CASHIER.value
@@ -0,0 +1,28 @@
+import pytest
+
+from app.db import AsyncSessionLocal
+from app.models import DrugVariant, Inventory
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_variant_written_outside_the_service_is_found(client, shop):
+    drug_id = await shop.stock(3)
+    # Map is built and current: the write below bypasses DrugVariantService and the version bump
+    assert (await client.get("/drugs/variants/by-sku/SKU1", headers=shop.cashier)).status_code == 404
+
+    async with AsyncSessionLocal() as session:
+        variant = DrugVariant(drug_id=drug_id, name="10 tab", sku="SKU1", price=12)
+        session.add(variant)
+        await session.flush()
+        session.add(Inventory(branch_id=shop.branch_id, drug_id=drug_id, drug_variant_id=variant.id, quantity=7))
+        await session.commit()
+
+    response = await client.get("/drugs/variants/by-sku/SKU1", headers=shop.cashier)
+    assert response.status_code == 200, response.text
+    assert response.json()["stock"]["available"] == 7
+
+    response = await client.post("/drugs/variants/by-sku", json={"skus": ["SKU1", "NOPE"]}, headers=shop.cashier)
+    assert response.status_code == 200, response.text
+    assert [item["variant"]["sku"] for item in response.json()["items"]] == ["SKU1"]
+    assert response.json()["missing"] == ["NOPE"]